@@ -0,0 +1,99 @@
+"""Static facts about AST subtrees, shared by the optimizer and the backends."""
+import ast_nodes as ast
+
+# expressions whose value depends only on their operands: evaluating one
+# twice with the same variable values gives the same result and does nothing
+# else (no output, input or assignment)
+PURE_EXPRESSIONS = (
+    ast.Literal, ast.Identifier, ast.TypeLiteral, ast.ArithmeticOperation,
+    ast.ComparisonOperation, ast.LogicalOperation, ast.VariadicLogicalOperation,
+    ast.UnaryOperation, ast.Smoosh,
+    ast.TypecastMaek, ast.HoistedExpression,
+)
+
+
+def walk(node):
+    """Yield node and every node below it, without recursion."""
+    pending = [node]
+    while pending:
+        current = pending.pop()
+        if isinstance(current, list):
+            pending.extend(reversed(current))
+        elif isinstance(current, ast.Node):
+            yield current
+            pending.extend(reversed([value for _, value in current.fields()
+                                     if isinstance(value, (ast.Node, list))]))
+
+
+def assigned_variables(statements):
+    # names a list of statements may write, IT included
+    names = set()
+    for node in walk(statements):
+        if isinstance(node, (ast.VariableDeclaration, ast.VariableAssignment,
+                             ast.TypecastIsNow, ast.InputStatement)):
+            names.add(node.identifier)
+        elif isinstance(node, (ast.ExpressionStatement, ast.ConditionalStatement, ast.SwitchStatement)):
+            names.add('IT')
+        elif isinstance(node, ast.LoopCondition) and node.variable:
+            names.add(node.variable)
+    return names
+
+
+def referenced_variables(node):
+    return {current.name for current in walk(node) if isinstance(current, ast.Identifier)}
+
+
+def is_pure(node):
+    return all(isinstance(current, PURE_EXPRESSIONS) for current in walk(node))
+
+
+def invariant_expressions(node, assigned):
+    """Ids of the expressions below node a loop writing only the variables
+    in assigned could compute once: pure, and reading some variable but
+    none of assigned. Worked out from the leaves up in a single pass, not
+    with is_pure and referenced_variables per subtree."""
+    blocked = set()
+    reading = set()
+    invariant = set()
+    # walk lists a node before everything below it, so backwards each
+    # node comes after its children
+    for current in reversed(list(walk(node))):
+        key = id(current)
+        if not isinstance(current, PURE_EXPRESSIONS):
+            blocked.add(key)
+            continue
+        if isinstance(current, ast.Identifier):
+            reading.add(key)
+            if current.name in assigned:
+                blocked.add(key)
+            continue
+        for _, value in current.fields():
+            for child in value if isinstance(value, list) else [value]:
+                if isinstance(child, ast.Node):
+                    if id(child) in blocked:
+                        blocked.add(key)
+                    if id(child) in reading:
+                        reading.add(key)
+        if key in reading and key not in blocked:
+            invariant.add(key)
+    return invariant
+
+
+def switch_table(node):
+    """Lay out a SwitchStatement for jumping straight to the matching case.
+
+    Returns (statements, table, default): the bodies of all cases, OMGWTF
+    last, as one list so running on from a case falls through to the next;
+    a dict from each OMG value to the index where its body starts (the first
+    of equal values wins, as comparing in order would); and the index for a
+    value no OMG matches, len(statements) when there is no OMGWTF.
+    """
+    statements = []
+    table = {}
+    for case in node.cases:
+        table.setdefault(case.value.value, len(statements))
+        statements.extend(case.statements)
+    default = len(statements)
+    if node.default_block is not None:
+        statements.extend(node.default_block)
+    return statements, table, default
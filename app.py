@@ -1,9 +1,7 @@
 import streamlit as st
-import os
 import glob
-from lexer import tokenizer
-from parser import parse
-from interpreter import Interpreter
+from interpreter import run
+from ast_cache import get_cache
 import pandas as pd
 
 # PAGE CONFIGURATION ======================================================
@@ -140,60 +138,33 @@ def load_file(filepath):
         st.error(f"Error loading file: {str(e)}")
         return False
     
-# Save code content to a temporary file for processing
-def save_temp_file(content):
-    temp_file = "temp_code.lol"
-    try:
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return temp_file
-    except Exception as e:
-        st.error(f"Error saving temporary file: {str(e)}")
-        return None
-    
 # Execute the LOLCODE code and update session state
 def execute_code(code_content, user_input=""):
     try:
-        # Save code to temporary file for processing
-        temp_file = save_temp_file(code_content)
-        if not temp_file:
-            return
-        
         # Clear previous output
         st.session_state.console_output = ""
         
-        # Tokenization
-        # Break code to individual tokens 
-        tokens = tokenizer(temp_file)
-        st.session_state.tokens = tokens
+        # Tokenize, parse and interpret the editor contents in memory
+        # (one lex shared by every phase, no temporary file); unchanged
+        # code comes straight from the AST cache
+        result = run(code_content, user_input.splitlines(), cache=get_cache())
         
-        # Parsing
-        # Build Abstract Syntax Tree from tokens
-        ast = parse(temp_file)
+        # Break code to individual tokens 
+        st.session_state.tokens = result['tokens']
         
-        if not ast:
-            st.session_state.console_output = "Parsing failed\n"
+        if not result['ast']:
+            st.session_state.console_output = f"{result['error']}\n"
             st.session_state.symbol_table = []
             return
         
-        # Interpretation
-        # Execute the parsed AST and maintain symbol table
-        interpreter = Interpreter()
-
-        # Execute the program
-        success = interpreter.interpret(ast)
-        
-        # Get output from the interpreter
-        output = interpreter.get_output()
-        if output:
-            st.session_state.console_output = output
+        # Definite errors found before running, then the interpreter's output
+        for error in result['type_errors']:
+            st.session_state.console_output += f"Type Error: {error}\n"
+        if result['output']:
+            st.session_state.console_output += result['output']
         
         # Update symbol table with all variables and their values
-        st.session_state.symbol_table = interpreter.get_symbol_table_display()
-        
-        # Clean up temporary file
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
+        st.session_state.symbol_table = result['symbol_table']
             
     except Exception as e:
         st.session_state.console_output = f"Error: {str(e)}\n"
@@ -267,9 +238,10 @@ with tables_col:
         # Check if tokens exist in session state
         if st.session_state.tokens:
             # Convert tokens to DataFrame for display
-            tokens_df = pd.DataFrame(st.session_state.tokens)
-            tokens_display = tokens_df[['pattern', 'token_name']].copy()
-            tokens_display.columns = ['Lexeme', 'Classification']
+            tokens_display = pd.DataFrame(
+                [(token.lexeme, token.name) for token in st.session_state.tokens],
+                columns=['Lexeme', 'Classification']
+            )
             
             # Display the dataframe as an interactive table
             st.dataframe(
@@ -0,0 +1,99 @@
+"""SUM OF, DIFF OF, PRODUKT OF, QUOSHUNT OF and MOD OF through inline caches.
+
+An arithmetic operation converts both operands with to_number, which tries
+NOOB, TROOF, NUMBR/NUMBAR and YARN in turn, before computing anything. Most
+operations see the same operand types every time they run (two NUMBRs in a
+counting loop), so each arithmetic node gets an inline cache of its own
+(inline_cache): it remembers the operand types of the last evaluation and a
+function specialized for them, which for two numbers is the bare operation
+and otherwise converts only the operands that need it, with the conversion
+for that type (a TROOF by int, NOOB to 0, a YARN still by to_number).
+
+An evaluation with other types is a miss and re-specializes the cache for
+them. A node that keeps changing types stops doing that after MAX_MISSES
+and takes the generic conversion on every miss. Either way the result is
+exactly to_number on both operands followed by the operation.
+
+When semantic analysis has shown that both operands are always numbers, the
+node needs no cache at all and runs the bare operation (arithmetic_function).
+"""
+import operator
+
+from values import to_number
+
+
+def divide(left, right):
+    if right == 0:
+        raise ValueError("Division by zero")
+    return left / right
+
+
+def modulo(left, right):
+    if right == 0:
+        raise ValueError("Modulo by zero")
+    return left % right
+
+
+# operator -> function of the already converted operands
+OPERATIONS = {
+    "SUM OF": operator.add,
+    "DIFF OF": operator.sub,
+    "PRODUKT OF": operator.mul,
+    "QUOSHUNT OF": divide,
+    "MOD OF": modulo,
+}
+
+# operand type -> its conversion to a number, None for numbers themselves;
+# anything else goes through to_number
+CONVERSIONS = {
+    int: None,
+    float: None,
+    bool: int,
+    type(None): lambda value: 0,
+}
+# type changes a cache follows before it stays with the generic conversion
+MAX_MISSES = 8
+
+
+def specialize(operation, left_type, right_type):
+    # operation on operands of exactly these types
+    convert_left = CONVERSIONS.get(left_type, to_number)
+    convert_right = CONVERSIONS.get(right_type, to_number)
+    if convert_left is None and convert_right is None:
+        return operation
+    if convert_left is None:
+        return lambda left, right: operation(left, convert_right(right))
+    if convert_right is None:
+        return lambda left, right: operation(convert_left(left), right)
+    return lambda left, right: operation(convert_left(left), convert_right(right))
+
+
+def inline_cache(operator_name):
+    """A function computing operator_name on any two values, with a cache of
+    its own; give every arithmetic node a separate one."""
+    operation = OPERATIONS[operator_name]
+    # no type is ever `is None`, so the first evaluation misses
+    left_type = right_type = None
+    fast = None
+    misses = 0
+
+    def arithmetic(left, right):
+        nonlocal left_type, right_type, fast, misses
+        if type(left) is left_type and type(right) is right_type:
+            return fast(left, right)
+        if misses < MAX_MISSES:
+            misses += 1
+            left_type, right_type = type(left), type(right)
+            fast = specialize(operation, left_type, right_type)
+            return fast(left, right)
+        return operation(to_number(left), to_number(right))
+    return arithmetic
+
+
+def arithmetic_function(node, types):
+    # what computes an ArithmeticOperation node: the bare operation when
+    # types (see semantics.py) proves both operands are numbers already,
+    # otherwise an inline cache of its own
+    if types.is_number(node.left) and types.is_number(node.right):
+        return OPERATIONS[node.operator]
+    return inline_cache(node.operator)
@@ -0,0 +1,193 @@
+"""On-disk cache of parsed programs.
+
+Entries are keyed by a hash of the source text together with the grammar
+(keyword.txt) and CACHE_VERSION, so editing the program, the keyword table or
+the AST classes never serves a stale tree. Each entry is the pickled
+(tokens, ast) pair for one program; the tokens are kept so the lexemes table
+and the token dump still work on a cache hit.
+
+The directory is bounded by total size. A hit refreshes the entry's mtime and
+after each write the least recently used entries are removed until the
+directory fits again. An entry is written to a temporary file of its own
+and renamed into place, so sessions in threads of one process can store the
+same program at once; temporary files a crashed writer left behind are
+removed by eviction once they are STALE_TEMP_SECONDS old.
+
+A tree nested deeper than pickle can recurse (a few hundred levels of
+operators) is not cached: put returns False and the program is parsed again
+next time.
+
+Only point the cache at a directory you own: entries are unpickled on load.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+from lexer import KEYWORD_FILE, tokenize_source
+from parser import parse_tokens
+from diagnostics import SILENT_DIAGNOSTICS
+
+# bump whenever Token or the AST node classes change shape
+CACHE_VERSION = 6
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'LOLCODE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.lolcache'))
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_ENTRY_SUFFIX = '.ast'
+_TEMP_SUFFIX = '.tmp'
+# a temporary file this old is a leftover, no writer takes that long
+STALE_TEMP_SECONDS = 3600
+
+
+def grammar_version(keyword_file=KEYWORD_FILE):
+    # the keyword table decides how a source is tokenized, so it is part of the key
+    digest = hashlib.sha256(f"v{CACHE_VERSION}:".encode())
+    with open(keyword_file, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+class AstCache:
+    """Content addressed store of (tokens, ast) pairs with LRU eviction."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 keyword_file=KEYWORD_FILE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.grammar = grammar_version(keyword_file)
+
+    def key(self, source):
+        digest = hashlib.sha256(self.grammar.encode())
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def get(self, source):
+        # (tokens, ast) for source, or None on a miss / unreadable entry
+        path = self.path(self.key(source))
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # truncated or written by an incompatible version, drop it
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, source, tokens, tree):
+        # store (tokens, tree) for source; False if it can't be pickled
+        os.makedirs(self.directory, exist_ok=True)
+        key = self.key(source)
+        # write then rename, so a reader never sees half an entry; the
+        # temporary file is this writer's own, other threads may be saving
+        # the same program
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=key + '.', suffix=_TEMP_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                try:
+                    pickle.dump((tokens, tree), f, protocol=pickle.HIGHEST_PROTOCOL)
+                except (RecursionError, pickle.PicklingError):
+                    # nested too deeply for pickle, parse it again next time
+                    return False
+            os.replace(temp_path, self.path(key))
+        finally:
+            # gone already once renamed into place
+            self._remove(temp_path)
+        self.evict()
+        return True
+
+    def evict(self):
+        # drop least recently used entries until the directory fits max_bytes;
+        # temporary files count too, and go once they are stale
+        entries = []
+        total = 0
+        stale = time.time() - STALE_TEMP_SECONDS
+        for mtime, size, path in self._entries(_TEMP_SUFFIX):
+            if mtime < stale:
+                self._remove(path)
+            else:
+                total += size
+        for entry in self._entries():
+            entries.append(entry)
+            total += entry[1]
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries() + self._entries(_TEMP_SUFFIX):
+            self._remove(path)
+
+    def _entries(self, suffix=_ENTRY_SUFFIX):
+        # (mtime, size, path) of every entry (or temporary file) on disk
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(suffix):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_default_cache = None
+
+
+def get_cache():
+    # one cache object per process, shared by main.py and the app
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AstCache()
+    return _default_cache
+
+
+def load_program(source, diagnostics=None, cache=None):
+    """Return (tokens, ast) for source, from the cache when possible.
+
+    On a miss the source is lexed and parsed once and the result stored.
+    Programs that fail to parse raise SyntaxError and are never cached.
+    """
+    diagnostics = diagnostics or SILENT_DIAGNOSTICS
+    if cache is not None:
+        entry = cache.get(source)
+        if entry is not None:
+            diagnostics.info('cache_hit', "Loaded tokens and AST from cache.")
+            return entry
+
+    tokens = tokenize_source(source)
+    diagnostics.info('tokenize_done', f"Tokenization complete. Found {len(tokens)} tokens.")
+    tree = parse_tokens(tokens, diagnostics)
+
+    if cache is not None:
+        try:
+            if not cache.put(source, tokens, tree):
+                diagnostics.info('cache_skipped', "AST nested too deeply to cache.")
+        except OSError as e:
+            # a read-only or full disk only costs the next run a re-parse
+            diagnostics.error('cache_write_failed', f"Could not write AST cache: {e}")
+    return tokens, tree
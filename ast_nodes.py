@@ -0,0 +1,369 @@
+"""Typed AST for LOLCODE programs.
+
+Every node is a small class with __slots__ instead of a dict, so a large
+program's tree costs a fraction of the memory and code can dispatch on the
+node's class (one dict lookup) rather than comparing 'type' strings.
+
+Each class keeps the old dict 'type' string as its `kind`, which is also the
+suffix of the handler a visitor defines for it (visit_<kind>,
+execute_<kind>, evaluate_<kind>, ...).
+"""
+
+
+class Node:
+    __slots__ = ()
+    kind = None
+
+    def fields(self):
+        return [(name, getattr(self, name)) for name in self.__slots__]
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.fields() == other.fields()
+
+    def __repr__(self):
+        args = ", ".join(f"{name}={value!r}" for name, value in self.fields())
+        return f"{type(self).__name__}({args})"
+
+
+# STATEMENTS ===================================================================
+
+class Program(Node):
+    __slots__ = ('statements',)
+    kind = 'program'
+
+    def __init__(self, statements):
+        self.statements = statements
+
+
+class VariableBlock(Node):
+    __slots__ = ('declarations',)
+    kind = 'variable_block'
+
+    def __init__(self, declarations):
+        self.declarations = declarations
+
+
+class VariableDeclaration(Node):
+    __slots__ = ('identifier', 'initial_value')
+    kind = 'variable_declaration'
+
+    def __init__(self, identifier, initial_value=None):
+        self.identifier = identifier
+        self.initial_value = initial_value
+
+
+class VariableAssignment(Node):
+    __slots__ = ('identifier', 'value')
+    kind = 'variable_assignment'
+
+    def __init__(self, identifier, value):
+        self.identifier = identifier
+        self.value = value
+
+
+class TypecastIsNow(Node):
+    __slots__ = ('identifier', 'convert_to_type')
+    kind = 'typecast_isnow'
+
+    def __init__(self, identifier, convert_to_type):
+        self.identifier = identifier
+        self.convert_to_type = convert_to_type
+
+
+class OutputStatement(Node):
+    # newline is False for VISIBLE ... !
+    __slots__ = ('expressions', 'newline')
+    kind = 'output_statement'
+
+    def __init__(self, expressions, newline=True):
+        self.expressions = expressions
+        self.newline = newline
+
+
+class InputStatement(Node):
+    __slots__ = ('identifier',)
+    kind = 'input_statement'
+
+    def __init__(self, identifier):
+        self.identifier = identifier
+
+
+class ExpressionStatement(Node):
+    # bare expression, its value goes to IT
+    __slots__ = ('expression',)
+    kind = 'expression_statement'
+
+    def __init__(self, expression):
+        self.expression = expression
+
+
+class ConditionalStatement(Node):
+    # <expr> O RLY? YA RLY ... (MEBBE <expr> ...)* (NO WAI ...)? OIC
+    # else_block is a statement list, or None when there is no NO WAI
+    __slots__ = ('condition', 'then_block', 'elseif_blocks', 'else_block')
+    kind = 'conditional_statement'
+
+    def __init__(self, condition, then_block, elseif_blocks, else_block=None):
+        self.condition = condition
+        self.then_block = then_block
+        self.elseif_blocks = elseif_blocks
+        self.else_block = else_block
+
+
+class ElseIfBlock(Node):
+    __slots__ = ('condition', 'statements')
+    kind = 'elseif_block'
+
+    def __init__(self, condition, statements):
+        self.condition = condition
+        self.statements = statements
+
+
+class LoopStatement(Node):
+    # loop_condition is None for a plain IM IN YR ... IM OUTTA YR
+    __slots__ = ('loop_identifier', 'loop_condition', 'statements')
+    kind = 'loop_statement'
+
+    def __init__(self, loop_identifier, loop_condition, statements):
+        self.loop_identifier = loop_identifier
+        self.loop_condition = loop_condition
+        self.statements = statements
+
+
+class LoopCondition(Node):
+    # UPPIN YR / NERFIN YR <variable> TIL / WILE <condition>
+    __slots__ = ('loop_operation', 'variable', 'loop_condition', 'condition')
+    kind = 'loop_condition'
+
+    def __init__(self, loop_operation, variable, loop_condition, condition):
+        self.loop_operation = loop_operation
+        self.variable = variable
+        self.loop_condition = loop_condition
+        self.condition = condition
+
+
+class SwitchStatement(Node):
+    # [<expr>] WTF? (OMG <literal> ...)* (OMGWTF ...)? OIC
+    # subject is the expression before WTF?, None to switch on IT as it is;
+    # default_block is a statement list, or None when there is no OMGWTF
+    __slots__ = ('subject', 'cases', 'default_block')
+    kind = 'switch_statement'
+
+    def __init__(self, subject, cases, default_block=None):
+        self.subject = subject
+        self.cases = cases
+        self.default_block = default_block
+
+
+class SwitchCase(Node):
+    __slots__ = ('value', 'statements')
+    kind = 'switch_case'
+
+    def __init__(self, value, statements):
+        self.value = value
+        self.statements = statements
+
+
+class BreakStatement(Node):
+    # GTFO: leaves the innermost loop or WTF?
+    __slots__ = ()
+    kind = 'break_statement'
+
+
+class FunctionDefinition(Node):
+    # HOW IZ I <name> [YR <parameter> (AN YR <parameter>)*] ... IF U SAY SO
+    __slots__ = ('name', 'parameters', 'statements')
+    kind = 'function_definition'
+
+    def __init__(self, name, parameters, statements):
+        self.name = name
+        self.parameters = parameters
+        self.statements = statements
+
+
+class ReturnStatement(Node):
+    # FOUND YR <expr>: leaves the function, which returns the value
+    __slots__ = ('value',)
+    kind = 'return_statement'
+
+    def __init__(self, value):
+        self.value = value
+
+
+# EXPRESSIONS ==================================================================
+
+class Literal(Node):
+    # text is the lexeme as written, value the Python value it stands for
+    __slots__ = ('value_type', 'text', 'value')
+    kind = 'literal'
+
+    def __init__(self, value_type, text, value):
+        self.value_type = value_type
+        self.text = text
+        self.value = value
+
+
+class Identifier(Node):
+    __slots__ = ('name',)
+    kind = 'identifier'
+
+    def __init__(self, name):
+        self.name = name
+
+
+class TypeLiteral(Node):
+    __slots__ = ('value',)
+    kind = 'type_literal'
+
+    def __init__(self, value):
+        self.value = value
+
+
+class ArithmeticOperation(Node):
+    __slots__ = ('operator', 'left', 'right')
+    kind = 'arithmetic_operation'
+
+    def __init__(self, operator, left, right):
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+
+class ComparisonOperation(Node):
+    __slots__ = ('operator', 'left', 'right')
+    kind = 'comparison_operation'
+
+    def __init__(self, operator, left, right):
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+
+class LogicalOperation(Node):
+    # BOTH OF / EITHER OF / WON OF
+    __slots__ = ('operator', 'left', 'right')
+    kind = 'logical_operation'
+
+    def __init__(self, operator, left, right):
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+
+class VariadicLogicalOperation(Node):
+    # ANY OF / ALL OF <expr> (AN <expr>)* [MKAY]
+    __slots__ = ('operator', 'operands')
+    kind = 'variadic_logical_operation'
+
+    def __init__(self, operator, operands):
+        self.operator = operator
+        self.operands = operands
+
+
+class FunctionCall(Node):
+    # I IZ <name> [YR <expr> (AN YR <expr>)*] MKAY
+    __slots__ = ('name', 'arguments')
+    kind = 'function_call'
+
+    def __init__(self, name, arguments):
+        self.name = name
+        self.arguments = arguments
+
+
+class UnaryOperation(Node):
+    __slots__ = ('operator', 'operand')
+    kind = 'unary_operation'
+
+    def __init__(self, operator, operand):
+        self.operator = operator
+        self.operand = operand
+
+
+class Smoosh(Node):
+    __slots__ = ('parts',)
+    kind = 'smoosh'
+
+    def __init__(self, parts):
+        self.parts = parts
+
+
+class TypecastMaek(Node):
+    __slots__ = ('expression', 'convert_to_type')
+    kind = 'typecast_maek'
+
+    def __init__(self, expression, convert_to_type):
+        self.expression = expression
+        self.convert_to_type = convert_to_type
+
+
+# OPTIMIZER ====================================================================
+# nodes the parser never produces, introduced by optimizer.py
+
+class HoistedExpression(Node):
+    # loop-invariant expression, evaluated on first use after its loop is
+    # entered and then read back from the frame under the hidden name
+    __slots__ = ('name', 'expression')
+    kind = 'hoisted_expression'
+
+    def __init__(self, name, expression):
+        self.name = name
+        self.expression = expression
+
+
+class ResetHoisted(Node):
+    # placed before a loop: forget the hoisted values of its last run
+    __slots__ = ('names',)
+    kind = 'reset_hoisted'
+
+    def __init__(self, names):
+        self.names = names
+
+
+STATEMENT_NODES = (
+    Program, VariableBlock, VariableDeclaration, VariableAssignment, TypecastIsNow,
+    OutputStatement, InputStatement, ExpressionStatement, ConditionalStatement,
+    ElseIfBlock, LoopStatement, LoopCondition, SwitchStatement, SwitchCase, BreakStatement,
+    FunctionDefinition, ReturnStatement, ResetHoisted,
+)
+EXPRESSION_NODES = (
+    Literal, Identifier, TypeLiteral, ArithmeticOperation, ComparisonOperation,
+    LogicalOperation, VariadicLogicalOperation, FunctionCall, UnaryOperation, Smoosh,
+    TypecastMaek, HoistedExpression,
+)
+ALL_NODES = STATEMENT_NODES + EXPRESSION_NODES
+
+
+def dispatch_table(handler, prefix, node_classes=ALL_NODES):
+    # {node class: bound method} for every <prefix><kind> method handler has
+    table = {}
+    for node_class in node_classes:
+        method = getattr(handler, prefix + node_class.kind, None)
+        if method is not None:
+            table[node_class] = method
+    return table
+
+
+def is_hidden_name(name):
+    # frame entries made by the optimizer; LOLCODE names start with a letter
+    return name.startswith('_')
+
+
+class NodeVisitor:
+    """Calls visit_<kind>(node) for each node, looked up by the node's class.
+
+    The class -> method table is built once per visitor instance, so a visit
+    is a dict lookup plus the call. Nodes without a visit_ method go to
+    generic_visit.
+    """
+
+    def __init__(self):
+        self._visitors = dispatch_table(self, 'visit_')
+
+    def visit(self, node):
+        visitor = self._visitors.get(type(node))
+        if visitor is None:
+            return self.generic_visit(node)
+        return visitor(node)
+
+    def generic_visit(self, node):
+        raise TypeError(f"No visit_{getattr(node, 'kind', None)} method for {node!r}")
@@ -0,0 +1,282 @@
+"""Timing harness for the LOLCODE pipeline.
+
+Generates large synthetic programs and reports the best-of-N wall time of
+each phase, e.g.
+
+    python benchmark.py parser --size 20000
+    python benchmark.py cache --size 20000
+    python benchmark.py interpreter --size 20000
+    python benchmark.py signals --size 20000
+
+The parser phase also times the parser as it was before its dispatch tables
+(REFERENCE_PARSER, read from git), on the same tokens.
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+import types
+
+from lexer import tokenize_source
+from parser import parse_tokens
+from ast_cache import AstCache, load_program
+from interpreter import Interpreter, BACKENDS
+
+
+# parser.py before the kind->handler tables and iterative skipping
+REFERENCE_PARSER = "cffc129b8aadfac70a566cd91cc5137f74e99f40:parser.py"
+
+
+def load_reference_parser(revision=REFERENCE_PARSER):
+    # parse_tokens of an older parser.py, None without git or the revision;
+    # it imports the current lexer, whose tokens it reads the same way
+    try:
+        source = subprocess.run(["git", "show", revision], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    module = types.ModuleType("reference_parser")
+    exec(compile(source, "reference_parser.py", "exec"), module.__dict__)
+    return module.parse_tokens
+
+
+def best_of(repeat, func, *args):
+    # smallest wall time over a few runs, in seconds
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def generate_program(size):
+    # a mix of every statement kind the parser knows, repeated size times
+    lines = ["HAI 1.2", "    WAZZUP", "        I HAS A total ITZ 0", "    BUHBYE"]
+    for i in range(size):
+        lines.append(f"    I HAS A v{i} ITZ SUM OF {i} AN PRODUKT OF 2 AN 3")
+        lines.append(f"    total R SUM OF total AN v{i}")
+        lines.append(f"    VISIBLE \"value\" v{i} SMOOSH \"a\" AN \"b\"")
+        lines.append(f"    GIMMEH v{i}")
+        lines.append(f"    BOTH SAEM v{i} AN {i}")
+        lines.append("    O RLY?")
+        lines.append("        YA RLY")
+        lines.append("            VISIBLE \"same\"")
+        lines.append("        NO WAI")
+        lines.append("            VISIBLE \"different\"")
+        lines.append("    OIC")
+    lines.append("KTHXBYE")
+    return "\n".join(lines)
+
+
+def generate_arithmetic_program(size):
+    # straight-line number crunching on a few variables, no output
+    lines = ["HAI", "I HAS A a ITZ 1", "I HAS A b ITZ 2", "I HAS A c ITZ 0"]
+    for i in range(size):
+        lines.append("c R SUM OF PRODUKT OF a AN b AN DIFF OF c AN MOD OF a AN 7")
+        lines.append(f"a R SUM OF a AN {i % 5}")
+        lines.append("b R SUM OF b AN 1")
+        lines.append("BOTH SAEM MOD OF c AN 2 AN 0")
+    lines.append("KTHXBYE")
+    return "\n".join(lines)
+
+
+def generate_skip_program(size):
+    # long run of tokens the parser doesn't handle as statements
+    return "HAI\n" + "AN\n" * size + "KTHXBYE"
+
+
+def generate_loop_program(size, counted=True):
+    # one loop of size * 10 passes; with counted=False the body also writes
+    # the bound, so the loop can't take the counted fast path (see loops.py)
+    lines = ["HAI", f"I HAS A n ITZ {size * 10}", "I HAS A total ITZ 0",
+             "IM IN YR l UPPIN YR i TIL BOTH SAEM i AN n",
+             "    total R SUM OF total AN MOD OF i AN 7"]
+    if not counted:
+        lines.append("    n R n")
+    lines += ["IM OUTTA YR l", "VISIBLE total", "KTHXBYE"]
+    return "\n".join(lines)
+
+
+def generate_switch_program(size, cases=50):
+    # a state machine: size * 10 passes through a WTF? with cases OMGs
+    lines = ["HAI", "I HAS A state ITZ 0", "I HAS A total ITZ 0",
+             f"IM IN YR l UPPIN YR i TIL BOTH SAEM i AN {size * 10}",
+             "    state, WTF?"]
+    for case in range(cases):
+        lines.append(f"    OMG {case}")
+        lines.append(f"        total R SUM OF total AN {case}")
+        lines.append(f"        state R MOD OF SUM OF state AN 7 AN {cases}")
+        lines.append("        GTFO")
+    lines += ["    OIC", "IM OUTTA YR l", "VISIBLE total", "KTHXBYE"]
+    return "\n".join(lines)
+
+
+def generate_function_program(size):
+    # the naive doubly recursive Fibonacci, n picked for about size * 4 calls
+    n, calls, previous = 1, 1, 1
+    while calls < size * 4:
+        n, calls, previous = n + 1, calls + previous + 1, calls
+    return "\n".join([
+        "HAI",
+        "HOW IZ I fib YR n",
+        "    BOTH SAEM n AN SMALLR OF n AN 1, O RLY?",
+        "    YA RLY, FOUND YR n",
+        "    OIC",
+        "    FOUND YR SUM OF I IZ fib YR DIFF OF n AN 1 MKAY AN I IZ fib YR DIFF OF n AN 2 MKAY",
+        "IF U SAY SO",
+        f"VISIBLE I IZ fib YR {n} MKAY",
+        "KTHXBYE",
+    ])
+
+
+def generate_tail_call_program(size):
+    # a loop of size * 4 iterations written as a tail-recursive function,
+    # far deeper than the recursion limit would allow without tail calls
+    return "\n".join([
+        "HAI",
+        "HOW IZ I total YR n AN YR sum",
+        "    BOTH SAEM n AN 0, O RLY?",
+        "    YA RLY, FOUND YR sum",
+        "    OIC",
+        "    FOUND YR I IZ total YR DIFF OF n AN 1 AN YR SUM OF sum AN n MKAY",
+        "IF U SAY SO",
+        f"VISIBLE I IZ total YR {size * 4} AN YR 0 MKAY",
+        "KTHXBYE",
+    ])
+
+
+def generate_exit_program(size, signal):
+    # size * 10 short inner loops or function calls, each ended by a GTFO or
+    # FOUND YR when signal is set, otherwise by TIL or the end of the body
+    lines = ["HAI", "I HAS A total ITZ 0", "I HAS A j ITZ 0"]
+    if signal:
+        lines += ["HOW IZ I add YR a AN YR b", "    FOUND YR SUM OF a AN b", "IF U SAY SO"]
+    else:
+        lines += ["HOW IZ I add YR a AN YR b", "    SUM OF a AN b", "IF U SAY SO"]
+    lines += [f"IM IN YR outer UPPIN YR i TIL BOTH SAEM i AN {size * 10}", "    j R 0"]
+    if signal:
+        lines += ["    IM IN YR inner UPPIN YR j",
+                  "        total R SUM OF total AN i",
+                  "        GTFO",
+                  "    IM OUTTA YR inner"]
+    else:
+        lines += ["    IM IN YR inner UPPIN YR j TIL BOTH SAEM j AN 1",
+                  "        total R SUM OF total AN i",
+                  "    IM OUTTA YR inner"]
+    lines += ["    total R I IZ add YR total AN YR i MKAY",
+              "IM OUTTA YR outer", "VISIBLE total", "KTHXBYE"]
+    return "\n".join(lines)
+
+
+def generate_nested_program(depth):
+    # one VISIBLE whose argument is depth nested SUM OFs
+    return "HAI\nVISIBLE " + "SUM OF 1 AN " * depth + "1\nKTHXBYE"
+
+
+def bench_parser(size, repeat):
+    reference = load_reference_parser()
+    if reference is None:
+        print(f"(reference parser {REFERENCE_PARSER} not available, timing the current one only)")
+
+    def compare(elapsed, tokens):
+        # the reference parser's time on the same tokens
+        if reference is None:
+            return ""
+        try:
+            before = best_of(repeat, reference, tokens)
+        except (RecursionError, SyntaxError) as e:
+            # what the reference parser couldn't handle at all
+            return f"  before: {type(e).__name__}"
+        return f"  before {before * 1000:9.1f} ms  ({before / elapsed:.2f}x)"
+
+    tokens = tokenize_source(generate_program(size))
+    elapsed = best_of(repeat, parse_tokens, tokens)
+    print(f"parse  {len(tokens):>8} tokens  {elapsed * 1000:9.1f} ms  "
+          f"{len(tokens) / elapsed / 1000:8.1f} ktok/s" + compare(elapsed, tokens))
+
+    tokens = tokenize_source(generate_skip_program(size))
+    elapsed = best_of(repeat, parse_tokens, tokens)
+    print(f"skip   {len(tokens):>8} tokens  {elapsed * 1000:9.1f} ms" + compare(elapsed, tokens))
+
+    tokens = tokenize_source(generate_nested_program(size))
+    elapsed = best_of(repeat, parse_tokens, tokens)
+    print(f"nested {size:>8} deep    {elapsed * 1000:9.1f} ms" + compare(elapsed, tokens))
+
+
+def bench_cache(size, repeat):
+    source = generate_program(size)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AstCache(directory)
+        cold = best_of(repeat, load_program, source)
+        load_program(source, cache=cache)
+        warm = best_of(repeat, load_program, source, None, cache)
+    print(f"lex+parse {cold * 1000:9.1f} ms")
+    print(f"cache hit {warm * 1000:9.1f} ms  ({cold / warm:.1f}x)")
+
+
+def bench_interpreter(size, repeat):
+    # same parsed program on every backend; compile time is reported on its
+    # own, the run times are of the already compiled program
+    programs = (
+        ("mixed", generate_program, False),
+        ("arithmetic", generate_arithmetic_program, False),
+        ("counted", generate_loop_program, False),
+        ("loop", lambda size: generate_loop_program(size, counted=False), False),
+        ("switch", generate_switch_program, False),
+        ("recursive", generate_function_program, False),
+        ("memoized", generate_function_program, True),
+        ("tail calls", generate_tail_call_program, False),
+    )
+    for label, generate, memoize in programs:
+        tree = parse_tokens(tokenize_source(generate(size)))
+        baseline = None
+        for backend in ['tree'] + list(BACKENDS):
+            interpreter = Interpreter(backend=backend, memoize=memoize)
+            compile_time = 0.0
+            if backend != 'tree':
+                compile_time = best_of(1, interpreter.compile, tree)
+            elapsed = best_of(repeat, interpreter.interpret, tree)
+            if baseline is None:
+                baseline = elapsed
+            print(f"{label:10} {backend:8} compile {compile_time * 1000:9.1f} ms  "
+                  f"run {elapsed * 1000:9.1f} ms  ({baseline / elapsed:.1f}x)")
+
+
+def bench_signals(size, repeat):
+    # GTFO and FOUND YR are statuses returned up the blocks (signals.py), so
+    # leaving a loop or function through them should cost no more than
+    # leaving it the ordinary way
+    plain = parse_tokens(tokenize_source(generate_exit_program(size, False)))
+    signal = parse_tokens(tokenize_source(generate_exit_program(size, True)))
+    for backend in ['tree'] + list(BACKENDS):
+        interpreter = Interpreter(backend=backend)
+        plain_time = best_of(repeat, interpreter.interpret, plain)
+        signal_time = best_of(repeat, interpreter.interpret, signal)
+        print(f"{backend:8} plain {plain_time * 1000:9.1f} ms  "
+              f"GTFO/FOUND YR {signal_time * 1000:9.1f} ms  "
+              f"({signal_time / plain_time:.2f}x)")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("phase", choices=["parser", "cache", "interpreter", "signals"])
+    arg_parser.add_argument("--size", type=int, default=5000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    if args.phase == "parser":
+        bench_parser(args.size, args.repeat)
+    elif args.phase == "cache":
+        bench_cache(args.size, args.repeat)
+    elif args.phase == "interpreter":
+        bench_interpreter(args.size, args.repeat)
+    elif args.phase == "signals":
+        bench_signals(args.size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""Closure compilation backend.
+
+The AST is walked once and every node becomes a small Python function with
+its children and operator already resolved: expressions compile to
+`evaluate(frame) -> value`, statements to `execute(frame) -> status`, where
+frame is the symbol table dict and status is None or one from signals.py. Running the program is then plain nested calls, with no
+per-node dispatch on the node class or comparison of operator strings.
+
+Semantics (coercions, error messages, IT) are those of the tree walker in
+interpreter.py, so both produce the same output and symbol table.
+"""
+import operator
+
+from analysis import switch_table
+import ast_nodes as ast
+from loops import counted_loop, CountedValues, LOOP_STEPS
+from functions import function_result
+from signals import BREAK, Return, TailCall
+from values import to_number, to_boolean, value_to_string, parse_input_value, CASTERS
+from arithmetic import arithmetic_function, OPERATIONS
+
+COMPARISON_OPERATORS = {
+    "BOTH SAEM": operator.eq,
+    "DIFFRINT": operator.ne,
+    "BIGGR OF": lambda left, right: max(to_number(left), to_number(right)),
+    "SMALLR OF": lambda left, right: min(to_number(left), to_number(right)),
+}
+# ANY OF / ALL OF -> the operand value (as a TROOF) that ends the evaluation
+VARIADIC_DECISIVE = {"ANY OF": True, "ALL OF": False}
+
+
+def _fail(error):
+    # compile an invalid node into a closure that raises when (and only when)
+    # it is executed, like the tree walker would
+    def fail(frame):
+        raise error
+    return fail
+
+
+def _no_op(frame):
+    pass
+
+
+class ClosureCompiler:
+    """Turns a Program into a function of the frame.
+
+    Output and input go through the interpreter the program is compiled
+    for; the compiled function can be run again on a fresh frame.
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        # see semantics.py
+        self.types = interpreter.types
+        self.compilers = ast.dispatch_table(self, 'compile_')
+
+    def compile(self, node):
+        if not isinstance(node, ast.Program):
+            raise ValueError("Expected program node")
+        return self.compile_block(node.statements)
+
+    # STATEMENTS ===============================================================
+
+    def compile_block(self, statements):
+        steps = [self.compile_statement(statement) for statement in statements]
+        steps = tuple(step for step in steps if step is not None)
+        if not steps:
+            return _no_op
+        if len(steps) == 1:
+            return steps[0]
+
+        def block(frame):
+            for step in steps:
+                status = step(frame)
+                if status is not None:
+                    return status
+        return block
+
+    def compile_statement(self, node):
+        # None for nodes the interpreter doesn't execute (yet)
+        if not node:
+            return None
+        compiler = self.compilers.get(type(node))
+        if compiler is None or not isinstance(node, ast.STATEMENT_NODES):
+            return None
+        return compiler(node)
+
+    def compile_variable_block(self, node):
+        return self.compile_block(node.declarations)
+
+    def compile_variable_declaration(self, node):
+        name = node.identifier
+        if not node.initial_value:
+            def declare(frame):
+                frame[name] = None
+            return declare
+
+        value = self.compile_expression(node.initial_value)
+
+        def declare(frame):
+            frame[name] = value(frame)
+        return declare
+
+    def compile_variable_assignment(self, node):
+        name = node.identifier
+        value = self.compile_expression(node.value)
+
+        def assign(frame):
+            frame[name] = value(frame)
+        return assign
+
+    def compile_typecast_isnow(self, node):
+        name = node.identifier
+        caster = CASTERS.get(node.convert_to_type)
+        if caster is None:
+            return _fail(ValueError(f"Unknown type: {node.convert_to_type}"))
+
+        def recast(frame):
+            if name not in frame:
+                raise NameError(f"Variable '{name}' is not defined")
+            frame[name] = caster(frame[name])
+        return recast
+
+    def compile_expression_statement(self, node):
+        value = self.compile_expression(node.expression)
+
+        def expression_statement(frame):
+            frame['IT'] = value(frame)
+        return expression_statement
+
+    def compile_conditional_statement(self, node):
+        condition = self.compile_expression(node.condition)
+        then_block = self.compile_block(node.then_block)
+        elseif_blocks = tuple((self.compile_expression(else_if.condition),
+                               self.compile_block(else_if.statements))
+                              for else_if in node.elseif_blocks)
+        else_block = self.compile_block(node.else_block) if node.else_block is not None else _no_op
+
+        def conditional(frame):
+            value = condition(frame)
+            frame['IT'] = value
+            if to_boolean(value):
+                return then_block(frame)
+            for else_if_condition, else_if_block in elseif_blocks:
+                if to_boolean(else_if_condition(frame)):
+                    return else_if_block(frame)
+            return else_block(frame)
+        return conditional
+
+    def compile_loop_statement(self, node):
+        condition = node.loop_condition
+        name = condition.variable if condition is not None else None
+        body = self.compile_block(node.statements)
+        plan = counted_loop(node)
+        if plan is not None:
+            return self.compile_counted_loop(plan, body)
+
+        test = self.compile_expression(condition.condition) if condition is not None and condition.condition else None
+        until = condition is not None and condition.loop_condition == "TIL"
+        step = LOOP_STEPS.get(condition.loop_operation) if name else None
+
+        def loop(frame):
+            # an undeclared loop variable starts at 0
+            if name and name not in frame:
+                frame[name] = 0
+            while True:
+                if test is not None and to_boolean(test(frame)) == until:
+                    return None
+                status = body(frame)
+                if status is not None:
+                    return None if status is BREAK else status
+                if step is not None:
+                    frame[name] = to_number(frame[name]) + step
+        return loop
+
+    def compile_counted_loop(self, plan, body):
+        name = plan.variable
+        bound = self.compile_expression(plan.bound)
+        step = plan.step
+        relation = plan.relation
+
+        def counted(frame):
+            if name not in frame:
+                frame[name] = 0
+            values = CountedValues(frame[name], bound(frame), step, relation)
+            for value in values:
+                frame[name] = value
+                status = body(frame)
+                if status is not None:
+                    return None if status is BREAK else status
+            frame[name] = values.final
+        return counted
+
+    def compile_switch_statement(self, node):
+        subject = self.compile_expression(node.subject) if node.subject else None
+        load_it = self.compile_identifier(ast.Identifier('IT'))
+        statements, table, default = switch_table(node)
+        steps = tuple(self.compile_statement(statement) or _no_op for statement in statements)
+        end = len(steps)
+
+        def switch(frame):
+            if subject is not None:
+                value = frame['IT'] = subject(frame)
+            else:
+                value = load_it(frame)
+            for index in range(table.get(value, default), end):
+                status = steps[index](frame)
+                if status is not None:
+                    return None if status is BREAK else status
+        return switch
+
+    def compile_break_statement(self, node):
+        return lambda frame: BREAK
+
+    def compile_function_definition(self, node):
+        # a call runs the compiled body on a new frame holding the parameters
+        name = node.name
+        parameters = tuple(node.parameters)
+        body = self.compile_block(node.statements)
+        define = self.interpreter.define_function
+
+        def call(*arguments):
+            frame = dict(zip(parameters, arguments))
+            return function_result(body(frame), frame)
+
+        def definition(frame):
+            define(name, parameters, call)
+        return definition
+
+    def compile_return_statement(self, node):
+        if isinstance(node.value, ast.FunctionCall):
+            # tail call, made by the interpreter once this function has returned
+            name = node.value.name
+            arguments = tuple(self.compile_expression(argument) for argument in node.value.arguments)
+            return lambda frame: TailCall(name, [argument(frame) for argument in arguments])
+        value = self.compile_expression(node.value)
+        return lambda frame: Return(value(frame))
+
+    def compile_reset_hoisted(self, node):
+        names = node.names
+
+        def reset(frame):
+            for name in names:
+                frame.pop(name, None)
+        return reset
+
+    def compile_output_statement(self, node):
+        expressions = tuple(self.compile_expression(expr) for expr in node.expressions)
+        write = self.interpreter.output.write
+        end = '\n' if node.newline else ''
+
+        def output(frame):
+            write(' '.join([value_to_string(expr(frame)) for expr in expressions]) + end)
+        return output
+
+    def compile_input_statement(self, node):
+        name = node.identifier
+        get_input = self.interpreter.get_input
+
+        def read_input(frame):
+            frame[name] = parse_input_value(get_input())
+        return read_input
+
+    # EXPRESSIONS ==============================================================
+
+    def compile_expression(self, node):
+        if not node:
+            return lambda frame: None
+        compiler = self.compilers.get(type(node))
+        if compiler is None or not isinstance(node, ast.EXPRESSION_NODES):
+            return _fail(ValueError(f"Unknown expression type: {node.kind}"))
+        return compiler(node)
+
+    def compile_literal(self, node):
+        value = node.value
+        return lambda frame: value
+
+    def compile_type_literal(self, node):
+        # Type literals evaluate to NOOB
+        return lambda frame: None
+
+    def compile_identifier(self, node):
+        name = node.name
+
+        def load(frame):
+            try:
+                return frame[name]
+            except KeyError:
+                raise NameError(f"Variable '{name}' is not defined") from None
+        return load
+
+    def compile_function_call(self, node):
+        name = node.name
+        arguments = tuple(self.compile_expression(argument) for argument in node.arguments)
+        call_function = self.interpreter.call_function
+
+        def call(frame):
+            return call_function(name, [argument(frame) for argument in arguments])
+        return call
+
+    def compile_arithmetic_operation(self, node):
+        if node.operator not in OPERATIONS:
+            return _fail(ValueError(f"Unknown arithmetic operator: {node.operator}"))
+        # the bare operation or the node's inline cache, see arithmetic.py
+        function = arithmetic_function(node, self.types)
+        left = self.compile_expression(node.left)
+        right = self.compile_expression(node.right)
+
+        def arithmetic(frame):
+            return function(left(frame), right(frame))
+        return arithmetic
+
+    def compile_comparison_operation(self, node):
+        function = COMPARISON_OPERATORS.get(node.operator)
+        if function is None:
+            return _fail(ValueError(f"Unknown comparison operator: {node.operator}"))
+        left = self.compile_expression(node.left)
+        right = self.compile_expression(node.right)
+
+        def comparison(frame):
+            return function(left(frame), right(frame))
+        return comparison
+
+    def compile_logical_operation(self, node):
+        # the right side is only evaluated when it can change the result
+        operator_name = node.operator
+        if operator_name not in ("BOTH OF", "EITHER OF", "WON OF"):
+            return _fail(ValueError(f"Unknown logical operator: {operator_name}"))
+        left = self.compile_expression(node.left)
+        right = self.compile_expression(node.right)
+
+        if operator_name == "BOTH OF":
+            return lambda frame: to_boolean(left(frame)) and to_boolean(right(frame))
+        if operator_name == "EITHER OF":
+            return lambda frame: to_boolean(left(frame)) or to_boolean(right(frame))
+        return lambda frame: to_boolean(left(frame)) != to_boolean(right(frame))
+
+    def compile_variadic_logical_operation(self, node):
+        decisive = VARIADIC_DECISIVE.get(node.operator)
+        if decisive is None:
+            return _fail(ValueError(f"Unknown logical operator: {node.operator}"))
+        operands = tuple(self.compile_expression(operand) for operand in node.operands)
+
+        def variadic(frame):
+            for operand in operands:
+                if to_boolean(operand(frame)) is decisive:
+                    return decisive
+            return not decisive
+        return variadic
+
+    def compile_unary_operation(self, node):
+        if node.operator != "NOT":
+            return _fail(ValueError(f"Unknown unary operator: {node.operator}"))
+        operand = self.compile_expression(node.operand)
+        return lambda frame: not to_boolean(operand(frame))
+
+    def compile_hoisted_expression(self, node):
+        name = node.name
+        expression = self.compile_expression(node.expression)
+
+        def hoisted(frame):
+            try:
+                return frame[name]
+            except KeyError:
+                value = frame[name] = expression(frame)
+                return value
+        return hoisted
+
+    def compile_smoosh(self, node):
+        parts = tuple(self.compile_expression(part) for part in node.parts)
+        return lambda frame: ''.join([value_to_string(part(frame)) for part in parts])
+
+    def compile_typecast_maek(self, node):
+        caster = CASTERS.get(node.convert_to_type)
+        if caster is None:
+            return _fail(ValueError(f"Unknown type: {node.convert_to_type}"))
+        expression = self.compile_expression(node.expression)
+        return lambda frame: caster(expression(frame))
+
+
+def compile_program(program, interpreter):
+    # backend entry point, see interpreter.BACKENDS
+    return ClosureCompiler(interpreter).compile(program)
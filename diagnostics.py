@@ -0,0 +1,80 @@
+import sys
+import traceback
+
+# verbosity levels, each one includes everything below it
+SILENT = 0
+ERROR = 1
+INFO = 2
+DEBUG = 3
+TRACE = 4
+
+LEVEL_NAMES = {SILENT: "SILENT", ERROR: "ERROR", INFO: "INFO", DEBUG: "DEBUG", TRACE: "TRACE"}
+
+
+class Diagnostics:
+    """Sink for what the lexer, parser and interpreter report while working.
+
+    Every report is a structured event: a dict with the level, an event name
+    (e.g. 'token', 'parse_error'), a human readable message and any extra
+    fields. Events above the configured level are dropped before anything is
+    formatted, so the default (SILENT) costs one comparison per call site.
+
+    Events that pass the level go to a text stream (stdout, an open file or a
+    path opened for writing) and/or to a handler callable that receives the
+    event dict.
+    """
+
+    def __init__(self, level=SILENT, stream=None, path=None, handler=None):
+        self.level = level
+        self.handler = handler
+        self._owns_stream = False
+        if path is not None:
+            stream = open(path, 'w', encoding='utf-8')
+            self._owns_stream = True
+        self.stream = stream
+
+    def enabled(self, level):
+        return level <= self.level
+
+    def emit(self, level, event, message, **fields):
+        if level > self.level:
+            return
+        if self.stream is not None:
+            self.stream.write(message + "\n")
+        if self.handler is not None:
+            record = {'level': LEVEL_NAMES[level], 'event': event, 'message': message}
+            record.update(fields)
+            self.handler(record)
+
+    def error(self, event, message, **fields):
+        self.emit(ERROR, event, message, **fields)
+
+    def info(self, event, message, **fields):
+        self.emit(INFO, event, message, **fields)
+
+    def debug(self, event, message, **fields):
+        self.emit(DEBUG, event, message, **fields)
+
+    def trace(self, event, message, **fields):
+        self.emit(TRACE, event, message, **fields)
+
+    def exception(self, event, exc):
+        # report an exception together with its traceback
+        if ERROR > self.level:
+            return
+        details = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        self.emit(ERROR, event, details.rstrip("\n"), error=str(exc))
+
+    def close(self):
+        if self._owns_stream:
+            self.stream.close()
+            self._owns_stream = False
+
+
+# shared do-nothing instance used whenever no diagnostics are passed in
+SILENT_DIAGNOSTICS = Diagnostics()
+
+
+def verbose(level=TRACE, stream=None):
+    # convenience for command line tools: everything up to level on stdout
+    return Diagnostics(level, stream=stream if stream is not None else sys.stdout)
@@ -0,0 +1,153 @@
+"""Functions: HOW IZ I ... IF U SAY SO, called with I IZ ... MKAY.
+
+A definition runs as a statement: it registers the function under its name
+with the interpreter (Interpreter.define_function), so a call only finds
+functions whose HOW IZ I has already run, itself included for recursion.
+Each backend compiles the body its own way and hands over call(*arguments).
+
+A call runs the body on a frame of its own holding only the parameters, so
+calling a function costs one small dict (or slot list) rather than a copy of
+the symbol table, and a function can't see or change the caller's
+variables. It returns the value of FOUND YR, NOOB after a GTFO outside any
+loop or WTF?, and otherwise the function's own IT.
+
+FOUND YR I IZ g ... MKAY is a tail call: nothing is left to do in the
+function once g returns. Instead of calling g, the function returns a
+TailCall with g's arguments, and Interpreter.call_function, which made the
+call, runs g next in the same loop. A chain of tail calls, such as a loop
+written as a recursive function, so needs no deeper Python stack than a
+single call however long it runs, and each frame is dropped as soon as the
+next call starts.
+
+Other calls nest: a program may be at most MAX_CALL_DEPTH calls deep, on
+every backend, and one more is a runtime error. Each nested call is
+several Python calls deep (seven to over twenty on the tree walker, two in
+translated Python), so while a program runs Python's recursion limit is
+raised to RECURSION_LIMIT, see raised_recursion_limit.
+
+Functions that pure_functions proves free of side effects can be memoized,
+which is off unless asked for (the interpreter's memoize: True, or how many
+results to keep). Their calls then go through an LRU cache keyed on the
+argument values and types, so computing the same call again (the recursion
+tree of a Fibonacci-style helper) becomes a lookup.
+"""
+import sys
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+import ast_nodes as ast
+from analysis import walk
+from signals import BREAK, Return
+
+# results kept per function with memoize=True
+DEFAULT_MEMO_SIZE = 4096
+# nested calls (tail calls don't nest) a program may make, on every backend
+MAX_CALL_DEPTH = 2000
+# Python's limit while a program runs: MAX_CALL_DEPTH calls on the tree
+# walker, whose calls from inside a loop and a WTF? are over 20 Python
+# calls deep. CPython 3.11 calls between Python functions without using
+# the C stack, so this still fits in a thread's default 8MB stack.
+RECURSION_LIMIT = 100000
+
+# statements with an effect beyond the function's own frame
+IMPURE_STATEMENTS = (ast.OutputStatement, ast.InputStatement, ast.FunctionDefinition)
+
+
+_limit_lock = threading.Lock()
+_limit_users = 0
+_saved_limit = None
+
+
+@contextmanager
+def raised_recursion_limit():
+    """Python's recursion limit at least RECURSION_LIMIT inside the block.
+
+    The limit is the whole process's: it is raised when the first block
+    enters, in any thread, and put back when the last one leaves, so
+    programs running side by side keep it and the host gets its own back.
+    """
+    global _limit_users, _saved_limit
+    with _limit_lock:
+        if _limit_users == 0:
+            _saved_limit = sys.getrecursionlimit()
+            sys.setrecursionlimit(max(_saved_limit, RECURSION_LIMIT))
+        _limit_users += 1
+    try:
+        yield
+    finally:
+        with _limit_lock:
+            _limit_users -= 1
+            if _limit_users == 0:
+                sys.setrecursionlimit(_saved_limit)
+
+
+class Function:
+    """A defined function: its parameters and call(*arguments) -> value."""
+    __slots__ = ('name', 'parameters', 'call')
+
+    def __init__(self, name, parameters, call):
+        self.name = name
+        self.parameters = parameters
+        self.call = call
+
+
+def function_result(status, frame):
+    # the value of a call whose body finished with status on frame, or the
+    # TailCall to run in its place
+    if status is None:
+        return frame.get('IT')
+    if status is BREAK:
+        return None
+    if type(status) is Return:
+        return status.value
+    return status
+
+
+def memo_size(memoize):
+    # the interpreter's memoize option as a cache size, 0 for off
+    if memoize is True:
+        return DEFAULT_MEMO_SIZE
+    return memoize or 0
+
+
+def memoized(call, size):
+    # typed, so 1, 1.0 and WIN are different arguments
+    return lru_cache(maxsize=size, typed=True)(call)
+
+
+def pure_functions(program):
+    """Names of the functions in program whose result depends only on their
+    arguments: no VISIBLE, GIMMEH or nested HOW IZ I, and calls only to
+    functions that are pure themselves. A name defined more than once is
+    never pure, the definitions could differ."""
+    definitions = {}
+    for node in walk(program):
+        if isinstance(node, ast.FunctionDefinition):
+            definitions.setdefault(node.name, []).append(node)
+
+    callees = {}
+    candidates = set()
+    for name, nodes in definitions.items():
+        if len(nodes) > 1:
+            continue
+        called = set()
+        for node in walk(nodes[0].statements):
+            if isinstance(node, IMPURE_STATEMENTS):
+                break
+            if isinstance(node, ast.FunctionCall):
+                called.add(node.name)
+        else:
+            candidates.add(name)
+            callees[name] = called
+
+    # drop functions calling something impure until nothing changes;
+    # recursion among the rest is fine
+    changed = True
+    while changed:
+        changed = False
+        for name in list(candidates):
+            if not callees[name] <= candidates:
+                candidates.discard(name)
+                changed = True
+    return frozenset(candidates)
@@ -0,0 +1,184 @@
+"""Where GIMMEH reads from.
+
+Interpreter.input is an InputSource that hands out one line per GIMMEH,
+without its line ending. The sources:
+
+    ListSource      lines already in memory (what set_input and run use for
+                    a list, and the default: no input at all)
+    IteratorSource  any iterable of lines, consumed lazily
+    StreamSource    a text stream read line by line, sys.stdin by default
+    FileSource      a path (or an already open file) read line by line
+    MmapSource      a memory-mapped file, for very large inputs
+
+Only ListSource holds its lines; the others read one line per GIMMEH, so a
+program can consume a multi-gigabyte input in constant memory.
+
+What GIMMEH gets once the input runs out is set by on_eof:
+
+    EOF_EMPTY   an empty string, YARN "" (the default, as before)
+    EOF_NOOB    NOOB
+    EOF_ERROR   a runtime error
+"""
+import mmap
+import sys
+
+EOF_EMPTY = 'empty'
+EOF_NOOB = 'noob'
+EOF_ERROR = 'error'
+EOF_BEHAVIOURS = (EOF_EMPTY, EOF_NOOB, EOF_ERROR)
+
+
+def _strip_line_ending(line):
+    if line.endswith('\n'):
+        line = line[:-1]
+        if line.endswith('\r'):
+            line = line[:-1]
+    return line
+
+
+class InputSource:
+    """Base class: readline gives the next line or None at the end."""
+
+    def __init__(self, on_eof=EOF_EMPTY):
+        if on_eof not in EOF_BEHAVIOURS:
+            raise ValueError(f"Unknown EOF behaviour: {on_eof}")
+        self.on_eof = on_eof
+
+    def readline(self):
+        raise NotImplementedError
+
+    def read(self):
+        # the next line for GIMMEH, with on_eof applied at the end
+        line = self.readline()
+        if line is not None:
+            return line
+        if self.on_eof == EOF_ERROR:
+            raise EOFError("GIMMEH: no more input")
+        if self.on_eof == EOF_NOOB:
+            return None
+        return ""
+
+    def reset(self):
+        # called before each run of a program; only sources that can
+        # start over do anything
+        pass
+
+    def close(self):
+        pass
+
+
+class ListSource(InputSource):
+    """Lines in a list (or any sequence), read again from the start on reset."""
+
+    def __init__(self, lines=(), on_eof=EOF_EMPTY):
+        super().__init__(on_eof)
+        self.lines = lines
+        self.index = 0
+
+    def readline(self):
+        if self.index < len(self.lines):
+            line = self.lines[self.index]
+            self.index += 1
+            return line
+        return None
+
+    def reset(self):
+        self.index = 0
+
+
+class IteratorSource(InputSource):
+    """Lines from an iterable, one at a time; a trailing newline is dropped."""
+
+    def __init__(self, lines, on_eof=EOF_EMPTY):
+        super().__init__(on_eof)
+        self.lines = iter(lines)
+
+    def readline(self):
+        line = next(self.lines, None)
+        if line is None:
+            return None
+        return _strip_line_ending(line)
+
+
+class StreamSource(InputSource):
+    """Lines from a text stream, sys.stdin by default."""
+
+    def __init__(self, stream=None, on_eof=EOF_EMPTY):
+        super().__init__(on_eof)
+        self.stream = stream if stream is not None else sys.stdin
+
+    def readline(self):
+        line = self.stream.readline()
+        # an empty string is the end; an empty line still has its newline
+        if not line:
+            return None
+        return _strip_line_ending(line)
+
+
+class FileSource(StreamSource):
+    """Lines from a file; a path is opened for reading and closed by close()."""
+
+    def __init__(self, file, on_eof=EOF_EMPTY):
+        self._owns_stream = isinstance(file, str)
+        if self._owns_stream:
+            file = open(file, 'r', encoding='utf-8')
+        super().__init__(file, on_eof)
+
+    def close(self):
+        if self._owns_stream:
+            self.stream.close()
+
+
+class MmapSource(InputSource):
+    """Lines from a memory-mapped file, read again from the start on reset.
+
+    The operating system pages the file in as it is read, so even a file
+    larger than memory costs one line at a time.
+    """
+
+    def __init__(self, path, on_eof=EOF_EMPTY, encoding='utf-8'):
+        super().__init__(on_eof)
+        self.encoding = encoding
+        self.position = 0
+        with open(path, 'rb') as file:
+            try:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # an empty file can't be mapped
+                self.map = b''
+
+    def readline(self):
+        data = self.map
+        start = self.position
+        if start >= len(data):
+            return None
+        end = data.find(b'\n', start) + 1
+        if end == 0:
+            end = len(data)
+        self.position = end
+        return _strip_line_ending(data[start:end].decode(self.encoding))
+
+    def reset(self):
+        self.position = 0
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+
+
+def input_source(inputs, on_eof=None):
+    """An InputSource for inputs: a source as it is, a list or tuple of
+    lines, or any other iterable of lines read lazily.
+
+    on_eof defaults to EOF_EMPTY. A source keeps its own on_eof; asking
+    for a different one raises ValueError rather than changing the source.
+    """
+    if isinstance(inputs, InputSource):
+        if on_eof is not None and on_eof != inputs.on_eof:
+            raise ValueError(f"on_eof={on_eof!r} conflicts with the source's own on_eof={inputs.on_eof!r}")
+        return inputs
+    if on_eof is None:
+        on_eof = EOF_EMPTY
+    if isinstance(inputs, (list, tuple)):
+        return ListSource(inputs, on_eof)
+    return IteratorSource(inputs, on_eof)
@@ -1,188 +1,359 @@
 import sys
 from io import StringIO
+from lexer import tokenize_source
+from ast_cache import load_program
+from diagnostics import SILENT_DIAGNOSTICS
+from optimizer import optimize, DEFAULT_OPT_LEVEL
+import ast_nodes as ast
+import values
+from analysis import switch_table
+from arithmetic import arithmetic_function, OPERATIONS
+from semantics import infer_types, ProgramTypes
+from loops import counted_loop, CountedValues, LOOP_STEPS
+from signals import BREAK, Return, TailCall
+from functions import (Function, function_result, memo_size, memoized, pure_functions,
+                       raised_recursion_limit, MAX_CALL_DEPTH)
+from output import MemorySink
+from input_source import ListSource, input_source
+import closures
+import vm
+import transpiler
+
+# execution backends besides the tree walker: name -> compile(program, interpreter),
+# which returns a function that runs the program on a frame (the symbol table)
+BACKENDS = {
+    'closure': closures.compile_program,
+    'vm': vm.compile_program,
+    'python': transpiler.compile_program,
+}
 
 class Interpreter:
-    def __init__(self):
+    def __init__(self, diagnostics=None, backend='tree', output=None, input=None,
+                 memoize=False):
+        if backend != 'tree' and backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.diagnostics = diagnostics or SILENT_DIAGNOSTICS
+        self.backend = backend
+        self.compiled = None
+        # id(node) -> (node, static analysis of it), worked out on first run;
+        # one analysis per kind of node, the program's own are kept by analyze
+        self.plans = {}
+        # the program types and memoizable were worked out for
+        self.analyzed = None
         self.symbol_table = {} 
-        self.output_buffer = []
-        self.input_buffer = []
-        self.input_index = 0
+        # where VISIBLE writes, see output.py
+        self.output = output or MemorySink()
+        # where GIMMEH reads, see input_source.py
+        self.input = input or ListSource()
+        # name -> Function, filled in as HOW IZ I statements run
+        self.functions = {}
+        # calls running right now, see MAX_CALL_DEPTH
+        self.call_depth = 0
+        # LRU cache size for pure functions, 0 when off (see functions.py)
+        self.memo_size = memo_size(memoize)
+        self.memoizable = frozenset()
+        # static types of the program's expressions, see semantics.py
+        self.types = ProgramTypes()
+        # node class -> handler, so dispatch is one dict lookup per node
+        self.statement_handlers = ast.dispatch_table(self, 'execute_', ast.STATEMENT_NODES)
+        self.expression_handlers = ast.dispatch_table(self, 'evaluate_', ast.EXPRESSION_NODES)
     
     # Reset the interpreter state
     def reset(self):
         self.symbol_table = {}
-        self.output_buffer = []
-        self.input_index = 0
+        self.functions = {}
+        self.output.reset()
+        self.input.reset()
 
-    # Set input lines for GIMMEH statements 
-    def set_input(self, input_lines):
-        self.input_buffer = input_lines
-        self.input_index = 0
+    # Set input lines (or an InputSource) for GIMMEH statements 
+    def set_input(self, input_lines, on_eof=None):
+        self.input = input_source(input_lines, on_eof)
     
     # Get the next input line
     def get_input(self):
-        if self.input_index < len(self.input_buffer):
-            value = self.input_buffer[self.input_index]
-            self.input_index += 1
-            return value
-        return ""
+        # show any prompt before waiting for the answer
+        self.output.flush()
+        return self.input.read()
     
     # Get all output as a string
     def get_output(self):
-        return '\n'.join(self.output_buffer)
+        return self.output.get_output()
     
     # Interpretation method
     def interpret(self, ast):
         try:
             self.reset()
-            return self.execute_program(ast)
+            with raised_recursion_limit():
+                self.analyze(ast)
+                if self.backend == 'tree':
+                    return self.execute_program(ast)
+                self.compile(ast)(self.symbol_table)
+            return True
         except Exception as e:
-            self.output_buffer.append(f"Runtime Error: {str(e)}")
+            if not self.output.at_line_start():
+                self.output.write('\n')
+            self.output.write(f"Runtime Error: {str(e)}\n")
+            self.diagnostics.exception('runtime_error', e)
             return False
+        finally:
+            self.output.flush()
+    
+    # Work out what execution relies on about the program, once per tree
+    def analyze(self, ast):
+        if self.analyzed is not ast:
+            self.types = infer_types(ast)
+            if self.memo_size:
+                self.memoizable = pure_functions(ast)
+            self.analyzed = ast
+        return self.types
+    
+    # Compile a program for the selected backend, once per tree
+    def compile(self, ast):
+        if self.compiled is None or self.compiled[0] is not ast:
+            self.analyze(ast)
+            self.compiled = (ast, BACKENDS[self.backend](ast, self))
+        return self.compiled[1]
     
     # Execute the program node
     def execute_program(self, node):
-        if node['type'] != 'program':
+        if not isinstance(node, ast.Program):
             raise ValueError("Expected program node")
         
-        for statement in node['statements']:
-            self.execute_statement(statement)
+        self.execute_block(node.statements)
         
         return True
     
+    # Execute a list of statements, stopping early on a status (see signals.py)
+    def execute_block(self, statements):
+        for statement in statements:
+            status = self.execute_statement(statement)
+            if status is not None:
+                return status
+        return None
+    
     # Execute a single statement
     def execute_statement(self, node):
         if not node:
-            return
-        
-        stmt_type = node['type']
+            return None
         
-        if stmt_type == 'variable_block':
-            self.execute_variable_block(node)
-        elif stmt_type == 'variable_declaration':
-            self.execute_variable_declaration(node)
-        elif stmt_type == 'output_statement':
-            self.execute_output_statement(node)
-        elif stmt_type == 'input_statement':
-            self.execute_input_statement(node)
-        elif stmt_type == 'assignment':
-            self.execute_assignment(node)
-        else:
-            pass
+        handler = self.statement_handlers.get(type(node))
+        if handler:
+            return handler(node)
+        return None
     
     # Execute variable block (WAZZUP...BUHBYE)
     def execute_variable_block(self, node):
-        for declaration in node['declarations']:
+        for declaration in node.declarations:
             self.execute_variable_declaration(declaration)
     
     # Execute variable declaration
     def execute_variable_declaration(self, node):
-        var_name = node['identifier']
+        var_name = node.identifier
         
-        if node['initial_value']:
-            value = self.evaluate_expression(node['initial_value'])
+        if node.initial_value:
+            value = self.evaluate_expression(node.initial_value)
         else:
             value = None  
         
         self.symbol_table[var_name] = value
     
     # Execute variable assignment
-    def execute_assignment(self, node):
-        var_name = node['identifier']
-        value = self.evaluate_expression(node['value'])
+    def execute_variable_assignment(self, node):
+        var_name = node.identifier
+        value = self.evaluate_expression(node.value)
         self.symbol_table[var_name] = value
     
+    # Execute IS NOW A (recast a variable in place)
+    def execute_typecast_isnow(self, node):
+        var_name = node.identifier
+        if var_name not in self.symbol_table:
+            raise NameError(f"Variable '{var_name}' is not defined")
+        self.symbol_table[var_name] = self.cast_value(self.symbol_table[var_name], node.convert_to_type)
+    
+    # Execute a bare expression, its value is stored in IT
+    def execute_expression_statement(self, node):
+        self.symbol_table['IT'] = self.evaluate_expression(node.expression)
+    
+    # Execute O RLY? ... OIC
+    def execute_conditional_statement(self, node):
+        value = self.evaluate_expression(node.condition)
+        self.symbol_table['IT'] = value
+        
+        if self.to_boolean(value):
+            return self.execute_block(node.then_block)
+        
+        for else_if in node.elseif_blocks:
+            if self.to_boolean(self.evaluate_expression(else_if.condition)):
+                return self.execute_block(else_if.statements)
+        
+        if node.else_block is not None:
+            return self.execute_block(node.else_block)
+        return None
+    
+    # Execute IM IN YR ... IM OUTTA YR
+    # the condition is tested before each pass, the variable stepped after
+    def execute_loop_statement(self, node):
+        condition = node.loop_condition
+        variable = condition.variable if condition is not None else None
+        # an undeclared loop variable starts at 0
+        if variable and variable not in self.symbol_table:
+            self.symbol_table[variable] = 0
+        
+        plan = self.static_plan(node, counted_loop)
+        if plan is not None:
+            return self.execute_counted_loop(node, plan)
+        
+        test = condition.condition if condition is not None else None
+        until = condition is not None and condition.loop_condition == "TIL"
+        step = LOOP_STEPS.get(condition.loop_operation) if variable else None
+        while True:
+            if test is not None and self.to_boolean(self.evaluate_expression(test)) == until:
+                return None
+            status = self.execute_block(node.statements)
+            if status is BREAK:
+                return None
+            if status is not None:
+                return status
+            if step is not None:
+                self.symbol_table[variable] = self.to_number(self.symbol_table[variable]) + step
+    
+    # Run a counted loop (see loops.py) over its values
+    def execute_counted_loop(self, node, plan):
+        frame = self.symbol_table
+        variable = plan.variable
+        values = CountedValues(frame[variable], self.evaluate_expression(plan.bound),
+                               plan.step, plan.relation)
+        for value in values:
+            frame[variable] = value
+            status = self.execute_block(node.statements)
+            if status is BREAK:
+                return None
+            if status is not None:
+                return status
+        frame[variable] = values.final
+        return None
+    
+    # Static analysis of a node (analyze(node)), done once per node
+    def static_plan(self, node, analyze):
+        cached = self.plans.get(id(node))
+        if cached is None or cached[0] is not node:
+            cached = self.plans[id(node)] = (node, analyze(node))
+        return cached[1]
+    
+    # Execute WTF? ... OIC: jump to the matching OMG, fall through until GTFO
+    def execute_switch_statement(self, node):
+        if node.subject:
+            value = self.evaluate_expression(node.subject)
+            self.symbol_table['IT'] = value
+        else:
+            value = self.evaluate_identifier(ast.Identifier('IT'))
+        
+        statements, table, default = self.static_plan(node, switch_table)
+        for index in range(table.get(value, default), len(statements)):
+            status = self.execute_statement(statements[index])
+            if status is BREAK:
+                return None
+            if status is not None:
+                return status
+        return None
+    
+    # Execute GTFO
+    def execute_break_statement(self, node):
+        return BREAK
+    
+    # Execute HOW IZ I ... IF U SAY SO: define the function
+    # a call runs the body on a frame of its own, holding only the parameters
+    def execute_function_definition(self, node):
+        parameters = node.parameters
+        body = node.statements
+        
+        def call(*arguments):
+            caller = self.symbol_table
+            frame = self.symbol_table = dict(zip(parameters, arguments))
+            try:
+                status = self.execute_block(body)
+            finally:
+                self.symbol_table = caller
+            return function_result(status, frame)
+        
+        self.define_function(node.name, parameters, call)
+    
+    # Register a function; call(*arguments) runs it however the backend compiled it
+    def define_function(self, name, parameters, call):
+        if name in self.memoizable:
+            call = memoized(call, self.memo_size)
+        self.functions[name] = Function(name, parameters, call)
+    
+    # Call a function by name, for I IZ
+    # tail calls come back as a TailCall and are run here, one after the other
+    def call_function(self, name, arguments):
+        # tail calls run in this loop, only calls from inside a body nest
+        if self.call_depth >= MAX_CALL_DEPTH:
+            raise RecursionError(f"Function '{name}': more than {MAX_CALL_DEPTH} nested calls")
+        self.call_depth += 1
+        try:
+            while True:
+                function = self.functions.get(name)
+                if function is None:
+                    raise NameError(f"Function '{name}' is not defined")
+                if len(arguments) != len(function.parameters):
+                    raise TypeError(f"Function '{name}' takes {len(function.parameters)} "
+                                    f"arguments, got {len(arguments)}")
+                result = function.call(*arguments)
+                if type(result) is not TailCall:
+                    return result
+                name, arguments = result.name, result.arguments
+        finally:
+            self.call_depth -= 1
+    
+    # Execute FOUND YR; FOUND YR I IZ ... MKAY is a tail call
+    def execute_return_statement(self, node):
+        value = node.value
+        if type(value) is ast.FunctionCall:
+            return TailCall(value.name, [self.evaluate_expression(argument) for argument in value.arguments])
+        return Return(self.evaluate_expression(value))
+    
     # Execute VISIBLE statement
     def execute_output_statement(self, node):
         output_parts = []
         
-        for expr in node['expressions']:
+        for expr in node.expressions:
             value = self.evaluate_expression(expr)
             output_parts.append(self.value_to_string(value))
         
         output = ' '.join(output_parts)
-        self.output_buffer.append(output)
+        self.output.write(output + '\n' if node.newline else output)
     
     # Execute GIMMEH statement
     def execute_input_statement(self, node):
-        var_name = node['identifier']
+        var_name = node.identifier
         input_value = self.get_input()
         
         # Try to convert to appropriate type
         value = self.parse_input_value(input_value)
         self.symbol_table[var_name] = value
     
-    # Parse input string to appropriate type
-    def parse_input_value(self, input_str):
-        input_str = input_str.strip()
-        
-        # Try boolean
-        if input_str == "WIN":
-            return True
-        elif input_str == "FAIL":
-            return False
-        
-        # Try integer
-        try:
-            return int(input_str)
-        except ValueError:
-            pass
-        
-        # Try float
-        try:
-            return float(input_str)
-        except ValueError:
-            pass
-        
-        # Default to string
-        return input_str
-    
     # Evaluate an expression and return its value
     def evaluate_expression(self, node):
         if not node:
             return None
         
-        expr_type = node['type']
-        
-        if expr_type == 'literal':
-            return self.evaluate_literal(node)
-        elif expr_type == 'identifier':
-            return self.evaluate_identifier(node)
-        elif expr_type == 'arithmetic_operation':
-            return self.evaluate_arithmetic_operation(node)
-        elif expr_type == 'comparison_operation':
-            return self.evaluate_comparison_operation(node)
-        elif expr_type == 'logical_operation':
-            return self.evaluate_logical_operation(node)
-        elif expr_type == 'unary_operation':
-            return self.evaluate_unary_operation(node)
-        elif expr_type == 'type_literal':
-            return None  # Type literals evaluate to NOOB
-        else:
-            raise ValueError(f"Unknown expression type: {expr_type}")
+        handler = self.expression_handlers.get(type(node))
+        if handler is None:
+            raise ValueError(f"Unknown expression type: {node.kind}")
+        return handler(node)
     
-    # Evaluate a literal value
+    # Evaluate a literal value (already converted by the parser)
     def evaluate_literal(self, node):
-        value_type = node['value_type']
-        value_str = node['value']
-        
-        if value_type == 'Integer Literal':
-            return int(value_str)
-        elif value_type == 'Float Literal':
-            return float(value_str)
-        elif value_type == 'String Literal':
-            # Remove quotes if there are any
-            if value_str.startswith('"') and value_str.endswith('"'):
-                return value_str[1:-1]
-            return value_str
-        elif value_type == 'Boolean Literal':
-            return value_str == 'WIN'
-        else:
-            return value_str
+        return node.value
+    
+    # Type literals evaluate to NOOB
+    def evaluate_type_literal(self, node):
+        return None
     
     # Evaluate a variable identifier
     def evaluate_identifier(self, node):
-        var_name = node['name']
+        var_name = node.name
         
         if var_name not in self.symbol_table:
             raise NameError(f"Variable '{var_name}' is not defined")
@@ -190,42 +361,24 @@ class Interpreter:
         return self.symbol_table[var_name]
     
     # Evaluate arithmetic operations
+    # through the function arithmetic_plan picked for the node, see arithmetic.py
     def evaluate_arithmetic_operation(self, node):
-        operator = node['operator']
-        operand1 = self.evaluate_expression(node['operand1'])
-        operand2 = self.evaluate_expression(node['operand2'])
-        
-        # Convert to numbers
-        operand1 = self.to_number(operand1)
-        operand2 = self.to_number(operand2)
-        
-        if operator == "SUM OF":
-            result = operand1 + operand2
-        elif operator == "DIFF OF":
-            result = operand1 - operand2
-        elif operator == "PRODUKT OF":
-            result = operand1 * operand2
-        elif operator == "QUOSHUNT OF":
-            if operand2 == 0:
-                raise ValueError("Division by zero")
-            result = operand1 / operand2
-        elif operator == "MOD OF":
-            if operand2 == 0:
-                raise ValueError("Modulo by zero")
-            result = operand1 % operand2
-        else:
-            raise ValueError(f"Unknown arithmetic operator: {operator}")
+        operand1 = self.evaluate_expression(node.left)
+        operand2 = self.evaluate_expression(node.right)
         
-        # Return int if both operands were ints and result is whole
-        if isinstance(operand1, int) and isinstance(operand2, int) and operator != "QUOSHUNT OF":
-            return int(result)
-        return result
+        if node.operator not in OPERATIONS:
+            raise ValueError(f"Unknown arithmetic operator: {node.operator}")
+        return self.static_plan(node, self.arithmetic_plan)(operand1, operand2)
+    
+    # What computes an arithmetic node, given the program's static types
+    def arithmetic_plan(self, node):
+        return arithmetic_function(node, self.types)
     
     # Evaluate comparison operations
     def evaluate_comparison_operation(self, node):
-        operator = node['operator']
-        operand1 = self.evaluate_expression(node['operand1'])
-        operand2 = self.evaluate_expression(node['operand2'])
+        operator = node.operator
+        operand1 = self.evaluate_expression(node.left)
+        operand2 = self.evaluate_expression(node.right)
         
         if operator == "BOTH SAEM":
             return operand1 == operand2
@@ -245,79 +398,78 @@ class Interpreter:
             raise ValueError(f"Unknown comparison operator: {operator}")
     
     # Evaluate logical operations
-    def evaluate_logical_operation(self, node):       
-        operator = node['operator']
-        left = self.evaluate_expression(node['left'])
-        right = self.evaluate_expression(node['right'])
-        
-        # Convert to boolean
-        left_bool = self.to_boolean(left)
-        right_bool = self.to_boolean(right)
+    def evaluate_logical_operation(self, node):
+        operator = node.operator
+        if operator not in ("BOTH OF", "EITHER OF", "WON OF"):
+            raise ValueError(f"Unknown logical operator: {operator}")
         
+        # Convert to boolean; the right side only runs when it can change the result
+        left_bool = self.to_boolean(self.evaluate_expression(node.left))
         if operator == "BOTH OF":
-            return left_bool and right_bool
+            return left_bool and self.to_boolean(self.evaluate_expression(node.right))
         elif operator == "EITHER OF":
-            return left_bool or right_bool
-        elif operator == "WON OF":
-            return left_bool != right_bool 
-        elif operator == "ANY OF":
-            return left_bool or right_bool
+            return left_bool or self.to_boolean(self.evaluate_expression(node.right))
+        else:
+            return left_bool != self.to_boolean(self.evaluate_expression(node.right))
+    
+    # Evaluate ANY OF / ALL OF ... MKAY, up to the first operand that decides it
+    def evaluate_variadic_logical_operation(self, node):
+        operator = node.operator
+        if operator == "ANY OF":
+            decisive = True
         elif operator == "ALL OF":
-            return left_bool and right_bool
+            decisive = False
         else:
             raise ValueError(f"Unknown logical operator: {operator}")
+        
+        for operand in node.operands:
+            if self.to_boolean(self.evaluate_expression(operand)) == decisive:
+                return decisive
+        return not decisive
+    
+    # Evaluate I IZ ... MKAY, the arguments in the caller's frame
+    def evaluate_function_call(self, node):
+        arguments = [self.evaluate_expression(argument) for argument in node.arguments]
+        return self.call_function(node.name, arguments)
     
     # Evaluate unary operations
     def evaluate_unary_operation(self, node):
-        operator = node['operator']
-        operand = self.evaluate_expression(node['operand'])
+        operator = node.operator
+        operand = self.evaluate_expression(node.operand)
         
         if operator == "NOT":
             return not self.to_boolean(operand)
         else:
             raise ValueError(f"Unknown unary operator: {operator}")
     
-    # Convert value to number
-    def to_number(self, value):
-        if value is None:
-            return 0
-        if isinstance(value, bool):
-            return 1 if value else 0
-        if isinstance(value, (int, float)):
-            return value
-        if isinstance(value, str):
-            try:
-                if '.' in value:
-                    return float(value)
-                return int(value)
-            except ValueError:
-                return 0
-        return 0
-    
-    # Convert value to boolean    
-    def to_boolean(self, value):
-        if value is None:
-            return False
-        if isinstance(value, bool):
-            return value
-        if isinstance(value, (int, float)):
-            return value != 0
-        if isinstance(value, str):
-            return len(value) > 0
-        return False
-    
-    # Convert value to string for output
-    def value_to_string(self, value):
-        if value is None:
-            return "NOOB"
-        if isinstance(value, bool):
-            return "WIN" if value else "FAIL"
-        if isinstance(value, float):
-            # Format float nicely
-            if value.is_integer():
-                return str(int(value))
-            return str(value)
-        return str(value)
+    # Evaluate a loop-invariant expression once per loop entry (see optimizer.py)
+    def evaluate_hoisted_expression(self, node):
+        frame = self.symbol_table
+        if node.name in frame:
+            return frame[node.name]
+        value = frame[node.name] = self.evaluate_expression(node.expression)
+        return value
+    
+    # Forget hoisted values before their loop starts again
+    def execute_reset_hoisted(self, node):
+        for name in node.names:
+            self.symbol_table.pop(name, None)
+    
+    # Evaluate SMOOSH (string concatenation)
+    def evaluate_smoosh(self, node):
+        return ''.join(self.value_to_string(self.evaluate_expression(part)) for part in node.parts)
+    
+    # Evaluate MAEK <expr> A <type>
+    def evaluate_typecast_maek(self, node):
+        return self.cast_value(self.evaluate_expression(node.expression), node.convert_to_type)
+    
+    # LOLCODE value semantics live in values.py, shared with the other backends
+    to_number = staticmethod(values.to_number)
+    to_boolean = staticmethod(values.to_boolean)
+    value_to_string = staticmethod(values.value_to_string)
+    get_type_name = staticmethod(values.get_type_name)
+    cast_value = staticmethod(values.cast_value)
+    parse_input_value = staticmethod(values.parse_input_value)
     
     # Get symbol table as list of dicts for display
     def get_symbol_table_display(self):
@@ -328,18 +480,65 @@ class Interpreter:
                 'Type': self.get_type_name(value)
             }
             for var_name, value in self.symbol_table.items()
+            if not ast.is_hidden_name(var_name)
         ]
-    
-    # Get LOLCODE type name for a value
-    def get_type_name(self, value):
-        if value is None:
-            return "NOOB"
-        if isinstance(value, bool):
-            return "TROOF"
-        if isinstance(value, int):
-            return "NUMBR"
-        if isinstance(value, float):
-            return "NUMBAR"
-        if isinstance(value, str):
-            return "YARN"
-        return "NOOB"
+
+
+def run(source, inputs=None, diagnostics=None, cache=None, backend='tree',
+        opt_level=DEFAULT_OPT_LEVEL, output=None, on_eof=None, memoize=False):
+    """Lex, parse and execute LOLCODE source text entirely in memory.
+
+    The source is tokenized once and the same token list is handed to the
+    parser. Every call has its own Interpreter, so concurrent sessions do not
+    share state. With an AstCache, an unchanged program skips lexing and
+    parsing altogether. The tree then goes through the optimizer at
+    opt_level (0 turns it off) and backend picks how it is executed, see
+    BACKENDS. VISIBLE writes to output, an OutputSink; result['output'] is
+    whatever it still holds, everything for the default MemorySink.
+    inputs is a list of lines, any iterable of lines (read lazily) or an
+    InputSource; on_eof says what GIMMEH gets after the last line, also
+    with no inputs at all (see input_source for an InputSource). memoize
+    turns on caching the results of pure functions, see functions.py.
+    result['type_errors'] lists what semantic analysis (semantics.py) found
+    will fail whenever it runs.
+    """
+    result = {
+        'tokens': [],
+        'ast': None,
+        'success': False,
+        'output': '',
+        'symbol_table': [],
+        'optimizations': [],
+        'type_errors': [],
+        'error': None
+    }
+
+    diagnostics = diagnostics or SILENT_DIAGNOSTICS
+    try:
+        tokens, ast = load_program(source, diagnostics, cache)
+    except SyntaxError as e:
+        # failed parses are not cached, lex again just for the lexemes table
+        result['tokens'] = tokenize_source(source)
+        result['error'] = f"Parsing failed: {e}"
+        diagnostics.error('parse_error', result['error'])
+        return result
+    result['tokens'] = tokens
+    ast, result['optimizations'] = optimize(ast, opt_level, diagnostics)
+    result['ast'] = ast
+
+    interpreter = Interpreter(diagnostics, backend, output, memoize=memoize)
+    # definite errors are reported before running, the program still runs;
+    # a tree too deep to analyze fails again in interpret, which reports it
+    try:
+        with raised_recursion_limit():
+            result['type_errors'] = list(interpreter.analyze(ast).errors)
+    except RecursionError:
+        pass
+    for error in result['type_errors']:
+        diagnostics.error('type_error', error)
+    if inputs is not None or on_eof is not None:
+        interpreter.set_input(inputs if inputs is not None else [], on_eof)
+    result['success'] = interpreter.interpret(ast)
+    result['output'] = interpreter.get_output()
+    result['symbol_table'] = interpreter.get_symbol_table_display()
+    return result
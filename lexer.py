@@ -1,76 +1,312 @@
+import os
 import re
+import sys
+from enum import IntEnum
+from diagnostics import SILENT_DIAGNOSTICS, TRACE
 
-def tokenizer(filename):
+# keyword.txt lives beside this module, not wherever the program is run from
+KEYWORD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keyword.txt')
+
+
+class TokenKind(IntEnum):
+    """Token classes; the labels are the classification names in keyword.txt."""
+    CODE_DELIMITER = 1
+    VARIABLE_LIST_DELIMITER = 2
+    COMMENT = 3
+    VARIABLE_DECLARATION = 4
+    DECLARATION_ASSIGNMENT = 5
+    VARIABLE_ASSIGNMENT = 6
+    ARITHMETIC_OPERATOR = 7
+    COMPARISON_OPERATOR = 8
+    LOGICAL_OPERATOR = 9
+    UNARY_OPERATOR = 10
+    STRING_CONCATENATION = 11
+    TYPE_CASTING = 12
+    EXPLICIT_CASTING = 13
+    RECAST_VARIABLE = 14
+    OUTPUT_KEYWORD = 15
+    INPUT_KEYWORD = 16
+    IF_KEYWORD = 17
+    THEN_KEYWORD = 18
+    ELSEIF_KEYWORD = 19
+    ELSE_KEYWORD = 20
+    IF_END = 21
+    SWITCH = 22
+    CASE = 23
+    DEFAULT_CASE = 24
+    LOOP_START = 25
+    INCREMENT = 26
+    DECREMENT = 27
+    UNTIL = 28
+    WHILE = 29
+    LOOP_END = 30
+    FUNCTION_START = 31
+    FUNCTION_END = 32
+    BREAK = 33
+    RETURN = 34
+    FUNCTION_CALL = 35
+    ARGUMENT_END = 36
+    SEPARATOR = 37
+    BOOLEAN_LITERAL = 38
+    TYPE_LITERAL = 39
+    IDENTIFIER = 40
+    STRING_LITERAL = 41
+    STRING_DELIMITER = 42
+    FLOAT_LITERAL = 43
+    INTEGER_LITERAL = 44
+    NEWLINE_SUPPRESSION = 45
+    PARAMETER = 46
+
+    @property
+    def label(self):
+        return KIND_LABELS[self]
+
+
+KIND_LABELS = {
+    TokenKind.CODE_DELIMITER: "Code Delimeter",
+    TokenKind.VARIABLE_LIST_DELIMITER: "Variable List Delimeter",
+    TokenKind.COMMENT: "Comment",
+    TokenKind.VARIABLE_DECLARATION: "Variable Declaration",
+    TokenKind.DECLARATION_ASSIGNMENT: "Variable Assignment (following I HAS A)",
+    TokenKind.VARIABLE_ASSIGNMENT: "Variable Assignment",
+    TokenKind.ARITHMETIC_OPERATOR: "Arithmetic Operator",
+    TokenKind.COMPARISON_OPERATOR: "Comparison Operator",
+    TokenKind.LOGICAL_OPERATOR: "Logical Operator",
+    TokenKind.UNARY_OPERATOR: "Unary Operator",
+    TokenKind.STRING_CONCATENATION: "String Concatenation",
+    TokenKind.TYPE_CASTING: "Type Casting",
+    TokenKind.EXPLICIT_CASTING: "Explicit Casting",
+    TokenKind.RECAST_VARIABLE: "Recast Variable",
+    TokenKind.OUTPUT_KEYWORD: "Output Keyword",
+    TokenKind.INPUT_KEYWORD: "Input Keyword",
+    TokenKind.IF_KEYWORD: "If Keyword",
+    TokenKind.THEN_KEYWORD: "Then Keyword",
+    TokenKind.ELSEIF_KEYWORD: "ElseIf Keyword",
+    TokenKind.ELSE_KEYWORD: "Else Keyword",
+    TokenKind.IF_END: "If-Then-Else End",
+    TokenKind.SWITCH: "Switch",
+    TokenKind.CASE: "Comparison Statement",
+    TokenKind.DEFAULT_CASE: "Default Comparison Statement",
+    TokenKind.LOOP_START: "Start Loop Label",
+    TokenKind.INCREMENT: "Increment",
+    TokenKind.DECREMENT: "Decrement",
+    TokenKind.UNTIL: "Until Loop",
+    TokenKind.WHILE: "While Loop",
+    TokenKind.LOOP_END: "End Loop Label",
+    TokenKind.FUNCTION_START: "Begin Function Definition",
+    TokenKind.FUNCTION_END: "End Function Definition",
+    TokenKind.BREAK: "Break Statement",
+    TokenKind.RETURN: "Return Keyword",
+    TokenKind.FUNCTION_CALL: "Function Call",
+    TokenKind.ARGUMENT_END: "Argument End",
+    TokenKind.SEPARATOR: "Multiple Parameter Separator",
+    TokenKind.BOOLEAN_LITERAL: "Boolean Literal",
+    TokenKind.TYPE_LITERAL: "Type Literal",
+    TokenKind.IDENTIFIER: "Variable Identifier",
+    TokenKind.STRING_LITERAL: "String Literal",
+    TokenKind.STRING_DELIMITER: "String Delimiter",
+    TokenKind.FLOAT_LITERAL: "Float Literal",
+    TokenKind.INTEGER_LITERAL: "Integer Literal",
+    TokenKind.NEWLINE_SUPPRESSION: "Newline Suppression",
+    TokenKind.PARAMETER: "Parameter Delimiter",
+}
+KIND_BY_LABEL = {label: kind for kind, label in KIND_LABELS.items()}
+
+
+class Token:
+    """One lexeme. Slotted and with an integer kind, so a large token list
+    costs a fraction of what a dict per token did and kind checks are int
+    comparisons. Lexemes are interned, repeated keywords/names share one str."""
+    __slots__ = ('kind', 'lexeme', 'line', 'column')
+
+    def __init__(self, kind, lexeme, line, column):
+        self.kind = kind
+        self.lexeme = lexeme
+        self.line = line
+        self.column = column
+
+    @property
+    def name(self):
+        # classification shown in the lexemes table
+        return KIND_LABELS[self.kind]
+
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (self.kind == other.kind and self.lexeme == other.lexeme
+                and self.line == other.line and self.column == other.column)
+
+    def __repr__(self):
+        return f"Token({self.kind.name}, {self.lexeme!r}, {self.line}, {self.column})"
+
+
+def load_token_patterns(keyword_file=KEYWORD_FILE):
     keywords = []
     # pattern;name
-    with open('keyword.txt', 'r') as f:
+    with open(keyword_file, 'r') as f:
         for line in f:
             if ";" in line:
                 pattern, label = line.strip().split(';', 1)
                 keywords.append((pattern.strip(), label.strip()))
 
     # combine the patterns (lexeme)
+    # WIN/FAIL and the type names go before identifiers, otherwise the
+    # identifier pattern swallows them and they never get their own class
     token_patterns = []
     token_patterns.extend(keywords)
+    token_patterns.append((r"\b(?:WIN|FAIL)\b", "Boolean Literal"))
+    token_patterns.append((r"\b(?:NOOB|NUMBR|NUMBAR|YARN|TROOF)\b", "Type Literal"))
     token_patterns.append((r"\b[a-zA-Z][a-zA-Z0-9_]*\b", "Variable Identifier"))
 
     token_patterns.append((r'"(?:[^"\\\r\n]|\\.)*"', "String Literal"))
     token_patterns.append((r"\"", "String Delimiter"))
     token_patterns.append((r"\b[+-]?[0-9]*\.[0-9]+\b", "Float Literal"))
     token_patterns.append((r"\b[+-]?[0-9]+\b", "Integer Literal"))
-    token_patterns.append((r"\b(WIN|FAIL)\b", "Boolean Literal"))
-    token_patterns.append((r"\b(NOOB|NUMBR|NUMBAR|YARN|TROOF)\b", "Type Literal"))
+    return token_patterns
+
+
+class Lexer:
+    """Compiled LOLCODE grammar.
+
+    The keyword table is read and the combined regex compiled once; every
+    alternative is a named group (T0, T1, ...) so the token kind of a match
+    is a single dict lookup on match.lastgroup.
+    """
+
+    def __init__(self, keyword_file=KEYWORD_FILE):
+        self.token_patterns = load_token_patterns(keyword_file)
+        self.kinds = {}
+        alternatives = []
+        for i, (pattern, label) in enumerate(self.token_patterns):
+            if label not in KIND_BY_LABEL:
+                raise ValueError(f"Unknown token class '{label}' in {keyword_file}")
+            group = f"T{i}"
+            self.kinds[group] = KIND_BY_LABEL[label]
+            alternatives.append(f"(?P<{group}>{pattern})")
+        self.regex = re.compile("|".join(alternatives))
+
+    def tokenize(self, program):
+        # single pass over the source string, comments included
+        return list(self.scan(_split_lines(program)))
+
+    def iter_tokens(self, source):
+        """Yield tokens lazily from a file object or mmap, one line at a time.
 
-    # simpler regex combining
-    combined_regex = "|".join(f"({pattern})" for pattern, _ in token_patterns)
+        Only the current line is held in memory, so the parser can start
+        consuming before the whole file has been read.
+        """
+        return self.scan(_read_lines(source))
 
-    print(token_patterns)
+    def scan(self, lines):
+        """Tokenize an iterable of source lines.
+
+        Comments are matched by the main regex like any other keyword and
+        skipped instead of being cut out of the source beforehand: BTW ends
+        the line, OBTW skips ahead to the matching TLDR. Nothing is copied or
+        removed, so line and column numbers are those of the original text.
+        """
+        regex = self.regex
+        kinds = self.kinds
+        intern = sys.intern
+        in_comment = False
+        for line_no, line in enumerate(lines, 1):
+            pos = 0
+            if in_comment:
+                end = _COMMENT_END.search(line)
+                if not end:
+                    continue
+                pos = end.end()
+                in_comment = False
+
+            while True:
+                match = regex.search(line, pos)
+                if not match:
+                    break
+                pos = match.end()
+                kind = kinds[match.lastgroup]
+                value = intern(match.group().strip())
+                if kind == TokenKind.COMMENT:
+                    if value == "BTW":
+                        break
+                    if value == "OBTW":
+                        end = _COMMENT_END.search(line, pos)
+                        if not end:
+                            in_comment = True
+                            break
+                        pos = end.end()
+                        continue
+                yield Token(kind, value, line_no, match.start() + 1)
+
+
+_COMMENT_END = re.compile(r"\bTLDR\b")
+
+
+def _split_lines(program):
+    # like str.splitlines(True) but lazy, one line slice at a time
+    start = 0
+    while start < len(program):
+        end = program.find('\n', start)
+        if end == -1:
+            end = len(program)
+        else:
+            end += 1
+        yield program[start:end]
+        start = end
+
+
+def _read_lines(source):
+    # works for text files, binary files and mmap objects alike
+    readline = source.readline
+    while True:
+        line = readline()
+        if not line:
+            return
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        yield line
+
+
+_default_lexer = None
+
+
+def get_lexer():
+    # one compiled grammar per process
+    global _default_lexer
+    if _default_lexer is None:
+        _default_lexer = Lexer()
+    return _default_lexer
+
+
+def tokenizer(filename, diagnostics=None):
+    diagnostics = diagnostics or SILENT_DIAGNOSTICS
+    lexer = get_lexer()
+    diagnostics.debug('token_patterns', str(lexer.token_patterns))
 
     # open sample lolcode program
     with open(filename, 'r') as f:
         program = f.read()
 
-    # ignore comments
-    # substring consideration: ignore all preceding this keywords
-    # replace the characters with nothing aka ignore na rin
-    program = re.sub(r"OBTW.*?TLDR", "", program, flags=re.DOTALL)  # if group commenting
-    program = re.sub(r"BTW[^\n]*", "", program)
-
-    # line number lookup
-    # we use finditer (https://www.geeksforgeeks.org/python/re-finditer-in-python/)
-    line_num = [0]
-    for match in re.finditer('\n', program):
-        line_num.append(match.end())
-
-    def get_line_num(position):
-        low, high = 0, len(line_num) - 1
-        while low <= high:
-            mid = (low + high) // 2
-            if line_num[mid] <= position:
-                low = mid + 1
-            else:
-                high = mid - 1
-        line_no = low
-        col_no = position - line_num[line_no - 1] + 1
-        return line_no, col_no
-
-    tokens = []
-    for match in re.finditer(combined_regex, program):
-        # Find which pattern matched (by checking which capturing group has a value)
-        for i, (_, label) in enumerate(token_patterns):
-            if match.group(i + 1):  # corresponds to first pattern, etc.
-                value = match.group(i + 1).strip()
-                # add line number
-                get_num, col_no = get_line_num(match.start())
-                tokens.append({"line_number": get_num, "column_number": col_no, "token_name": label, "pattern": value})
-                break
+    tokens = lexer.tokenize(program)
 
     # itsura ng pagkagroup
-    # print(tokens)
-    for token in tokens:
-        print(f"Line {token['line_number']}:Column {token['column_number']} {token['token_name']} {token['pattern']}")
+    # only formatted when tracing is on
+    if diagnostics.enabled(TRACE):
+        for token in tokens:
+            diagnostics.trace('token', f"Line {token.line}:Column {token.column} {token.name} {token.lexeme}",
+                              line=token.line, column=token.column, kind=token.name, lexeme=token.lexeme)
     return tokens
 
+
+def tokenize_source(source):
+    # tokenize program text already in memory, no file needed
+    return get_lexer().tokenize(source)
+
+
+def iter_tokens(source):
+    # streaming counterpart of tokenizer(), for large files / mmap sources
+    return get_lexer().iter_tokens(source)
+
+
 # test (print like dun sa sample results)
 # for token in tokens:
 #     print(f"Line {token['line_number']}:Column {token['column_number']} {token['token_name']} {token['pattern']}")
@@ -78,4 +314,4 @@ def tokenizer(filename):
 # if __name__ == "__main__":
 #     tokens = tokenizer("t1.lol")
 #     for token in tokens:
-#         print(f"Line {token['line_number']}, Column {token['column_number']}: {token['token_name']} {token['pattern']}")
\ No newline at end of file
+#         print(f"Line {token['line_number']}, Column {token['column_number']}: {token['token_name']} {token['pattern']}")
@@ -0,0 +1,167 @@
+"""Counted loops: IM IN YR loops that can be driven by a native range.
+
+A loop like
+
+    IM IN YR l UPPIN YR i TIL BOTH SAEM i AN n
+    IM IN YR l UPPIN YR i WILE BOTH SAEM i AN SMALLR OF i AN n
+    IM IN YR l NERFIN YR i WILE DIFFRINT i AN n
+
+whose body never writes i, and whose bound n is pure and reads nothing the
+body writes, tests its condition on i against one fixed value. Such a loop
+is recognized statically (counted_loop) and run as a Python for loop over
+CountedValues, which evaluates the bound once and, when i and n are
+integers, iterates a range instead of evaluating the condition tree and
+stepping i through the frame on every pass.
+
+Everything else (floats, strings, a bound that never stops an UPPIN) falls
+back to an exact emulation of the generic loop, so the fast path can never
+change what a program does. After a loop that ends because its condition
+failed, i holds CountedValues.final, the value that failed it; after GTFO
+it keeps the value of the pass that broke out.
+"""
+from analysis import assigned_variables, referenced_variables, is_pure
+import ast_nodes as ast
+from values import to_number
+
+LOOP_STEPS = {"UPPIN YR": 1, "NERFIN YR": -1}
+
+# How the loop variable relates to the bound while the loop keeps going.
+# Each test is the condition expression itself, computed on plain values.
+RELATION_TESTS = {
+    '==': lambda value, bound: value == bound,
+    '!=': lambda value, bound: value != bound,
+    # BOTH SAEM i AN SMALLR OF i AN n
+    '<=': lambda value, bound: value == min(to_number(value), to_number(bound)),
+    '>': lambda value, bound: value != min(to_number(value), to_number(bound)),
+    # BOTH SAEM i AN BIGGR OF i AN n
+    '>=': lambda value, bound: value == max(to_number(value), to_number(bound)),
+    '<': lambda value, bound: value != max(to_number(value), to_number(bound)),
+}
+# TIL <condition> keeps going while the condition is false
+NEGATED = {'==': '!=', '!=': '==', '<=': '>', '>': '<=', '>=': '<', '<': '>='}
+# BIGGR / SMALLR OF i AN n compared to i with BOTH SAEM
+EXTREMUM_RELATIONS = {"SMALLR OF": '<=', "BIGGR OF": '>='}
+
+
+class CountedLoop:
+    """What counted_loop found out about a loop: variable, step, relation
+    and the bound expression."""
+    __slots__ = ('variable', 'step', 'relation', 'bound')
+
+    def __init__(self, variable, step, relation, bound):
+        self.variable = variable
+        self.step = step
+        self.relation = relation
+        self.bound = bound
+
+
+def _is_variable(node, name):
+    return isinstance(node, ast.Identifier) and node.name == name
+
+
+def _other_operand(node, name):
+    # for a binary operation with the variable on one side: the other side
+    if _is_variable(node.left, name):
+        return node.right
+    if _is_variable(node.right, name):
+        return node.left
+    return None
+
+
+def _relation(condition, name):
+    # (relation, bound) for a condition comparing the variable to a bound
+    if not isinstance(condition, ast.ComparisonOperation) or condition.operator not in ("BOTH SAEM", "DIFFRINT"):
+        return None
+    other = _other_operand(condition, name)
+    if other is None:
+        return None
+    relation, bound = '==', other
+    if isinstance(other, ast.ComparisonOperation) and other.operator in EXTREMUM_RELATIONS:
+        bound = _other_operand(other, name)
+        if bound is None:
+            return None
+        relation = EXTREMUM_RELATIONS[other.operator]
+    if condition.operator == "DIFFRINT":
+        relation = NEGATED[relation]
+    return relation, bound
+
+
+def counted_loop(node):
+    """CountedLoop for a LoopStatement that can run as a counted loop, else None."""
+    condition = node.loop_condition
+    if (condition is None or condition.condition is None or not condition.variable
+            or condition.loop_operation not in LOOP_STEPS):
+        return None
+    name = condition.variable
+    found = _relation(condition.condition, name)
+    if found is None:
+        return None
+    relation, bound = found
+    if not is_pure(bound):
+        return None
+    assigned = assigned_variables(node.statements)
+    if name in assigned or referenced_variables(bound) & (assigned | {name}):
+        return None
+    if condition.loop_condition == "TIL":
+        relation = NEGATED[relation]
+    elif condition.loop_condition != "WILE":
+        return None
+    return CountedLoop(name, LOOP_STEPS[condition.loop_operation], relation, bound)
+
+
+def _native_range(start, bound, step, relation):
+    # the values as a range, when that is exactly what the generic loop does
+    if type(start) is not int:
+        return None
+    if relation in ('==', '!='):
+        # compared as they are, not converted
+        if type(bound) is not int:
+            return None
+    else:
+        bound = to_number(bound)
+        if type(bound) is not int:
+            return None
+    if step > 0:
+        if relation == '!=' and start <= bound:
+            return range(start, bound)
+        if relation == '<=':
+            return range(start, bound + 1)
+        if relation == '<':
+            return range(start, bound)
+    else:
+        if relation == '!=' and start >= bound:
+            return range(start, bound, -1)
+        if relation == '>=':
+            return range(start, bound - 1, -1)
+        if relation == '>':
+            return range(start, bound, -1)
+    # runs until GTFO, or at most once
+    return None
+
+
+class CountedValues:
+    """The values the loop variable takes on each pass, in order."""
+    __slots__ = ('start', 'bound', 'step', 'relation', 'range', 'final')
+
+    def __init__(self, start, bound, step, relation):
+        self.start = start
+        self.bound = bound
+        self.step = step
+        self.relation = relation
+        self.range = _native_range(start, bound, step, relation)
+        self.final = start
+        if self.range:
+            self.final = self.range.stop
+
+    def __iter__(self):
+        if self.range is not None:
+            return iter(self.range)
+        return self.emulate()
+
+    def emulate(self):
+        # the generic loop, for values a range can't stand for
+        test = RELATION_TESTS[self.relation]
+        value = self.start
+        while test(value, self.bound):
+            yield value
+            value = self.final = to_number(value) + self.step
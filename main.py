@@ -1,34 +1,73 @@
 from lexer import tokenizer
-from parser import parse, print_ast
+from parser import parse_tokens, print_ast
+from diagnostics import verbose
+from ast_cache import get_cache
+from optimizer import optimize
+from semantics import infer_types, describe_types
 import sys
 
 def main():
     """Main function demonstrating both tokenization and parsing"""
     filename = sys.argv[1] if len(sys.argv) > 1 else "smoosh_assign.lol"
+    # the command line tool keeps the full lexer/parser dumps
+    diagnostics = verbose()
     
     try:     
+        with open(filename, 'r') as f:
+            source = f.read()
+        cache = get_cache()
+        cached = cache.get(source)
+
         # Step 1: Lexical Analysis
         print("\n1. LEXICAL ANALYSIS (Tokenization):")
         print("-" * 40)
-        tokens = tokenizer(filename)
+        if cached:
+            tokens, ast = cached
+            print("(unchanged since last run, loaded from cache)")
+        else:
+            tokens = tokenizer(filename, diagnostics)
         for t in tokens:
-            print(f"Line {t['line_number']:3}, Column {t['column_number']:3}: {t['token_name']:25} '{t['pattern']}'")
+            print(f"Line {t.line:3}, Column {t.column:3}: {t.name:25} '{t.lexeme}'")
         print(f"Total tokens: {len(tokens)}")
         
         # Step 2: Syntax Analysis
         print("\n2. SYNTAX ANALYSIS (Parsing):")
         print("-" * 40)
-        ast = parse(filename)
+        # reuse the tokens from step 1 instead of lexing the file again
+        if not cached:
+            try:
+                ast = parse_tokens(tokens, diagnostics)
+                try:
+                    if not cache.put(source, tokens, ast):
+                        print("AST nested too deeply to cache, it is parsed again next run")
+                except OSError as e:
+                    print(f"Could not write AST cache: {e}")
+            except SyntaxError as e:
+                print(f"Parsing error: {e}")
+                ast = None
         if ast:
             print_ast(ast)
+            # what the optimizer would change before execution
+            _, changes = optimize(ast)
+            for change in changes:
+                print(f"Optimizer: {change}")
         else:
             print("Parsing failed.")
             
-        # wala pa muna since hindi pa ok ang syntax checker
-        # no gui rin aotm
+        # Step 3: Semantic Analysis
         print("\n3. SEMANTIC ANALYSIS:")
         print("-" * 40)
-        print("Semantic checks would go here...")
+        if ast:
+            # the types each variable can have when the program ends
+            types = infer_types(ast)
+            for name, possible in types.variables.items():
+                print(f"{name:20} {describe_types(possible)}")
+            for error in types.errors:
+                print(f"Type error: {error}")
+            if not types.errors:
+                print("No type errors found.")
+        else:
+            print("Skipped, parsing failed.")
         
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")
@@ -0,0 +1,456 @@
+"""AST optimizer run between parsing and execution.
+
+Levels:
+    0  no changes, the parser's tree is executed as is
+    1  constant folding and dead-branch elimination
+    2  level 1 plus loop-invariant hoisting (the default)
+
+Constant folding replaces an operation whose operands are all literals by the
+literal it evaluates to. The value is computed by the tree walker itself, so
+the coercion rules are exactly the interpreter's; an operation that fails
+(QUOSHUNT OF 1 AN 0) is left in place to fail at run time as before.
+
+Short-circuit folding drops constant operands of BOTH OF / EITHER OF and
+ANY OF / ALL OF that can't change the result, and cuts the operands after
+one that always decides it: those are never evaluated at run time either.
+
+Dead-branch elimination resolves O RLY? blocks whose condition folded to a
+literal: the taken branch is spliced into the enclosing block (after the
+condition, which still sets IT) and unreachable MEBBE / NO WAI blocks are
+dropped.
+
+Loop-invariant hoisting looks at each IM IN YR loop for pure expressions
+that read no variable the loop can assign (the loop variable, IT and
+anything declared, assigned, recast or read by GIMMEH inside it). Such an
+expression is wrapped in a HoistedExpression: the first evaluation after the
+loop is entered stores the value in the frame under a hidden name, and later
+passes read it back. A ResetHoisted before the loop clears those names, so an
+enclosing loop gets a fresh value each time round. Evaluating on first use
+rather than before the loop keeps errors and skipped branches exactly where
+they were.
+
+The input tree is never modified; unchanged subtrees are shared with the
+optimized one. Every change is recorded in Optimizer.changes and reported to
+the diagnostics sink as an 'optimized' event.
+
+Expressions are rewritten without recursion, however deeply they nest (see
+transform): a rule is a generator that yields each child it needs rewritten
+and is sent back the result, and one loop runs the rules of a whole
+expression with the waiting ones in a list, like the parser's operator stack.
+"""
+from types import GeneratorType
+
+import ast_nodes as ast
+from analysis import assigned_variables, invariant_expressions
+from diagnostics import SILENT_DIAGNOSTICS
+from values import to_boolean, value_to_string
+
+NO_OPTIMIZATION = 0
+BASIC_OPTIMIZATION = 1
+AGGRESSIVE_OPTIMIZATION = 2
+DEFAULT_OPT_LEVEL = AGGRESSIVE_OPTIMIZATION
+
+# literal node label by Python type of the folded value
+LITERAL_TYPES = {
+    int: "Integer Literal",
+    float: "Float Literal",
+    str: "String Literal",
+    bool: "Boolean Literal",
+    type(None): "Type Literal",
+}
+
+
+# short-circuit operator -> operand TROOF that decides its result
+SHORT_CIRCUIT_DECISIVE = {"BOTH OF": False, "ALL OF": False, "EITHER OF": True, "ANY OF": True}
+# the ANY OF / ALL OF operator a reduced binary operator becomes
+VARIADIC_FORMS = {"BOTH OF": "ALL OF", "ALL OF": "ALL OF", "EITHER OF": "ANY OF", "ANY OF": "ANY OF"}
+
+
+def make_literal(value):
+    if value is None:
+        text = "NOOB"
+    elif isinstance(value, str):
+        text = f'"{value}"'
+    elif isinstance(value, float):
+        text = repr(value)
+    else:
+        text = value_to_string(value)
+    return ast.Literal(LITERAL_TYPES[type(value)], text, value)
+
+
+def is_constant(node):
+    return isinstance(node, (ast.Literal, ast.TypeLiteral))
+
+
+def transform(node, rule):
+    """node rewritten by rule, children before the nodes they belong to.
+
+    rule(node) returns None to keep node as it is, a generator that yields
+    each child of node it needs rewritten, is sent back the child's
+    rewritten form and returns node's, or anything else to put in node's
+    place. The generators waiting for a child are kept in a list, so nesting
+    depth never grows the Python stack. What rules return needn't be nodes:
+    semantics.py works out the types of expressions with it.
+    """
+    pending = []
+    while True:
+        result = rule(node)
+        if result is None:
+            value = node
+        elif isinstance(result, GeneratorType):
+            pending.append(result)
+            value = None
+        else:
+            value = result
+        # hand value to the rule waiting for it, until one asks for a child
+        while pending:
+            try:
+                node = pending[-1].send(value)
+                break
+            except StopIteration as done:
+                pending.pop()
+                value = done.value
+        else:
+            return value
+
+
+def rebuild(node):
+    # rule for transform: node with each child node (also inside lists)
+    # rewritten, node itself if nothing changed
+    values = []
+    changed = False
+    for _, value in node.fields():
+        if isinstance(value, ast.Node):
+            new_value = yield value
+        elif isinstance(value, list):
+            new_value = []
+            for item in value:
+                new_value.append((yield item) if isinstance(item, ast.Node) else item)
+            if all(new is old for new, old in zip(new_value, value)):
+                new_value = value
+        else:
+            new_value = value
+        changed = changed or new_value is not value
+        values.append(new_value)
+    return type(node)(*values) if changed else node
+
+
+# operand nesting describe spells out, deeper operands are shown as ...
+DESCRIBE_DEPTH = 8
+
+
+def describe(node, depth=DESCRIBE_DEPTH):
+    # short LOLCODE-like rendering of an expression, for the report
+    if isinstance(node, ast.Literal):
+        return node.text
+    if isinstance(node, ast.Identifier):
+        return node.name
+    if isinstance(node, ast.TypeLiteral):
+        return node.value
+    if isinstance(node, ast.HoistedExpression):
+        return describe(node.expression, depth)
+    if depth == 0 and isinstance(node, ast.EXPRESSION_NODES):
+        return "..."
+    depth -= 1
+    if isinstance(node, (ast.ArithmeticOperation, ast.ComparisonOperation, ast.LogicalOperation)):
+        return f"{node.operator} {describe(node.left, depth)} AN {describe(node.right, depth)}"
+    if isinstance(node, ast.VariadicLogicalOperation):
+        return (f"{node.operator} " + " AN ".join(describe(operand, depth) for operand in node.operands)
+                + " MKAY")
+    if isinstance(node, ast.UnaryOperation):
+        return f"{node.operator} {describe(node.operand, depth)}"
+    if isinstance(node, ast.Smoosh):
+        return "SMOOSH " + " AN ".join(describe(part, depth) for part in node.parts)
+    if isinstance(node, ast.TypecastMaek):
+        return f"MAEK {describe(node.expression, depth)} A {node.convert_to_type}"
+    if isinstance(node, ast.FunctionCall):
+        return (f"I IZ {node.name}"
+                + "".join(f" YR {describe(argument, depth)}" for argument in node.arguments) + " MKAY")
+    return node.kind
+
+
+class Optimizer:
+    def __init__(self, level=DEFAULT_OPT_LEVEL, diagnostics=None):
+        # imported here, interpreter.py imports this module for run()
+        from interpreter import Interpreter
+
+        self.level = level
+        self.diagnostics = diagnostics or SILENT_DIAGNOSTICS
+        self.changes = []
+        self.hoisted_count = 0
+        self.evaluator = Interpreter()
+        self.statement_optimizers = ast.dispatch_table(self, 'optimize_', ast.STATEMENT_NODES)
+        self.expression_optimizers = ast.dispatch_table(self, 'optimize_', ast.EXPRESSION_NODES)
+
+    def optimize(self, program):
+        if self.level <= NO_OPTIMIZATION:
+            return program
+        return ast.Program(self.optimize_block(program.statements))
+
+    def report(self, message):
+        self.changes.append(message)
+        self.diagnostics.info('optimized', message)
+
+    # STATEMENTS ===============================================================
+
+    def optimize_block(self, statements):
+        # a statement can become several (a spliced branch) or none
+        optimized = []
+        for statement in statements:
+            optimized.extend(self.optimize_statement(statement))
+        return optimized
+
+    def optimize_statement(self, node):
+        if not node:
+            return [node]
+        optimizer = self.statement_optimizers.get(type(node))
+        if optimizer is None:
+            return [node]
+        return optimizer(node)
+
+    def optimize_variable_block(self, node):
+        declarations = [self.optimize_variable_declaration(declaration)[0] for declaration in node.declarations]
+        return [ast.VariableBlock(declarations)]
+
+    def optimize_variable_declaration(self, node):
+        if not node.initial_value:
+            return [node]
+        return [ast.VariableDeclaration(node.identifier, self.optimize_expression(node.initial_value))]
+
+    def optimize_variable_assignment(self, node):
+        return [ast.VariableAssignment(node.identifier, self.optimize_expression(node.value))]
+
+    def optimize_output_statement(self, node):
+        return [ast.OutputStatement([self.optimize_expression(expr) for expr in node.expressions], node.newline)]
+
+    def optimize_expression_statement(self, node):
+        return [ast.ExpressionStatement(self.optimize_expression(node.expression))]
+
+    def optimize_function_definition(self, node):
+        return [ast.FunctionDefinition(node.name, node.parameters, self.optimize_block(node.statements))]
+
+    def optimize_return_statement(self, node):
+        return [ast.ReturnStatement(self.optimize_expression(node.value))]
+
+    def optimize_loop_statement(self, node):
+        condition = node.loop_condition
+        if condition is not None and condition.condition is not None:
+            condition = ast.LoopCondition(condition.loop_operation, condition.variable,
+                                          condition.loop_condition,
+                                          self.optimize_expression(condition.condition))
+        loop = ast.LoopStatement(node.loop_identifier, condition, self.optimize_block(node.statements))
+        if self.level < AGGRESSIVE_OPTIMIZATION:
+            return [loop]
+        return self.hoist_invariants(loop)
+
+    def hoist_invariants(self, loop):
+        # inner loops were handled first; what they hoisted that is also
+        # invariant here moves up to this loop instead of being cached twice
+        assigned = assigned_variables([loop])
+        invariant = invariant_expressions(loop, assigned)
+        names = []
+        moved = set()
+
+        def rewrite(node):
+            # a function body runs on its own frame, its loops hoist for themselves
+            if isinstance(node, ast.FunctionDefinition):
+                return None
+            expression = node
+            if isinstance(node, ast.HoistedExpression):
+                expression = node.expression
+            # constant subtrees were folded already, or can't be
+            if id(expression) in invariant and not isinstance(expression, ast.Identifier):
+                if expression is not node:
+                    moved.add(node.name)
+                name = f"_hoisted{self.hoisted_count}"
+                self.hoisted_count += 1
+                names.append(name)
+                self.report(f"hoisted {describe(expression)} out of loop {loop.loop_identifier}")
+                return ast.HoistedExpression(name, expression)
+            return rebuild(node)
+
+        def drop_moved(node):
+            # inner resets of values that are now cached out here
+            if isinstance(node, ast.ResetHoisted):
+                return ast.ResetHoisted([name for name in node.names if name not in moved])
+            if isinstance(node, ast.EXPRESSION_NODES):
+                return None
+            return rebuild(node)
+
+        loop = transform(loop, lambda node: rebuild(node) if node is loop else rewrite(node))
+        if moved:
+            loop = transform(loop, lambda node: rebuild(node) if node is loop else drop_moved(node))
+        if not names:
+            return [loop]
+        return [ast.ResetHoisted(names), loop]
+
+    def optimize_conditional_statement(self, node):
+        condition = self.optimize_expression(node.condition)
+        then_block = self.optimize_block(node.then_block)
+        elseif_blocks = [ast.ElseIfBlock(self.optimize_expression(else_if.condition),
+                                         self.optimize_block(else_if.statements))
+                         for else_if in node.elseif_blocks]
+        else_block = self.optimize_block(node.else_block) if node.else_block is not None else None
+
+        if not is_constant(condition):
+            elseif_blocks, else_block = self.prune_elseif_blocks(elseif_blocks, else_block)
+            return [ast.ConditionalStatement(condition, then_block, elseif_blocks, else_block)]
+
+        # the condition still runs, for IT
+        set_it = ast.ExpressionStatement(condition)
+        if to_boolean(self.evaluator.evaluate_expression(condition)):
+            self.report(f"O RLY? on {describe(condition)}: always YA RLY, other branches removed")
+            return [set_it] + then_block
+
+        elseif_blocks, else_block = self.prune_elseif_blocks(elseif_blocks, else_block)
+        if elseif_blocks:
+            # a MEBBE still has to be tested at run time
+            self.report(f"O RLY? on {describe(condition)}: YA RLY never taken, removed")
+            return [ast.ConditionalStatement(condition, [], elseif_blocks, else_block)]
+        self.report(f"O RLY? on {describe(condition)}: never YA RLY, "
+                    f"{'NO WAI' if else_block is not None else 'nothing'} runs")
+        return [set_it] + (else_block or [])
+
+    def optimize_switch_statement(self, node):
+        subject = self.optimize_expression(node.subject) if node.subject else None
+        cases = [ast.SwitchCase(case.value, self.optimize_block(case.statements)) for case in node.cases]
+        default_block = self.optimize_block(node.default_block) if node.default_block is not None else None
+        return [ast.SwitchStatement(subject, cases, default_block)]
+
+    def prune_elseif_blocks(self, elseif_blocks, else_block):
+        # drop MEBBEs that are always false; one that is always true takes
+        # the place of NO WAI and everything after it is unreachable
+        kept = []
+        for else_if in elseif_blocks:
+            if not is_constant(else_if.condition):
+                kept.append(else_if)
+                continue
+            if to_boolean(self.evaluator.evaluate_expression(else_if.condition)):
+                self.report(f"MEBBE {describe(else_if.condition)}: always taken, later branches removed")
+                return kept, else_if.statements
+            self.report(f"MEBBE {describe(else_if.condition)}: never taken, removed")
+        return kept, else_block
+
+    # EXPRESSIONS ==============================================================
+
+    def optimize_expression(self, node):
+        # the optimize_ methods below are transform rules: they yield the
+        # operands they need optimized instead of recursing into them
+        return transform(node, self.expression_rule)
+
+    def expression_rule(self, node):
+        if not node:
+            return None
+        optimizer = self.expression_optimizers.get(type(node))
+        if optimizer is None:
+            return None
+        return optimizer(node)
+
+    def fold(self, original, node, operands):
+        # node with optimized children; a literal if all of them are constant
+        if not all(is_constant(operand) for operand in operands):
+            return node
+        try:
+            value = self.evaluator.evaluate_expression(node)
+        except Exception:
+            # leave it to fail at run time, where the error is reported
+            return node
+        literal = make_literal(value)
+        self.report(f"folded {describe(original)} -> {literal.text}")
+        return literal
+
+    def optimize_binary(self, node):
+        left = yield node.left
+        right = yield node.right
+        return self.fold(node, type(node)(node.operator, left, right), (left, right))
+
+    optimize_arithmetic_operation = optimize_binary
+    optimize_comparison_operation = optimize_binary
+
+    def optimize_logical_operation(self, node):
+        if node.operator not in SHORT_CIRCUIT_DECISIVE:
+            return (yield from self.optimize_binary(node))
+        return (yield from self.optimize_short_circuit(node, node.operator, [node.left, node.right]))
+
+    def optimize_variadic_logical_operation(self, node):
+        if node.operator not in SHORT_CIRCUIT_DECISIVE:
+            return node
+        return (yield from self.optimize_short_circuit(node, node.operator, node.operands))
+
+    def optimize_short_circuit(self, original, operator, operands):
+        decisive = SHORT_CIRCUIT_DECISIVE[operator]
+        kept = []
+        for operand in operands:
+            operand = yield operand
+            if is_constant(operand) and to_boolean(self.evaluator.evaluate_expression(operand)) != decisive:
+                # can't change the result
+                continue
+            kept.append(operand)
+            if is_constant(operand):
+                # decides the result if reached, later operands never run
+                break
+
+        if not kept:
+            literal = make_literal(not decisive)
+        elif len(kept) == 1 and is_constant(kept[0]):
+            literal = make_literal(decisive)
+        else:
+            literal = None
+        if literal is not None:
+            self.report(f"folded {describe(original)} -> {literal.text}")
+            return literal
+        if len(kept) < len(operands):
+            self.report(f"short-circuited {describe(original)}")
+            return ast.VariadicLogicalOperation(VARIADIC_FORMS[operator], kept)
+        if all(new is old for new, old in zip(kept, operands)):
+            return original
+        if isinstance(original, ast.LogicalOperation):
+            return ast.LogicalOperation(operator, kept[0], kept[1])
+        return ast.VariadicLogicalOperation(operator, kept)
+
+    def optimize_function_call(self, node):
+        arguments = []
+        for argument in node.arguments:
+            arguments.append((yield argument))
+        return ast.FunctionCall(node.name, arguments)
+
+    def optimize_unary_operation(self, node):
+        operand = yield node.operand
+        return self.fold(node, ast.UnaryOperation(node.operator, operand), (operand,))
+
+    def optimize_typecast_maek(self, node):
+        expression = yield node.expression
+        return self.fold(node, ast.TypecastMaek(expression, node.convert_to_type), (expression,))
+
+    def optimize_smoosh(self, node):
+        parts = []
+        for part in node.parts:
+            parts.append((yield part))
+        folded = self.fold(node, ast.Smoosh(parts), parts)
+        if not isinstance(folded, ast.Smoosh):
+            return folded
+
+        # join runs of neighbouring constant parts
+        merged = []
+        for part in parts:
+            if merged and is_constant(part) and is_constant(merged[-1]):
+                text = (value_to_string(self.evaluator.evaluate_expression(merged[-1]))
+                        + value_to_string(self.evaluator.evaluate_expression(part)))
+                merged[-1] = make_literal(text)
+            else:
+                merged.append(part)
+        if len(merged) < len(parts):
+            self.report(f"merged constant parts of {describe(node)}")
+            return ast.Smoosh(merged)
+        return folded
+
+
+def optimize(program, level=DEFAULT_OPT_LEVEL, diagnostics=None):
+    """Return (optimized program, list of changes made)."""
+    optimizer = Optimizer(level, diagnostics)
+    try:
+        return optimizer.optimize(program), optimizer.changes
+    except RecursionError:
+        # statements still recurse by nesting; run such a program as parsed
+        optimizer.diagnostics.info('optimized', "nesting too deep to optimize, left as parsed")
+        return program, []
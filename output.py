@@ -0,0 +1,178 @@
+"""Where VISIBLE output goes.
+
+Every backend writes each VISIBLE as one string through Interpreter.output,
+an OutputSink: the printed values plus a newline, or without the newline for
+`VISIBLE ... !`. The sinks:
+
+    MemorySink      keeps everything, for get_output() (the default)
+    RingBufferSink  keeps only the last max_lines lines
+    StreamSink      writes to a text stream, sys.stdout unless told otherwise
+    FileSink        writes to a path (or an already open file)
+    CallbackSink    hands the text to a function
+
+All but MemorySink hold at most buffer_lines writes before passing them on
+joined into one string, so a program printing millions of lines runs in
+constant memory and the host sees output while it runs instead of at the
+end. Buffered sinks are flushed before every GIMMEH, so a prompt is shown
+before the program waits for its answer, and when the program finishes.
+"""
+import sys
+from collections import deque
+
+DEFAULT_BUFFER_LINES = 256
+DEFAULT_MAX_LINES = 10000
+
+
+class OutputSink:
+    """Base class: write, flush, reset between runs, close when done."""
+
+    def write(self, text):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def reset(self):
+        # called before each run of a program
+        pass
+
+    def close(self):
+        self.flush()
+
+    def at_line_start(self):
+        # whether the next write starts a new line
+        return True
+
+    def get_output(self):
+        # what the sink still holds, without the last newline; sinks that
+        # pass their output on hold nothing
+        return ''
+
+
+def _text_without_last_newline(text):
+    return text[:-1] if text.endswith('\n') else text
+
+
+class MemorySink(OutputSink):
+    """Everything written, in memory."""
+
+    def __init__(self):
+        self.chunks = []
+        # bound once: the backends call write for every VISIBLE
+        self.write = self.chunks.append
+
+    def reset(self):
+        # cleared in place: compiled programs hold on to write
+        self.chunks.clear()
+
+    def at_line_start(self):
+        return not self.chunks or self.chunks[-1].endswith('\n')
+
+    def get_output(self):
+        return _text_without_last_newline(''.join(self.chunks))
+
+
+class BufferedSink(OutputSink):
+    """Collects writes and passes them on in batches through emit(text)."""
+
+    def __init__(self, buffer_lines=DEFAULT_BUFFER_LINES):
+        self.buffer_lines = buffer_lines
+        self.pending = []
+        self.ends_line = True
+
+    def write(self, text):
+        pending = self.pending
+        pending.append(text)
+        if len(pending) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            text = ''.join(self.pending)
+            self.pending.clear()
+            self.ends_line = text.endswith('\n')
+            self.emit(text)
+
+    def reset(self):
+        self.pending.clear()
+
+    def at_line_start(self):
+        if self.pending:
+            return self.pending[-1].endswith('\n')
+        return self.ends_line
+
+    def emit(self, text):
+        raise NotImplementedError
+
+
+class RingBufferSink(BufferedSink):
+    """The last max_lines lines written; dropped counts the older ones."""
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, buffer_lines=DEFAULT_BUFFER_LINES):
+        super().__init__(buffer_lines)
+        self.lines = deque(maxlen=max_lines)
+        # text after the last newline, a line still being written with !
+        self.partial = ''
+        self.dropped = 0
+
+    def emit(self, text):
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        overflow = len(self.lines) + len(lines) - self.lines.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.lines.extend(lines)
+
+    def reset(self):
+        super().reset()
+        self.lines.clear()
+        self.partial = ''
+        self.dropped = 0
+
+    def get_output(self):
+        self.flush()
+        lines = list(self.lines)
+        if self.partial:
+            lines.append(self.partial)
+        return '\n'.join(lines)
+
+
+class StreamSink(BufferedSink):
+    """Writes to a text stream, sys.stdout by default."""
+
+    def __init__(self, stream=None, buffer_lines=DEFAULT_BUFFER_LINES):
+        super().__init__(buffer_lines)
+        self.stream = stream if stream is not None else sys.stdout
+
+    def emit(self, text):
+        self.stream.write(text)
+
+    def flush(self):
+        super().flush()
+        self.stream.flush()
+
+
+class FileSink(StreamSink):
+    """Writes to a file; a path is opened for writing and closed by close()."""
+
+    def __init__(self, file, buffer_lines=DEFAULT_BUFFER_LINES):
+        self._owns_stream = isinstance(file, str)
+        if self._owns_stream:
+            file = open(file, 'w', encoding='utf-8')
+        super().__init__(file, buffer_lines)
+
+    def close(self):
+        super().close()
+        if self._owns_stream:
+            self.stream.close()
+
+
+class CallbackSink(BufferedSink):
+    """Calls callback(text) with each batch of output."""
+
+    def __init__(self, callback, buffer_lines=DEFAULT_BUFFER_LINES):
+        super().__init__(buffer_lines)
+        self.callback = callback
+
+    def emit(self, text):
+        self.callback(text)
@@ -1,425 +1,326 @@
-from lexer import tokenizer
+from lexer import tokenizer, TokenKind
+from diagnostics import SILENT_DIAGNOSTICS, TRACE, verbose
+import ast_nodes as ast
 
 # diretso na, para madali na i-adjust kapag coconnect na sa frontend
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
+    def __init__(self, tokens, diagnostics=None):
+        self.diagnostics = diagnostics or SILENT_DIAGNOSTICS
+        # tokens can be a list or any iterator (e.g. lexer.iter_tokens),
+        # we only ever hold the current token and one token of lookahead
+        self.tokens = iter(tokens)
+        self.next_token = next(self.tokens, None)
         self.current_token = None
         self.token_index = -1
+        # HOW IZ I bodies around the current token, FOUND YR needs one
+        self.function_depth = 0
         self.advance()
 
     def advance(self):
         # move on to next token
         self.token_index += 1
-        if self.token_index < len(self.tokens):
-            self.current_token = self.tokens[self.token_index]
-        else:
-            self.current_token = None
+        self.current_token = self.next_token
+        if self.next_token is not None:
+            self.next_token = next(self.tokens, None)
         return self.current_token
 
     def peek(self):
         # look at the next token without consuming it
-        if self.token_index + 1 < len(self.tokens):
-            return self.tokens[self.token_index + 1]
-        return None
+        return self.next_token
 
-    def error_handle(self, token_type, value=None):
-        # eExpect a specific token type and optionally value
-        if self.current_token and self.current_token['token_name'] == token_type:
-            if value is None or self.current_token['pattern'] == value:
+    def error_handle(self, token_kind, value=None):
+        # eExpect a specific token kind and optionally value
+        if self.current_token and self.current_token.kind == token_kind:
+            if value is None or self.current_token.lexeme == value:
                 token = self.current_token
                 self.advance()
                 return token
             else:
-                self.error(f"Expected {token_type} '{value}', but got '{self.current_token['pattern']}'")
+                self.error(f"Expected {token_kind.label} '{value}', but got '{self.current_token.lexeme}'")
         else:
-            expected = f"{token_type} '{value}'" if value else token_type
-            got = self.current_token['token_name'] if self.current_token else 'EOF'
+            expected = f"{token_kind.label} '{value}'" if value else token_kind.label
+            got = self.current_token.name if self.current_token else 'EOF'
             self.error(f"Expected {expected}, but got {got}")
 
     def error(self, message):
         # for the errors, indicate line number and column number
         # and unexpected error
         if self.current_token:
-            line = self.current_token['line_number']
-            column = self.current_token['column_number']
+            line = self.current_token.line
+            column = self.current_token.column
             raise SyntaxError(f"Line {line}, Column {column}: {message}")
         else:
             raise SyntaxError(f"Unexpected end of file: {message}")
 
     def parse_program(self):
         """Program -> HAI statements KTHXBYE"""
-        print("Parsing program...")
+        self.diagnostics.info('parse_start', "Parsing program...")
         
         # always HAI sa start
-        self.error_handle("Code Delimeter", "HAI")
+        hai = self.error_handle(TokenKind.CODE_DELIMITER, "HAI")
+        # optional language version on the same line (HAI 1.2)
+        if (self.current_token and self.current_token.line == hai.line and
+                self.current_token.kind == TokenKind.FLOAT_LITERAL):
+            self.advance()
         
         # sa bawat statement
         # dito mapupunta ung breakdown ng keywords
         # tapos iaarrange into a tree for easier analysis
         statements = []
-        while self.current_token and self.peek() and self.peek()['pattern'] != "KTHXBYE":
-            if self.current_token['pattern'] == "WAZZUP":
+        while self.current_token and self.current_token.lexeme != "KTHXBYE":
+            if self.current_token.lexeme == "WAZZUP":
                 statements.append(self.parse_variable_block())
             else:
                 statement = self.parse_statement()
                 if statement:
                     statements.append(statement)
                 else:
-                    if self.current_token and self.current_token['pattern'] != "KTHXBYE":
-                        self.error(f"Unexpected token: {self.current_token['pattern']}")
+                    if self.current_token and self.current_token.lexeme != "KTHXBYE":
+                        self.error(f"Unexpected token: {self.current_token.lexeme}")
                     break
         
         # KTHXBYE eof
-        self.error_handle("Code Delimeter", "KTHXBYE")
+        self.error_handle(TokenKind.CODE_DELIMITER, "KTHXBYE")
         
-        return {
-            'type': 'program',
-            'statements': statements
-        }
+        return ast.Program(statements)
 
     def parse_statement(self):
         """<statement> ::= <print> | <input> | <declare_var> | <assign_var> | <typecast> 
         | <conditional> | <loop> | <function> | <function_call> | <return> | <break> 
         | <single_comment> | <multi_comment>"""
-        if not self.current_token:
-            return None
-            
-        token_value = self.current_token['pattern']
-        
-        # variable declaration
-        if token_value == "I HAS A":
-            return self.parse_variable_declaration()
-        
-        # output statement
-        elif token_value == "VISIBLE":
-            return self.parse_output_statement()
-         
-        # Input statement -added
-        elif token_value == "GIMMEH":
-            return self.parse_input_statement()
-
-        # Loop statement - added
-        elif token_value == "IM IN YR":
-            return self.parse_loop_statement()
-        
-        # Variable assignment: <identifier> R <expression>
-        elif (self.current_token['token_name'] == "Variable Identifier" and
-            self.peek() and self.peek()['pattern'] == "R"):
-            return self.parse_variable_assignment()
-
-        # Variable typecasting: varident IS NOW A literal
-        elif (self.current_token['token_name'] == "Variable Identifier"
-            and self.peek()
-            and self.peek()['pattern'] == "IS NOW A"):
-            return self.parse_typecast_isnow()
-        
-         # conditional statements O RLY?
-        elif (self.current_token['token_name'] in ["Variable Identifier", "String Literal", "Integer Literal", "Float Literal", "Boolean Literal"] or
-            self.current_token['pattern'] in ["SUM OF", "DIFF OF", "PRODUKT OF", "QUOSHUNT OF", "MOD OF", "BIGGR OF", "SMALLR OF", "BOTH SAEM", "DIFFRINT",
-            "SMOOSH", "MAEK", "NOT"]):
-            
-            # check if conditional when theres O RLY?
-            if self.peek() and self.peek()['pattern'] == "O RLY?":
-                return self.parse_conditional_statement()
-            else:
-                self.advance()
-                return self.parse_statement()
-
-        # For now, skip other tokens we don't handle yet
-        else:
+        # tokens we don't handle yet are skipped in a loop, not by recursing
+        # once per token, so long runs of them can't blow the stack
+        while self.current_token:
+            token = self.current_token
+            if token.lexeme in STATEMENT_END:
+                return None
+
+            # keyword statements: one dict lookup on the token kind
+            handler = STATEMENT_HANDLERS.get(token.kind)
+            if handler:
+                return handler(self)
+
+            if token.kind == TokenKind.IDENTIFIER and self.next_token:
+                follow = self.next_token.lexeme
+                # Variable assignment: <identifier> R <expression>
+                if follow == "R":
+                    return self.parse_variable_assignment()
+                # Variable typecasting: varident IS NOW A literal
+                if follow == "IS NOW A":
+                    return self.parse_typecast_isnow()
+
+            # expression statement, or the condition of O RLY?
+            if token.kind in EXPRESSION_START:
+                return self.parse_expression_statement()
+
+            # For now, skip other tokens we don't handle yet
             self.advance()
-            return self.parse_statement()
+        return None
+
+    def parse_expression_statement(self):
+        """<expr> | <expr> <linebreak> O RLY? ..."""
+        expression = self.parse_expression()
+        if self.current_token and self.current_token.kind == TokenKind.IF_KEYWORD:
+            return self.parse_conditional_statement(expression)
+        if self.current_token and self.current_token.kind == TokenKind.SWITCH:
+            return self.parse_switch_statement(expression)
+        return ast.ExpressionStatement(expression)
 
     def parse_variable_block(self):
         # take note of block structures
         # WAZZUP -- BUHBYE
-        print("Parsing variable block...")
-        self.error_handle("Variable List Delimeter", "WAZZUP")
+        self.diagnostics.debug('variable_block', "Parsing variable block...")
+        self.error_handle(TokenKind.VARIABLE_LIST_DELIMITER, "WAZZUP")
         
         declarations = []
-        while self.current_token and self.current_token['pattern'] != "BUHBYE":
-            if self.current_token['pattern'] == "I HAS A":
+        while self.current_token and self.current_token.lexeme != "BUHBYE":
+            if self.current_token.lexeme == "I HAS A":
                 decl = self.parse_variable_declaration()
                 if decl:
                     declarations.append(decl)
             else:
                 self.advance()
         
-        self.error_handle("Variable List Delimeter", "BUHBYE")
-        return {
-            'type': 'variable_block',
-            'declarations': declarations
-        }
+        self.error_handle(TokenKind.VARIABLE_LIST_DELIMITER, "BUHBYE")
+        return ast.VariableBlock(declarations)
 
     def parse_variable_declaration(self):
         # identifiers
-        self.error_handle("Variable Declaration", "I HAS A")
+        self.error_handle(TokenKind.VARIABLE_DECLARATION, "I HAS A")
         
-        identifier = self.error_handle("Variable Identifier")
+        identifier = self.error_handle(TokenKind.IDENTIFIER)
         
         # Optional assignment with ITZ
         initial_value = None
-        if self.current_token and self.current_token['pattern'] == "ITZ":
+        if self.current_token and self.current_token.lexeme == "ITZ":
             self.advance()  # consume ITZ
             initial_value = self.parse_expression()
         
-        return {
-            'type': 'variable_declaration',
-            'identifier': identifier['pattern'],
-            'initial_value': initial_value
-        }
+        return ast.VariableDeclaration(identifier.lexeme, initial_value)
 
     def parse_output_statement(self):
         # visible
-        self.error_handle("Output Keyword", "VISIBLE")
+        self.error_handle(TokenKind.OUTPUT_KEYWORD, "VISIBLE")
         
+        # arguments run to the end of the VISIBLE line
+        line = self.current_token.line if self.current_token else None
         expressions = []
-        while (self.current_token and 
-               self.current_token['pattern'] not in ["KTHXBYE", "VISIBLE", "GIMMEH", "I HAS A", "O RLY?", 
-               "MEBBE", "NO WAI", "OIC", "IM OUTTA YR", "IM IN YR", "AN"] and
-               not (self.current_token['token_name'] == "Comment")):
+        while (self.current_token and self.current_token.line == line and
+               self.current_token.lexeme not in OUTPUT_END):
             expr = self.parse_expression()
             if expr:
                 expressions.append(expr)
             else:
                 break
         
-        return {
-            'type': 'output_statement',
-            'expressions': expressions
-        }
-
-    def parse_expression(self):
-        # parse expressions with operator precedence
-        return self.parse_logical_or()
-
-    def parse_logical_or(self):
-        left = self.parse_logical_and()
-        while self.current_token and self.current_token['pattern'] in ["ANY OF", "EITHER OF"]:
-            operator = self.current_token['pattern']
-            self.advance()
-            right = self.parse_logical_and()
-            left = {
-                'type': 'logical_operation',
-                'operator': operator,
-                'left': left,
-                'right': right
-            }
-        return left
-
-    def parse_logical_and(self):
-        left = self.parse_comparison()
-        while self.current_token and self.current_token['pattern'] in ["BOTH OF", "EITHER OF", "WON OF", "ANY OF", "ALL OF"]:
-            operator = self.current_token['pattern']
+        # a trailing ! leaves the line open
+        newline = True
+        if (self.current_token and self.current_token.line == line and
+                self.current_token.kind == TokenKind.NEWLINE_SUPPRESSION):
             self.advance()
-            right = self.parse_comparison()
-            left = {
-                'type': 'logical_operation',
-                'operator': operator,
-                'left': left,
-                'right': right
-            }
-        return left
-
-    def parse_comparison(self):
-        left = self.parse_arithmetic()
-        while self.current_token and self.current_token['pattern'] in ["BIGGR OF", "SMALLR OF", "BOTH SAEM", "DIFFRINT", ]:
-            operator = self.current_token['pattern']
-            self.advance()
-            right = self.parse_arithmetic()
-            left = {
-                'type': 'comparison_operation',
-                'operator': operator,
-                'left': left,
-                'right': right
-            }
-        return left
-
-    def parse_arithmetic(self):
-        left = self.parse_term()
-
-        while self.current_token and self.current_token['pattern'] in ["SUM OF", "DIFF OF"]:
-            operator = self.current_token['pattern']
-            self.advance()
-            right = self.parse_term()
-            left = {
-                'type': 'arithmetic_operation',
-                'operator': operator,
-                'left': left,
-                'right': right
-            }
-        return left
-
-    def parse_term(self):
-        left = self.parse_factor()
-        while self.current_token and self.current_token['pattern'] in ["PRODUKT OF", "QUOSHUNT OF", "MOD OF"]:
-            operator = self.current_token['pattern']
-            self.advance()
-            right = self.parse_factor()
-            left = {
-                'type': 'arithmetic_operation',
-                'operator': operator,
-                'left': left,
-                'right': right
-            }
-        return left
-
-    def parse_factor(self):
-        # basic expressions: literals, identifiers, and arithmetic operations
-        if not self.current_token:
-            return None
-        
-        # hiwalay arithmetic and comparison operators
-        # wala pang logical atmm
-        # arithmetic operations at the factor level
-        if self.current_token['pattern'] in ["SUM OF", "DIFF OF", "PRODUKT OF", "QUOSHUNT OF", "MOD OF"]:
-            return self.parse_arithmetic_operation()
-        
-        if self.current_token['pattern'] in ["BIGGR OF", "SMALLR OF", "BOTH SAEM", "DIFFRINT"]:
-            return self.parse_comparison_operation()
-        
-        # boolean literals (WIN and FAIL)
-        if self.current_token['token_name'] == "Boolean Literal":
-            value = self.current_token
-            self.advance()
-            return {
-                'type': 'literal',
-                'value_type': 'Boolean Literal',
-                'value': value['pattern']
-            }
-        
-        # other literals
-        elif self.current_token['token_name'] in ["String Literal", "Integer Literal", "Float Literal"]:
-            value = self.current_token
-            self.advance()
-            return {
-                'type': 'literal',
-                'value_type': value['token_name'],
-                'value': value['pattern']
-            }
-        
-        # Handle Concatenation (added)
-        elif self.current_token['pattern'] == "SMOOSH":
-            return self.parse_smoosh()
-
-        # Handle type literals
-        elif self.current_token['token_name'] == "Type Literal":
-            value = self.current_token
-            self.advance()
-            return {
-                'type': 'type_literal',
-                'value': value['pattern']
-            }
+            newline = False
         
-        # identifiers
-        elif self.current_token['token_name'] == "Variable Identifier":
-            identifier = self.current_token
+        return ast.OutputStatement(expressions, newline)
+
+    def parse_expression(self):
+        """<expr> ::= <literal> | varident | NOT <expr> | <binary_op> <expr> [AN] <expr>
+                    | ANY OF <expr> (AN <expr>)* [MKAY] | ALL OF <expr> (AN <expr>)* [MKAY]
+                    | SMOOSH <expr> (AN <expr>)* | MAEK <expr> [A] <type>
+
+        Every LOLCODE operator is prefix, so instead of recursing for each
+        operand we keep an explicit stack of operators still waiting for
+        operands. Each token is looked at once and nesting depth only grows
+        the list, never the Python call stack.
+        """
+        pending = []  # [operator token, operands so far]
+        while True:
+            token = self.current_token
+            kind = token.kind if token else None
+
+            if kind in OPERATOR_NODE_TYPES:
+                self.advance()  # consume operator
+                pending.append([token, []])
+                continue
+
+            handler = OPERAND_HANDLERS.get(kind)
+            if handler is None:
+                if pending:
+                    operator, operands = pending[-1]
+                    if operands:
+                        self.error(f"Expected expression after AN in {operator.lexeme}")
+                    self.error(f"Expected expression after {operator.lexeme}")
+                if token is None or token.lexeme in EXPRESSION_END:
+                    return None
+                self.error(f"Unexpected token: {token.lexeme}")
+            value = handler(self)
+
+            # hand the finished operand to the innermost waiting operator,
+            # folding every operator that is now complete
+            while pending:
+                operator, operands = pending[-1]
+                operands.append(value)
+                if not self.operator_complete(operator, operands):
+                    break
+                pending.pop()
+                value = self.build_operation(operator, operands)
+            else:
+                return value
+
+    def operator_complete(self, operator, operands):
+        # called after each operand; consumes the AN separator when more follow
+        kind = operator.kind
+        if operator.lexeme in VARIADIC_OPERATORS:
+            # AN before each further operand, ended by MKAY or anything else
+            if self.current_token and self.current_token.kind == TokenKind.SEPARATOR:
+                self.advance()  # consume AN
+                return False
+            if self.current_token and self.current_token.kind == TokenKind.ARGUMENT_END:
+                self.advance()  # consume MKAY
+            return True
+        if kind in BINARY_OPERATORS:
+            if len(operands) == 2:
+                return True
+            # Expect AN
+            if self.current_token and self.current_token.kind == TokenKind.SEPARATOR:
+                self.advance()  # consume AN
+            return False
+        if kind == TokenKind.STRING_CONCATENATION:
+            # if theres more than one AN then parse those
+            if self.current_token and self.current_token.kind == TokenKind.SEPARATOR:
+                self.advance()  # consume AN
+                return False
+            return True
+        # NOT and MAEK take a single operand
+        return True
+
+    def build_operation(self, operator, operands):
+        node_class = OPERATOR_NODE_TYPES[operator.kind]
+        if node_class is ast.UnaryOperation:
+            return ast.UnaryOperation(operator.lexeme, operands[0])
+        if node_class is ast.Smoosh:
+            return ast.Smoosh(operands)
+        if node_class is ast.TypecastMaek:
+            return ast.TypecastMaek(operands[0], self.parse_cast_type())
+        if operator.lexeme in VARIADIC_OPERATORS:
+            return ast.VariadicLogicalOperation(operator.lexeme, operands)
+        return node_class(operator.lexeme, operands[0], operands[1])
+
+    def parse_cast_type(self):
+        """MAEK <expr> [A] <literal>"""
+        # A is optional
+        if self.current_token and self.current_token.kind == TokenKind.EXPLICIT_CASTING:
             self.advance()
-            return {
-                'type': 'identifier',
-                'name': identifier['pattern']
-            }
-        
-        # parentheses
-        elif self.current_token['pattern'] == "(":
-            self.advance()  # consume (
-            expr = self.parse_expression()
-            self.error_handle(")", ")")
-            return expr
-        
-        # unary NOT
-        elif self.current_token['pattern'] == "NOT":
+
+        # Handle Type Literal
+        if self.current_token and self.current_token.kind == TokenKind.TYPE_LITERAL:
+            type_literal = self.current_token
             self.advance()
-            operand = self.parse_factor()
-            return {
-                'type': 'unary_operation',
-                'operator': 'NOT',
-                'operand': operand
-            }
-        
-        # Handle type casting (added)
-        elif self.current_token['pattern'] == "MAEK":
-            return self.parse_typecast_maek()
-
-        elif self.current_token['pattern'] in ["R", "IS NOW A", "VISIBLE", "GIMMEH", "I HAS A", 
-                                          "O RLY?", "MEBBE", "NO WAI", "OIC", "IM IN YR", 
-                                          "IM OUTTA YR", "KTHXBYE", "BUHBYE", "AN"]:
-            return None
+        else:
+            self.error("Expected type literal after A")
+        return type_literal.lexeme
 
+    def parse_literal(self):
+        # WIN/FAIL, strings, integers and floats
+        value = self.current_token
+        self.advance()
+        # convert once here so evaluating a literal is just reading it back
+        text = value.lexeme
+        kind = value.kind
+        if kind == TokenKind.INTEGER_LITERAL:
+            converted = int(text)
+        elif kind == TokenKind.FLOAT_LITERAL:
+            converted = float(text)
+        elif kind == TokenKind.BOOLEAN_LITERAL:
+            converted = text == 'WIN'
         else:
-            self.error(f"Unexpected token: {self.current_token['pattern']}")
-
-    def parse_arithmetic_operation(self):
-        operator = self.current_token['pattern']
-        self.advance()  # consume operator
-        
-        # Parse first operand
-        operand1 = self.parse_expression()
-        if operand1 is None:
-            self.error(f"Expected expression after {operator}")
-        
-        # Expect AN
-        if self.current_token and self.current_token['pattern'] == "AN":
-            self.advance()  # consume AN
-        
-        # Parse second operand
-        operand2 = self.parse_expression()
-        if operand2 is None:  
-            self.error(f"Expected expression after AN in {operator}")
-        
-        return {
-            'type': 'arithmetic_operation',
-            'operator': operator,
-            'left': operand1,
-            'right': operand2
-        }
-    
-    def parse_comparison_operation(self):
-        operator = self.current_token['pattern']
-        self.advance()  # consume operator
-        
-        # Parse first operand
-        operand1 = self.parse_expression()
-        if operand1 is None:  
-            self.error(f"Expected expression after {operator}")
-        
-        # Expect AN
-        if self.current_token and self.current_token['pattern'] == "AN":
-            self.advance()  # consume AN
-        
-        # Parse second operand
-        operand2 = self.parse_expression()
-        if operand2 is None: 
-            self.error(f"Expected expression after AN in {operator}")
-
-        
-        return {
-            'type': 'comparison_operation',
-            'operator': operator,
-            'left': operand1,
-            'right': operand2
-        }
-    
-    def parse_conditional_statement(self):
+            # Remove the quotes
+            converted = text[1:-1]
+        return ast.Literal(value.name, text, converted)
+
+    def parse_type_literal(self):
+        value = self.current_token
+        self.advance()
+        return ast.TypeLiteral(value.lexeme)
+
+    def parse_identifier(self):
+        identifier = self.current_token
+        self.advance()
+        return ast.Identifier(identifier.lexeme)
+
+    def parse_conditional_statement(self, condition):
         """<conditional> ::= <expr> <linebreak> O RLY? <linebreak> <if> <linebreak> OIC"""        
-        # Parse expressio
-        condition = self.parse_expression()
+        # condition was already parsed by parse_expression_statement
         
         # Expect O RLY?
-        self.error_handle("If Keyword", "O RLY?")
+        self.error_handle(TokenKind.IF_KEYWORD, "O RLY?")
         
         # Parse if block
-        if_block = self.parse_if_block()
+        then_block, elseif_blocks, else_block = self.parse_if_block()
         
         # Expect OIC
-        self.error_handle("If-Then-Else End", "OIC")
+        self.error_handle(TokenKind.IF_END, "OIC")
         
-        return {
-            'type': 'conditional_statement',
-            'condition': condition,
-            'if_block': if_block
-        }
+        return ast.ConditionalStatement(condition, then_block, elseif_blocks, else_block)
 
     def parse_if_block(self):
         """
@@ -428,26 +329,21 @@ class Parser:
         | YA RLY <linebreak> <statement_block> <linebreak> <else_if>
         | YA RLY <linebreak> <statement_block> <linebreak> <else>
         """
-        self.error_handle("Then Keyword", "YA RLY")
+        self.error_handle(TokenKind.THEN_KEYWORD, "YA RLY")
         
         # Parse YA RLY
         then_block = self.parse_statement_block()
         
         # Check for other statements
-        elseif_block = []
+        elseif_blocks = []
         else_block = None
         
-        if self.current_token and self.current_token['pattern'] == "MEBBE":
-            elseif_block = self.parse_elseif_block()
-        elif self.current_token and self.current_token['pattern'] == "NO WAI":
+        if self.current_token and self.current_token.lexeme == "MEBBE":
+            elseif_blocks = self.parse_elseif_block()
+        if self.current_token and self.current_token.lexeme == "NO WAI":
             else_block = self.parse_else()
         
-        return {
-            'type': 'if_block',
-            'then_block': then_block,
-            'elseif_block': elseif_block,
-            'else_block': else_block
-        }
+        return then_block, elseif_blocks, else_block
 
     def parse_elseif_block(self):
         """
@@ -458,7 +354,7 @@ class Parser:
         """
         elseif_block = []
         
-        while self.current_token and self.current_token['pattern'] == "MEBBE":
+        while self.current_token and self.current_token.lexeme == "MEBBE":
             self.advance()  # consume MEBBE
             
             # Parse condition
@@ -467,29 +363,16 @@ class Parser:
             # Parse statement block
             statements = self.parse_statement_block()
             
-            elseif_block.append({
-                'type': 'elseif_block',
-                'condition': condition,
-                'statements': statements
-            })
-        
-        # Check for other chains of statments
-        else_block = None
-        if self.current_token and self.current_token['pattern'] == "NO WAI":
-            else_block = self.parse_else()
+            elseif_block.append(ast.ElseIfBlock(condition, statements))
         
+        # a trailing NO WAI is picked up by parse_if_block
         return elseif_block
 
     def parse_else(self):
         """<else> ::= NO WAI <linebreak> <statement_block>"""
-        self.error_handle("Else Keyword", "NO WAI")
+        self.error_handle(TokenKind.ELSE_KEYWORD, "NO WAI")
         
-        statements = self.parse_statement_block()
-        
-        return {
-            'type': 'else_block',
-            'statements': statements
-        }
+        return self.parse_statement_block()
 
     def parse_statement_block(self):
         """
@@ -500,9 +383,9 @@ class Parser:
         statements = []
         start_index = self.token_index
         
-        while self.current_token and self.current_token['pattern'] != "KTHXBYE":
+        while self.current_token and self.current_token.lexeme != "KTHXBYE":
             # Check end keywords
-            if self.current_token['pattern'] in ["MEBBE", "NO WAI", "OIC", "IM OUTTA YR"]:
+            if self.current_token.lexeme in BLOCK_END:
                 break
                 
             # Parse statement
@@ -516,44 +399,130 @@ class Parser:
     
     def parse_input_statement(self):
         """GIMMEH identifier"""
-        self.error_handle("Input Keyword", "GIMMEH")
+        self.error_handle(TokenKind.INPUT_KEYWORD, "GIMMEH")
         
-        identifier = self.error_handle("Variable Identifier")
+        identifier = self.error_handle(TokenKind.IDENTIFIER)
         
-        return {
-            'type': 'input_statement',
-            'identifier': identifier['pattern']
-        }
+        return ast.InputStatement(identifier.lexeme)
     
     def parse_loop_statement(self):
         """<loop> ::= IM IN YR loopident <loop_condition> <linebreak> <statement_block> IM OUTTA YR loopident
                     | IM IN YR loopident <linebreak> <statement_block> IM OUTTA YR loopident"""        
         # Expect IM IN YR
-        self.error_handle("Start Loop Label", "IM IN YR")
+        self.error_handle(TokenKind.LOOP_START, "IM IN YR")
         
         # Parse loop identifier
-        start_loop_ident = self.error_handle("Variable Identifier")
+        start_loop_ident = self.error_handle(TokenKind.IDENTIFIER)
         
         # Check for loop condition
         loop_condition = None
-        if self.current_token and self.current_token['pattern'] in ["UPPIN YR", "NERFIN YR"]:
+        if self.current_token and self.current_token.kind in LOOP_OPERATIONS:
             loop_condition = self.parse_loop_condition()
         
         # Parse statement block
         statements = self.parse_statement_block()
         
         # Expect IM OUTTA YR
-        self.error_handle("End Loop Label", "IM OUTTA YR")
+        self.error_handle(TokenKind.LOOP_END, "IM OUTTA YR")
         
         # Parse loop identifier (IM IN YR loop and IM OUTTA YR loop)
-        end_loop_ident = self.error_handle("Variable Identifier")
-        
-        return {
-            'type': 'loop_statement',
-            'loop_identifier': start_loop_ident['pattern'],
-            'loop_condition': loop_condition,
-            'statements': statements
-        }
+        end_loop_ident = self.error_handle(TokenKind.IDENTIFIER)
+        
+        return ast.LoopStatement(start_loop_ident.lexeme, loop_condition, statements)
+
+    def parse_switch_statement(self, subject=None):
+        """<switch> ::= <expr> <linebreak> WTF? <linebreak> <case>+ [<default>] OIC
+                    | WTF? <linebreak> <case>+ [<default>] OIC
+        <case> ::= OMG <literal> <linebreak> <statement_block>
+        <default> ::= OMGWTF <linebreak> <statement_block>"""
+        # subject was already parsed by parse_expression_statement, if any
+        self.error_handle(TokenKind.SWITCH, "WTF?")
+
+        cases = []
+        while self.current_token and self.current_token.kind == TokenKind.CASE:
+            self.advance()  # consume OMG
+            if not self.current_token or self.current_token.kind not in CASE_LITERALS:
+                self.error("Expected literal after OMG")
+            value = self.parse_literal()
+            cases.append(ast.SwitchCase(value, self.parse_statement_block()))
+        if not cases:
+            self.error("Expected OMG after WTF?")
+
+        default_block = None
+        if self.current_token and self.current_token.kind == TokenKind.DEFAULT_CASE:
+            self.advance()  # consume OMGWTF
+            default_block = self.parse_statement_block()
+
+        self.error_handle(TokenKind.IF_END, "OIC")
+        return ast.SwitchStatement(subject, cases, default_block)
+
+    def parse_function_definition(self):
+        """<function> ::= HOW IZ I funcident [YR varident (AN YR varident)*] <linebreak>
+                        <statement_block> IF U SAY SO"""
+        self.error_handle(TokenKind.FUNCTION_START, "HOW IZ I")
+        name = self.error_handle(TokenKind.IDENTIFIER)
+
+        parameters = []
+        if self.current_token and self.current_token.kind == TokenKind.PARAMETER:
+            self.advance()  # consume YR
+            parameters.append(self.error_handle(TokenKind.IDENTIFIER).lexeme)
+            while self.at_next_argument():
+                self.advance()  # consume AN
+                self.advance()  # consume YR
+                parameter = self.error_handle(TokenKind.IDENTIFIER).lexeme
+                if parameter in parameters:
+                    self.error(f"Duplicate parameter {parameter} in {name.lexeme}")
+                parameters.append(parameter)
+
+        self.function_depth += 1
+        statements = self.parse_statement_block()
+        self.function_depth -= 1
+
+        self.error_handle(TokenKind.FUNCTION_END)
+        return ast.FunctionDefinition(name.lexeme, parameters, statements)
+
+    def parse_return_statement(self):
+        """<return> ::= FOUND YR <expr>"""
+        if not self.function_depth:
+            self.error("FOUND YR outside of a function")
+        self.error_handle(TokenKind.RETURN, "FOUND YR")
+        value = self.parse_expression()
+        if value is None:
+            self.error("Expected expression after FOUND YR")
+        return ast.ReturnStatement(value)
+
+    def parse_function_call(self):
+        """<function_call> ::= I IZ funcident [YR <expr> (AN YR <expr>)*] MKAY"""
+        self.error_handle(TokenKind.FUNCTION_CALL, "I IZ")
+        name = self.error_handle(TokenKind.IDENTIFIER)
+
+        arguments = []
+        if self.current_token and self.current_token.kind == TokenKind.PARAMETER:
+            self.advance()  # consume YR
+            arguments.append(self.parse_argument())
+            while self.at_next_argument():
+                self.advance()  # consume AN
+                self.advance()  # consume YR
+                arguments.append(self.parse_argument())
+
+        self.error_handle(TokenKind.ARGUMENT_END, "MKAY")
+        return ast.FunctionCall(name.lexeme, arguments)
+
+    def parse_argument(self):
+        argument = self.parse_expression()
+        if argument is None:
+            self.error("Expected expression after YR")
+        return argument
+
+    def at_next_argument(self):
+        # AN YR before each further parameter or argument
+        return (self.current_token and self.current_token.kind == TokenKind.SEPARATOR and
+                self.next_token and self.next_token.kind == TokenKind.PARAMETER)
+
+    def parse_break_statement(self):
+        """<break> ::= GTFO"""
+        self.error_handle(TokenKind.BREAK, "GTFO")
+        return ast.BreakStatement()
 
     def parse_loop_condition(self):
         """<loop_condition> ::= UPPIN YR varident TIL <expr>
@@ -565,253 +534,341 @@ class Parser:
         self.advance()  # consume UPPIN/NERFIN
         
         # Parse variable identifier
-        var_ident = self.error_handle("Variable Identifier")
+        var_ident = self.error_handle(TokenKind.IDENTIFIER)
         
-        # Parse loop condition (TIL/WILE)
-        if self.current_token and (self.current_token['pattern'] == "TIL" or 
-        self.current_token['pattern'] == "WILE"):
-            loop_condition = self.current_token['pattern']
+        # Parse loop condition (TIL/WILE), without one the loop runs until GTFO
+        loop_condition = None
+        condition = None
+        if self.current_token and (self.current_token.lexeme == "TIL" or 
+        self.current_token.lexeme == "WILE"):
+            loop_condition = self.current_token.lexeme
             self.advance()  # consume TI/WILE
         
-        # Parse condition
-        condition = self.parse_expression()
+            # Parse condition
+            condition = self.parse_expression()
         
-        return {
-            'type': 'loop_condition',
-            'loop_operation': loop_operation['pattern'],  # UPPIN/NERFIN YR
-            'variable': var_ident['pattern'],
-            'loop_condition': loop_condition,  # TIL/WILE
-            'condition': condition
-        }
+        return ast.LoopCondition(
+            loop_operation.lexeme,  # UPPIN/NERFIN YR
+            var_ident.lexeme,
+            loop_condition,  # TIL/WILE
+            condition
+        )
     
 
     def parse_variable_assignment(self):
         """identifier R expression"""
 
-        identifier = self.current_token['pattern']
+        identifier = self.current_token.lexeme
         self.advance()  # consume identifier
 
-        self.error_handle("Variable Assignment")  # consume R
+        self.error_handle(TokenKind.VARIABLE_ASSIGNMENT)  # consume R
 
         value = self.parse_expression()
 
-        return {
-            'type': 'variable_assignment',
-            'identifier': identifier,
-            'value': value
-        }
+        return ast.VariableAssignment(identifier, value)
     
-    def parse_smoosh(self):
-        """SMOOSH expression (AN expression)*"""
-        self.advance()  # consume SMOOSH
-        parts = []
-
-        # Parse first expression
-        parts.append(self.parse_expression())
-
-        # if theres more than one AN then parse those
-        while self.current_token and self.current_token['pattern'] == "AN":
-            self.advance()  # consume AN
-            parts.append(self.parse_expression())
-
-        return {
-            'type': 'smoosh',
-            'parts': parts
-        }
-
     def parse_typecast_isnow(self):
         """varident IS NOW A <literal>"""
-        varident = self.current_token['pattern']
+        varident = self.current_token.lexeme
         self.advance()  # consume identifier
 
-        self.error_handle("Recast Variable", "IS NOW A")  # consumes IS NOW A
+        self.error_handle(TokenKind.RECAST_VARIABLE, "IS NOW A")  # consumes IS NOW A
 
         # Handle Type Literal
-        if self.current_token['pattern'] in ["NOOB", "NUMBR", "NUMBAR", "YARN", "TROOF"]:
+        if self.current_token and self.current_token.kind == TokenKind.TYPE_LITERAL:
             type_literal = self.current_token
             self.advance() 
         else:
             self.error("Expected type literal after IS NOW A")
 
-        return {
-            'type': 'typecast_isnow',
-            'identifier': varident,
-            'convert_to_type': type_literal['pattern']
-        }
-
-    def parse_typecast_maek(self):
-        """MAEK <expr> A <literal>"""
-        self.advance()  # consume MAEK
-
-        expr = self.parse_expression()
-
-        # Expect A
-        self.error_handle("Explicit Casting", "A")
-
-        # Handle Type Literal
-        if self.current_token['pattern'] in ["NOOB", "NUMBR", "NUMBAR", "YARN", "TROOF"]:
-            type_literal = self.current_token
-            self.advance()
-        else:
-            self.error("Expected type literal after A")
-
-        return {
-            'type': 'typecast_maek',
-            'expression': expr,
-            'convert_to_type': type_literal['pattern']
-        }
-
-def parse(filename):
+        return ast.TypecastIsNow(varident, type_literal.lexeme)
+
+# DISPATCH TABLES ===========================================================
+# built once at import; the parser looks handlers up by token kind
+
+STATEMENT_HANDLERS = {
+    TokenKind.VARIABLE_DECLARATION: Parser.parse_variable_declaration,
+    TokenKind.OUTPUT_KEYWORD: Parser.parse_output_statement,
+    TokenKind.INPUT_KEYWORD: Parser.parse_input_statement,
+    TokenKind.LOOP_START: Parser.parse_loop_statement,
+    TokenKind.BREAK: Parser.parse_break_statement,
+    TokenKind.SWITCH: Parser.parse_switch_statement,
+    TokenKind.FUNCTION_START: Parser.parse_function_definition,
+    TokenKind.RETURN: Parser.parse_return_statement,
+}
+# token kinds allowed as an OMG value
+CASE_LITERALS = frozenset({
+    TokenKind.BOOLEAN_LITERAL, TokenKind.STRING_LITERAL, TokenKind.INTEGER_LITERAL,
+    TokenKind.FLOAT_LITERAL,
+})
+
+# operand tokens -> parser method building the leaf node
+OPERAND_HANDLERS = {
+    TokenKind.BOOLEAN_LITERAL: Parser.parse_literal,
+    TokenKind.STRING_LITERAL: Parser.parse_literal,
+    TokenKind.INTEGER_LITERAL: Parser.parse_literal,
+    TokenKind.FLOAT_LITERAL: Parser.parse_literal,
+    TokenKind.TYPE_LITERAL: Parser.parse_type_literal,
+    TokenKind.IDENTIFIER: Parser.parse_identifier,
+    TokenKind.FUNCTION_CALL: Parser.parse_function_call,
+}
+
+# prefix operator tokens -> AST node class they build
+OPERATOR_NODE_TYPES = {
+    TokenKind.ARITHMETIC_OPERATOR: ast.ArithmeticOperation,
+    TokenKind.COMPARISON_OPERATOR: ast.ComparisonOperation,
+    TokenKind.LOGICAL_OPERATOR: ast.LogicalOperation,
+    TokenKind.UNARY_OPERATOR: ast.UnaryOperation,
+    TokenKind.STRING_CONCATENATION: ast.Smoosh,
+    TokenKind.TYPE_CASTING: ast.TypecastMaek,
+}
+BINARY_OPERATORS = frozenset({
+    TokenKind.ARITHMETIC_OPERATOR, TokenKind.COMPARISON_OPERATOR, TokenKind.LOGICAL_OPERATOR,
+})
+# logical operators taking any number of operands
+VARIADIC_OPERATORS = frozenset({"ANY OF", "ALL OF"})
+
+# token kinds that can start an expression statement
+EXPRESSION_START = frozenset({
+    TokenKind.IDENTIFIER, TokenKind.STRING_LITERAL, TokenKind.INTEGER_LITERAL,
+    TokenKind.FLOAT_LITERAL, TokenKind.BOOLEAN_LITERAL, TokenKind.ARITHMETIC_OPERATOR,
+    TokenKind.COMPARISON_OPERATOR, TokenKind.LOGICAL_OPERATOR, TokenKind.STRING_CONCATENATION,
+    TokenKind.TYPE_CASTING, TokenKind.UNARY_OPERATOR, TokenKind.FUNCTION_CALL,
+})
+
+LOOP_OPERATIONS = frozenset({TokenKind.INCREMENT, TokenKind.DECREMENT})
+
+# keywords that end a statement block / the whole program
+BLOCK_END = frozenset({"MEBBE", "NO WAI", "OIC", "IM OUTTA YR", "OMG", "OMGWTF",
+                       "IF U SAY SO", "IF YOU SAY SO"})
+STATEMENT_END = BLOCK_END | {"KTHXBYE"}
+# keywords that end a VISIBLE argument list
+OUTPUT_END = frozenset({"KTHXBYE", "VISIBLE", "GIMMEH", "I HAS A", "O RLY?", "MEBBE",
+                        "NO WAI", "OIC", "IM OUTTA YR", "IM IN YR", "GTFO", "WTF?", "OMG",
+                        "OMGWTF", "AN", "!", "HOW IZ I", "IF U SAY SO", "IF YOU SAY SO",
+                        "FOUND YR"})
+# keywords where an operand can't start
+EXPRESSION_END = frozenset({"R", "IS NOW A", "VISIBLE", "GIMMEH", "I HAS A", "O RLY?", "MEBBE",
+                            "NO WAI", "OIC", "IM IN YR", "IM OUTTA YR", "KTHXBYE", "BUHBYE", "WTF?",
+                            "OMG", "OMGWTF", "AN", "MKAY", "!", "YR", "HOW IZ I", "IF U SAY SO",
+                            "IF YOU SAY SO", "FOUND YR"})
+
+
+def parse_tokens(tokens, diagnostics=None):
+    # parse an already tokenized program (list or iterator of tokens)
+    # raises SyntaxError, unlike parse() which reports and returns None
+    parser = Parser(tokens, diagnostics)
+    return parser.parse_program()
+
+def parse(filename, diagnostics=None):
     # main function for parsing
+    diagnostics = diagnostics or SILENT_DIAGNOSTICS
     try:
-        tokens = tokenizer(filename)
-        print(f"Tokenization complete. Found {len(tokens)} tokens.")
+        tokens = tokenizer(filename, diagnostics)
+        diagnostics.info('tokenize_done', f"Tokenization complete. Found {len(tokens)} tokens.")
         
         # Debug: print all tokens
-        print("\nTokens found:")
-        for i, token in enumerate(tokens):
-            print(f"{i+1:3}: {token['token_name']:25} '{token['pattern']}'")
+        if diagnostics.enabled(TRACE):
+            diagnostics.trace('token_list', "\nTokens found:")
+            for i, token in enumerate(tokens):
+                diagnostics.trace('token', f"{i+1:3}: {token.name:25} '{token.lexeme}'")
         
-        parser = Parser(tokens)
-        ast = parser.parse_program()
-        
-        return ast
+        return parse_tokens(tokens, diagnostics)
         
     except Exception as e:
-        print(f"Parsing error: {e}")
-        import traceback
-        traceback.print_exc()
+        diagnostics.error('parse_error', f"Parsing error: {e}")
+        diagnostics.exception('parse_error', e)
         return None
 
-def print_ast(node, indent=0):
-    # print AST
-    if not node:
-        return
-    
-    prefix = "  " * indent
-    
-    if isinstance(node, list):
-        for item in node:
-            print_ast(item, indent)
-        return
-    
-    node_type = node.get('type')
-    
-    if node_type == 'program':
-        print(f"{prefix}Program:")
-        for stmt in node['statements']:
-            print_ast(stmt, indent + 1)
-    
-    elif node_type == 'variable_block':
-        print(f"{prefix}Variable Block:")
-        for decl in node['declarations']:
-            print_ast(decl, indent + 1)
-    
-    elif node_type == 'variable_declaration':
-        if node['initial_value']:
-            print(f"{prefix}Variable Declaration: {node['identifier']} =")
-            print_ast(node['initial_value'], indent + 1)
+class AstPrinter(ast.NodeVisitor):
+    # prints the AST as an indented outline
+    def __init__(self, indent=0):
+        super().__init__()
+        self.indent = indent
+
+    def print(self, node, indent):
+        # print a child node at the given depth
+        if not node:
+            return
+        if isinstance(node, list):
+            for item in node:
+                self.print(item, indent)
+            return
+        saved = self.indent
+        self.indent = indent
+        self.visit(node)
+        self.indent = saved
+
+    @property
+    def prefix(self):
+        return "  " * self.indent
+
+    def generic_visit(self, node):
+        print(f"{self.prefix}Unknown node: {node}")
+
+    def visit_program(self, node):
+        print(f"{self.prefix}Program:")
+        self.print(node.statements, self.indent + 1)
+
+    def visit_variable_block(self, node):
+        print(f"{self.prefix}Variable Block:")
+        self.print(node.declarations, self.indent + 1)
+
+    def visit_variable_declaration(self, node):
+        if node.initial_value:
+            print(f"{self.prefix}Variable Declaration: {node.identifier} =")
+            self.print(node.initial_value, self.indent + 1)
         else:
-            print(f"{prefix}Variable Declaration: {node['identifier']}")
-    
-    elif node_type == 'output_statement':
-        print(f"{prefix}Output Statement:")
-        for expr in node['expressions']:
-            print_ast(expr, indent + 1)
-    
-    elif node_type == 'literal':
-        print(f"{prefix}Literal ({node['value_type']}): {node['value']}")
-    
-    elif node_type == 'identifier':
-        print(f"{prefix}Identifier: {node['name']}")
-    
-    elif node_type == 'type_literal':
-        print(f"{prefix}Type Literal: {node['value']}")
-    
-    elif node_type == 'arithmetic_operation':
-        print(f"{prefix}Arithmetic Operation: {node['operator']}")
-        print_ast(node['left'], indent + 1)
-        print_ast(node['right'], indent + 1)
-    
-    elif node_type == 'comparison_operation':
-        print(f"{prefix}Comparison Operation: {node['operator']}")
-        print_ast(node['left'], indent + 1)
-        print_ast(node['right'], indent + 1)
-    
-    elif node_type == 'logical_operation':
-        print(f"{prefix}Logical Operation: {node['operator']}")
-        print_ast(node['left'], indent + 1)
-        print_ast(node['right'], indent + 1)
+            print(f"{self.prefix}Variable Declaration: {node.identifier}")
+
+    def visit_output_statement(self, node):
+        print(f"{self.prefix}Output Statement:" if node.newline else f"{self.prefix}Output Statement (no newline):")
+        self.print(node.expressions, self.indent + 1)
+
+    def visit_literal(self, node):
+        print(f"{self.prefix}Literal ({node.value_type}): {node.text}")
+
+    def visit_identifier(self, node):
+        print(f"{self.prefix}Identifier: {node.name}")
+
+    def visit_type_literal(self, node):
+        print(f"{self.prefix}Type Literal: {node.value}")
+
+    def visit_arithmetic_operation(self, node):
+        print(f"{self.prefix}Arithmetic Operation: {node.operator}")
+        self.print(node.left, self.indent + 1)
+        self.print(node.right, self.indent + 1)
 
-    elif node_type == 'conditional_statement':
+    def visit_comparison_operation(self, node):
+        print(f"{self.prefix}Comparison Operation: {node.operator}")
+        self.print(node.left, self.indent + 1)
+        self.print(node.right, self.indent + 1)
+
+    def visit_unary_operation(self, node):
+        print(f"{self.prefix}Unary Operation: {node.operator}")
+        self.print(node.operand, self.indent + 1)
+
+    def visit_logical_operation(self, node):
+        print(f"{self.prefix}Logical Operation: {node.operator}")
+        self.print(node.left, self.indent + 1)
+        self.print(node.right, self.indent + 1)
+
+    def visit_variadic_logical_operation(self, node):
+        print(f"{self.prefix}Logical Operation: {node.operator} ... MKAY")
+        self.print(node.operands, self.indent + 1)
+
+    def visit_conditional_statement(self, node):
+        prefix = self.prefix
         print(f"{prefix}Conditional Statement:")
         print(f"{prefix}  Expression/Condition:")
-        print_ast(node['condition'], indent + 2)
-        print_ast(node['if_block'], indent + 1)
-    
-    elif node_type == 'if_block':
-        print(f"{prefix}If Structure:")
-        print(f"{prefix}  Then Block (YA RLY):")
-        for stmt in node['then_block']:
-            print_ast(stmt, indent + 3)
-        
-        for else_if in node['elseif_block']:
-            print(f"{prefix}  Else-If Block (MEBBE):")
-            print(f"{prefix}    Condition:")
-            print_ast(else_if['condition'], indent + 4)
-            for stmt in else_if['statements']:
-                print_ast(stmt, indent + 4)
-        
-        if node['else_block']:
-            print(f"{prefix}  Else Block (NO WAI):")
-            for stmt in node['else_block']['statements']:
-                print_ast(stmt, indent + 3)
-    
-    elif node_type == 'input_statement':
-        print(f"{prefix}Input Statement: {node['identifier']}")
-
-    elif node_type == 'loop_statement':
+        self.print(node.condition, self.indent + 2)
+        print(f"{prefix}  If Structure:")
+        print(f"{prefix}    Then Block (YA RLY):")
+        self.print(node.then_block, self.indent + 4)
+
+        for else_if in node.elseif_blocks:
+            print(f"{prefix}    Else-If Block (MEBBE):")
+            print(f"{prefix}      Condition:")
+            self.print(else_if.condition, self.indent + 5)
+            self.print(else_if.statements, self.indent + 5)
+
+        if node.else_block is not None:
+            print(f"{prefix}    Else Block (NO WAI):")
+            self.print(node.else_block, self.indent + 4)
+
+    def visit_expression_statement(self, node):
+        print(f"{self.prefix}Expression Statement:")
+        self.print(node.expression, self.indent + 1)
+
+    def visit_input_statement(self, node):
+        print(f"{self.prefix}Input Statement: {node.identifier}")
+
+    def visit_loop_statement(self, node):
+        prefix = self.prefix
         print(f"{prefix}Loop Statement:")
-        print(f"{prefix}  Identifier: {node['loop_identifier']}")
-        if node['loop_condition']:
-            print_ast(node['loop_condition'], indent + 1)
+        print(f"{prefix}  Identifier: {node.loop_identifier}")
+        if node.loop_condition:
+            self.print(node.loop_condition, self.indent + 1)
         print(f"{prefix}  Statements:")
-        for stmt in node['statements']:
-            print_ast(stmt, indent + 2)
+        self.print(node.statements, self.indent + 2)
 
-    elif node_type == 'loop_condition':
+    def visit_loop_condition(self, node):
+        prefix = self.prefix
         print(f"{prefix}Loop Condition:")
-        print(f"{prefix}  Loop Operation: {node['loop_operation']}")
-        print(f"{prefix}  Variable: {node['variable']}")
-        print(f"{prefix}  Loop Condition: {node['loop_condition']}")
+        print(f"{prefix}  Loop Operation: {node.loop_operation}")
+        print(f"{prefix}  Variable: {node.variable}")
+        print(f"{prefix}  Loop Condition: {node.loop_condition}")
         print(f"{prefix}  Condition:")
-        print_ast(node['condition'], indent + 2)
+        self.print(node.condition, self.indent + 2)
+
+    def visit_switch_statement(self, node):
+        prefix = self.prefix
+        print(f"{prefix}Switch Statement (WTF?):")
+        print(f"{prefix}  Subject:")
+        if node.subject:
+            self.print(node.subject, self.indent + 2)
+        else:
+            print(f"{prefix}    IT")
+        self.print(node.cases, self.indent + 1)
+        if node.default_block is not None:
+            print(f"{prefix}  Default (OMGWTF):")
+            self.print(node.default_block, self.indent + 2)
+
+    def visit_switch_case(self, node):
+        print(f"{self.prefix}Case (OMG) {node.value.text}:")
+        self.print(node.statements, self.indent + 1)
+
+    def visit_break_statement(self, node):
+        print(f"{self.prefix}Break Statement (GTFO)")
+
+    def visit_function_definition(self, node):
+        prefix = self.prefix
+        print(f"{prefix}Function Definition (HOW IZ I): {node.name}")
+        print(f"{prefix}  Parameters: {', '.join(node.parameters) or 'none'}")
+        print(f"{prefix}  Statements:")
+        self.print(node.statements, self.indent + 2)
+
+    def visit_return_statement(self, node):
+        print(f"{self.prefix}Return Statement (FOUND YR):")
+        self.print(node.value, self.indent + 1)
+
+    def visit_function_call(self, node):
+        print(f"{self.prefix}Function Call (I IZ): {node.name}")
+        self.print(node.arguments, self.indent + 1)
 
     #added
-    elif node_type == 'variable_assignment':
-        print(f"{prefix}Assignment (=):")
-        print(f"{prefix}  Variable: {node['identifier']}")
-        print(f"{prefix}  Value:")
-        print_ast(node['value'], indent + 2)
-    
-    elif node_type == 'smoosh':
-        print(f"{prefix}String Concatenation (SMOOSH):")
-        for part in node['parts']:
-            print_ast(part, indent + 1)
-
-    elif node_type == 'typecast_isnow':
-        print(f"{prefix}Typecast (IS NOW A):")
-        print(f"{prefix}  Variable: {node['identifier']}")
-        print(f"{prefix}  Convert To: {node['convert_to_type']}")  
-
-    elif node_type == 'typecast_maek':
-        print(f"{prefix}Type Cast (MAEK):")
-        print(f"{prefix}  Expression:")
-        print_ast(node['expression'], indent + 2)
-        print(f"{prefix}  Convert To: {node['convert_to_type']}")
+    def visit_variable_assignment(self, node):
+        print(f"{self.prefix}Assignment (=):")
+        print(f"{self.prefix}  Variable: {node.identifier}")
+        print(f"{self.prefix}  Value:")
+        self.print(node.value, self.indent + 2)
 
-    else:
-        print(f"{prefix}Unknown node: {node}")
+    def visit_smoosh(self, node):
+        print(f"{self.prefix}String Concatenation (SMOOSH):")
+        self.print(node.parts, self.indent + 1)
+
+    def visit_typecast_isnow(self, node):
+        print(f"{self.prefix}Typecast (IS NOW A):")
+        print(f"{self.prefix}  Variable: {node.identifier}")
+        print(f"{self.prefix}  Convert To: {node.convert_to_type}")
+
+    def visit_typecast_maek(self, node):
+        print(f"{self.prefix}Type Cast (MAEK):")
+        print(f"{self.prefix}  Expression:")
+        self.print(node.expression, self.indent + 2)
+        print(f"{self.prefix}  Convert To: {node.convert_to_type}")
+
+    def visit_hoisted_expression(self, node):
+        print(f"{self.prefix}Hoisted Expression ({node.name}):")
+        self.print(node.expression, self.indent + 1)
+
+    def visit_reset_hoisted(self, node):
+        print(f"{self.prefix}Reset Hoisted: {', '.join(node.names)}")
+
+
+def print_ast(node, indent=0):
+    # print AST
+    AstPrinter().print(node, indent)
 
 if __name__ == "__main__":
     filename = "smoosh_assign.lol"
@@ -820,7 +877,7 @@ if __name__ == "__main__":
     print(f"PARSING: {filename}")
     print("=" * 60)
     
-    ast = parse(filename)
+    ast = parse(filename, verbose())
     if ast:
         print("\nABSTRACT SYNTAX TREE:")
         print_ast(ast)
@@ -0,0 +1,422 @@
+"""Semantic analysis: the types a program's values can have, before it runs.
+
+infer_types(program) follows the program in execution order and works out
+which of the LOLCODE types NUMBR, NUMBAR, YARN, TROOF and NOOB every
+variable can hold at every point, and every expression can evaluate to:
+from literals, declarations (NOOB without ITZ), assignments, MAEK and IS
+NOW A, and what each operator gives for its operand types. GIMMEH and
+function calls can give anything. Where paths meet, after O RLY?, WTF? and
+loops (whose bodies are followed until the types stop changing), the
+possibilities are joined, so a type is only known when it holds on every
+path. Function bodies are followed on their own frame, parameters unknown.
+
+The result annotates the tree: types.of(node) is the one type an expression
+always has, or None. The backends use it to leave out conversions that
+can't change anything, e.g. to_number on operands that are numbers already.
+
+It also lists the definite errors, operations that fail whenever they run:
+reading a variable no path has assigned yet, dividing by NOOB or a literal
+0, casting to an unknown type, calling a function the program never defines
+or with the wrong number of arguments. They are reported before the program
+runs, which still runs as written: a branch that is never taken can't fail.
+"""
+from types import GeneratorType
+
+import ast_nodes as ast
+from analysis import walk
+from optimizer import describe, transform
+from values import CASTERS, get_type_name, to_number
+
+NUMBR = "NUMBR"
+NUMBAR = "NUMBAR"
+YARN = "YARN"
+TROOF = "TROOF"
+NOOB = "NOOB"
+# a variable that may not have been assigned yet
+UNDEFINED = "UNDEFINED"
+
+ANY = frozenset((NUMBR, NUMBAR, YARN, TROOF, NOOB))
+NUMBERS = frozenset((NUMBR, NUMBAR))
+NOT_ASSIGNED = frozenset((UNDEFINED,))
+# what to_number makes of a value of each type
+NUMBER_TYPES = {
+    NUMBR: frozenset((NUMBR,)),
+    NUMBAR: frozenset((NUMBAR,)),
+    TROOF: frozenset((NUMBR,)),
+    NOOB: frozenset((NUMBR,)),
+    YARN: NUMBERS,
+}
+DIVISIONS = {"QUOSHUNT OF": "Division by zero", "MOD OF": "Modulo by zero"}
+# operands after the first are only evaluated when they can change the result
+SHORT_CIRCUIT = ("BOTH OF", "EITHER OF", "ANY OF", "ALL OF")
+
+
+class ProgramTypes:
+    """What infer_types found: expression types and the definite errors."""
+
+    def __init__(self):
+        # id(node) -> (node, the types it can have)
+        self.expressions = {}
+        # name -> the types it can have at the end of the program
+        self.variables = {}
+        # messages of the definite errors, in program order
+        self.errors = []
+
+    def possible(self, node):
+        # the types node can evaluate to, None if it was never analyzed
+        entry = self.expressions.get(id(node))
+        if entry is None or entry[0] is not node:
+            return None
+        return entry[1]
+
+    def of(self, node):
+        types = self.possible(node)
+        if types is None or len(types) != 1:
+            return None
+        return next(iter(types))
+
+    def has_type(self, node, type_name):
+        # whether node's value always has type type_name
+        types = self.possible(node)
+        return types is not None and types <= {type_name}
+
+    def is_number(self, node):
+        # whether to_number would leave node's value as it is
+        types = self.possible(node)
+        return types is not None and types <= NUMBERS
+
+
+def describe_types(types):
+    # e.g. "NUMBR", "NUMBR or YARN", for reports
+    names = [name for name in (NUMBR, NUMBAR, YARN, TROOF, NOOB) if name in types]
+    if UNDEFINED in types:
+        names.append("not assigned")
+    return " or ".join(names) or "nothing"
+
+
+def arithmetic_types(operator_name, left, right):
+    if operator_name == "QUOSHUNT OF":
+        # true division, always a NUMBAR
+        return frozenset((NUMBAR,))
+    lefts = frozenset().union(*(NUMBER_TYPES[name] for name in left))
+    rights = frozenset().union(*(NUMBER_TYPES[name] for name in right))
+    if not lefts or not rights:
+        return frozenset()
+    result = set()
+    if NUMBR in lefts and NUMBR in rights:
+        result.add(NUMBR)
+    if NUMBAR in lefts or NUMBAR in rights:
+        result.add(NUMBAR)
+    return frozenset(result)
+
+
+def extreme_types(left, right):
+    # BIGGR OF / SMALLR OF: one of the two operands as a number
+    lefts = frozenset().union(*(NUMBER_TYPES[name] for name in left))
+    rights = frozenset().union(*(NUMBER_TYPES[name] for name in right))
+    if not lefts or not rights:
+        return frozenset()
+    if lefts == rights and len(lefts) == 1:
+        return lefts
+    return NUMBERS
+
+
+def join(*environments):
+    # the variable types after any of environments, None where unreachable
+    reached = [environment for environment in environments if environment is not None]
+    if not reached:
+        return None
+    joined = dict(reached[0])
+    for environment in reached[1:]:
+        for name in joined.keys() - environment.keys():
+            joined[name] = joined[name] | NOT_ASSIGNED
+        # branches start as copies of one environment, so most names have
+        # the same types in both: only the others are looked at
+        for name, types in environment.items() - joined.items():
+            joined[name] = joined.get(name, NOT_ASSIGNED) | types
+    return joined
+
+
+class TypeInference:
+    """Follows a program with the types of its variables, see infer_types.
+
+    Statement rules (infer_<kind>) take the variable types before the
+    statement, a dict name -> frozenset of types that a missing name means
+    NOT_ASSIGNED, and return them after it, None once the rest of the block
+    is unreachable. Expression rules (type_<kind>) return the node's types;
+    those with operands are generators that yield each operand and are sent
+    its types, so deep expressions don't recurse (see optimizer.transform).
+    """
+
+    def __init__(self):
+        self.types = ProgramTypes()
+        # errors are kept only on the last pass over a loop body, when its
+        # types have settled
+        self.reporting = True
+        # variable types at the GTFOs of each enclosing loop, WTF? or function
+        self.breaks = []
+        # name -> numbers of parameters of its definitions
+        self.functions = {}
+        self.statement_rules = ast.dispatch_table(self, 'infer_', ast.STATEMENT_NODES)
+        self.expression_rules = ast.dispatch_table(self, 'type_', ast.EXPRESSION_NODES)
+
+    def infer(self, program):
+        for node in walk(program):
+            if isinstance(node, ast.FunctionDefinition):
+                self.functions.setdefault(node.name, set()).add(len(node.parameters))
+        # a GTFO outside any loop or WTF? ends the program
+        self.breaks.append([])
+        end = self.infer_block(program.statements, {})
+        self.types.variables = join(end, *self.breaks.pop()) or {}
+        return self.types
+
+    def report(self, message, where):
+        if not self.reporting:
+            return
+        error = f"{message}: {where}"
+        if error not in self.types.errors:
+            self.types.errors.append(error)
+
+    # STATEMENTS ===============================================================
+
+    def infer_block(self, statements, environment):
+        for statement in statements:
+            if environment is None:
+                # after GTFO or FOUND YR, never runs
+                break
+            environment = self.infer_statement(statement, environment)
+        return environment
+
+    def infer_statement(self, node, environment):
+        rule = self.statement_rules.get(type(node))
+        if rule is None:
+            return environment
+        return rule(node, environment)
+
+    def infer_variable_block(self, node, environment):
+        for declaration in node.declarations:
+            environment = self.infer_variable_declaration(declaration, environment)
+        return environment
+
+    def infer_variable_declaration(self, node, environment):
+        if node.initial_value:
+            environment[node.identifier] = self.infer_expression(node.initial_value, environment)
+        else:
+            environment[node.identifier] = frozenset((NOOB,))
+        return environment
+
+    def infer_variable_assignment(self, node, environment):
+        environment[node.identifier] = self.infer_expression(node.value, environment)
+        return environment
+
+    def infer_typecast_isnow(self, node, environment):
+        where = f"{node.identifier} IS NOW A {node.convert_to_type}"
+        self.read(node.identifier, environment, where)
+        if node.convert_to_type not in CASTERS:
+            self.report(f"Unknown type: {node.convert_to_type}", where)
+            return None
+        environment[node.identifier] = frozenset((node.convert_to_type,))
+        return environment
+
+    def infer_output_statement(self, node, environment):
+        for expression in node.expressions:
+            self.infer_expression(expression, environment)
+        return environment
+
+    def infer_input_statement(self, node, environment):
+        # parse_input_value, or NOOB past the end of input with EOF_NOOB
+        environment[node.identifier] = ANY
+        return environment
+
+    def infer_expression_statement(self, node, environment):
+        environment['IT'] = self.infer_expression(node.expression, environment)
+        return environment
+
+    def infer_conditional_statement(self, node, environment):
+        environment['IT'] = self.infer_expression(node.condition, environment)
+        branches = [self.infer_block(node.then_block, dict(environment))]
+        for else_if in node.elseif_blocks:
+            self.infer_expression(else_if.condition, environment)
+            branches.append(self.infer_block(else_if.statements, dict(environment)))
+        if node.else_block is not None:
+            branches.append(self.infer_block(node.else_block, dict(environment)))
+        else:
+            branches.append(environment)
+        return join(*branches)
+
+    def infer_loop_statement(self, node, environment):
+        condition = node.loop_condition
+        variable = condition.variable if condition is not None else None
+        if variable:
+            # an undeclared loop variable starts at 0
+            types = environment.get(variable, NOT_ASSIGNED)
+            if UNDEFINED in types:
+                environment[variable] = (types - NOT_ASSIGNED) | {NUMBR}
+
+        # follow the body until the types at its start stop changing, then
+        # once more to annotate and report with the settled types
+        reporting = self.reporting
+        self.reporting = False
+        start = environment
+        while True:
+            _, end = self.loop_pass(node, dict(start))
+            widened = join(start, end)
+            if widened == start:
+                break
+            start = widened
+        self.reporting = reporting
+        leave, _ = self.loop_pass(node, dict(start))
+        return leave
+
+    def loop_pass(self, node, start):
+        # (types after the loop, types at the end of one pass through the body)
+        condition = node.loop_condition
+        test = condition.condition if condition is not None else None
+        if test is not None:
+            self.infer_expression(test, start)
+        self.breaks.append([])
+        end = self.infer_block(node.statements, dict(start))
+        breaks = self.breaks.pop()
+        if end is not None and condition is not None and condition.variable:
+            # UPPIN / NERFIN: to_number of the variable plus or minus 1
+            variable = condition.variable
+            types = end.get(variable, NOT_ASSIGNED) - NOT_ASSIGNED
+            end[variable] = arithmetic_types("SUM OF", types, {NUMBR})
+        return join(start if test is not None else None, *breaks), end
+
+    def infer_switch_statement(self, node, environment):
+        if node.subject:
+            environment['IT'] = self.infer_expression(node.subject, environment)
+        else:
+            self.read('IT', environment, "WTF?")
+        self.breaks.append([])
+        # a case is entered by a match or by falling through from the one before
+        falling = None
+        for case in node.cases:
+            self.infer_expression(case.value, environment)
+            falling = self.infer_block(case.statements, join(environment, falling))
+        if node.default_block is not None:
+            falling = self.infer_block(node.default_block, join(environment, falling))
+        else:
+            falling = join(environment, falling)
+        return join(falling, *self.breaks.pop())
+
+    def infer_break_statement(self, node, environment):
+        self.breaks[-1].append(environment)
+        return None
+
+    def infer_function_definition(self, node, environment):
+        # the body runs on a frame of its own holding only the parameters
+        breaks = self.breaks
+        self.breaks = [[]]
+        self.infer_block(node.statements, {parameter: ANY for parameter in node.parameters})
+        self.breaks = breaks
+        return environment
+
+    def infer_return_statement(self, node, environment):
+        self.infer_expression(node.value, environment)
+        return None
+
+    # EXPRESSIONS ==============================================================
+
+    def infer_expression(self, node, environment):
+        return transform(node, lambda operand: self.expression_types(operand, environment))
+
+    def expression_types(self, node, environment):
+        rule = self.expression_rules.get(type(node))
+        types = rule(node, environment) if rule is not None else ANY
+        if isinstance(types, GeneratorType):
+            types = yield from types
+        # joined over every time the node is reached
+        previous = self.types.possible(node)
+        if previous is not None:
+            types = previous | types
+        self.types.expressions[id(node)] = (node, types)
+        return types
+
+    def read(self, name, environment, where):
+        types = environment.get(name, NOT_ASSIGNED)
+        if types == NOT_ASSIGNED:
+            self.report(f"Variable '{name}' is not defined", where)
+        return types - NOT_ASSIGNED
+
+    def type_literal(self, node, environment):
+        return frozenset((get_type_name(node.value),))
+
+    def type_type_literal(self, node, environment):
+        # type literals evaluate to NOOB
+        return frozenset((NOOB,))
+
+    def type_identifier(self, node, environment):
+        return self.read(node.name, environment, node.name)
+
+    def type_arithmetic_operation(self, node, environment):
+        left = yield node.left
+        right = yield node.right
+        message = DIVISIONS.get(node.operator)
+        if message is not None:
+            divisor = node.right
+            if right == {NOOB} or (isinstance(divisor, ast.Literal) and to_number(divisor.value) == 0):
+                self.report(message, describe(node))
+        return arithmetic_types(node.operator, left, right)
+
+    def type_comparison_operation(self, node, environment):
+        left = yield node.left
+        right = yield node.right
+        if node.operator in ("BIGGR OF", "SMALLR OF"):
+            return extreme_types(left, right)
+        return frozenset((TROOF,))
+
+    def type_logical_operation(self, node, environment):
+        yield from self.infer_operands(node.operator, [node.left, node.right])
+        return frozenset((TROOF,))
+
+    def type_variadic_logical_operation(self, node, environment):
+        yield from self.infer_operands(node.operator, node.operands)
+        return frozenset((TROOF,))
+
+    def infer_operands(self, operator_name, operands):
+        for index, operand in enumerate(operands):
+            if index and operator_name in SHORT_CIRCUIT:
+                # may never be evaluated, so can't fail for certain
+                reporting = self.reporting
+                self.reporting = False
+                yield operand
+                self.reporting = reporting
+            else:
+                yield operand
+
+    def type_function_call(self, node, environment):
+        for argument in node.arguments:
+            yield argument
+        arities = self.functions.get(node.name)
+        if arities is None:
+            self.report(f"Function '{node.name}' is not defined", describe(node))
+        elif len(arities) == 1 and len(node.arguments) not in arities:
+            self.report(f"Function '{node.name}' takes {next(iter(arities))} "
+                        f"arguments, got {len(node.arguments)}", describe(node))
+        return ANY
+
+    def type_unary_operation(self, node, environment):
+        yield node.operand
+        return frozenset((TROOF,))
+
+    def type_smoosh(self, node, environment):
+        for part in node.parts:
+            yield part
+        return frozenset((YARN,))
+
+    def type_typecast_maek(self, node, environment):
+        yield node.expression
+        if node.convert_to_type not in CASTERS:
+            self.report(f"Unknown type: {node.convert_to_type}", describe(node))
+            return frozenset()
+        return frozenset((node.convert_to_type,))
+
+    def type_hoisted_expression(self, node, environment):
+        return (yield node.expression)
+
+
+def infer_types(program):
+    """ProgramTypes for program, see the module docstring."""
+    return TypeInference().infer(program)
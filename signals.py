@@ -0,0 +1,29 @@
+"""How a statement finished, for statements that can end their block early.
+
+Executing a statement returns None when the next statement simply follows.
+Anything else is a status that the enclosing blocks pass up unchanged until
+the construct it is meant for takes it: a loop or WTF? stops on BREAK, a
+function call on BREAK (returning NOOB), a Return (returning its value) or
+a TailCall (see functions.py). Returning a value is much cheaper than
+raising an exception for every GTFO.
+"""
+
+BREAK = 'GTFO'
+
+
+class Return:
+    """FOUND YR: leaves the function, which returns value."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class TailCall:
+    """FOUND YR I IZ name ... MKAY: leaves the function, and whoever called
+    it calls name with arguments in its place."""
+    __slots__ = ('name', 'arguments')
+
+    def __init__(self, name, arguments):
+        self.name = name
+        self.arguments = arguments
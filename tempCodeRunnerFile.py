@@ -1,4 +1,4 @@
 if __name__ == "__main__":
     tokens = tokenizer("t1.lol")
     for token in tokens:
-        print(f"Line {token['line_number']}, Column {token['column_number']}: {token['token_name']} {token['pattern']}")
\ No newline at end of file
+        print(f"Line {token.line}, Column {token.column}: {token.name} {token.lexeme}")
\ No newline at end of file
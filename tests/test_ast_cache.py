@@ -0,0 +1,103 @@
+"""The parsed program cache (user-010) never serves a stale tree."""
+import os
+import threading
+import time
+
+from ast_cache import AstCache, load_program, STALE_TEMP_SECONDS
+from interpreter import run
+from lexer import KEYWORD_FILE
+
+PROGRAM = """HAI
+VISIBLE "one"
+KTHXBYE"""
+
+
+def entries(cache, suffix='.ast'):
+    return [name for name in os.listdir(cache.directory) if name.endswith(suffix)]
+
+
+def test_hit_returns_the_stored_program(tmp_path):
+    cache = AstCache(str(tmp_path))
+    tokens, tree = load_program(PROGRAM, cache=cache)
+    cached_tokens, cached_tree = cache.get(PROGRAM)
+    assert cached_tokens == tokens
+    assert run(PROGRAM, cache=cache)['output'] == "one"
+
+
+def test_edited_source_misses(tmp_path):
+    cache = AstCache(str(tmp_path))
+    assert run(PROGRAM, cache=cache)['output'] == "one"
+    edited = PROGRAM.replace('"one"', '"two"')
+    assert cache.get(edited) is None
+    assert run(edited, cache=cache)['output'] == "two"
+    assert len(entries(cache)) == 2
+
+
+def test_changed_grammar_misses(tmp_path):
+    cache = AstCache(str(tmp_path / 'cache'))
+    load_program(PROGRAM, cache=cache)
+    keywords = tmp_path / 'keyword.txt'
+    with open(KEYWORD_FILE) as f:
+        keywords.write_text(f.read() + "\n")
+    other = AstCache(cache.directory, keyword_file=str(keywords))
+    assert other.get(PROGRAM) is None
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = AstCache(str(tmp_path))
+    load_program(PROGRAM, cache=cache)
+    with open(cache.path(cache.key(PROGRAM)), 'wb') as f:
+        f.write(b"not a pickle")
+    assert cache.get(PROGRAM) is None
+    assert entries(cache) == []
+    assert run(PROGRAM, cache=cache)['output'] == "one"
+
+
+def test_eviction_keeps_the_directory_bounded(tmp_path):
+    cache = AstCache(str(tmp_path), max_bytes=1)
+    for n in range(3):
+        load_program(PROGRAM.replace("one", str(n)), cache=cache)
+    assert len(entries(cache)) <= 1
+
+
+
+def test_too_deep_to_pickle_is_not_cached(tmp_path):
+    cache = AstCache(str(tmp_path))
+    source = "HAI\nI HAS A x ITZ 1\nVISIBLE " + "SUM OF x AN " * 2000 + "1\nKTHXBYE"
+    assert run(source, cache=cache)['output'] == "2001"
+    assert run(source, cache=cache)['output'] == "2001"
+    assert os.listdir(cache.directory) == []
+
+
+def test_writers_in_threads(tmp_path):
+    # sessions of one process saving the same program at once
+    cache = AstCache(str(tmp_path))
+    tokens, tree = load_program(PROGRAM)
+    failures = []
+
+    def save():
+        try:
+            for _ in range(20):
+                cache.put(PROGRAM, tokens, tree)
+        except Exception as e:
+            failures.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert failures == []
+    assert cache.get(PROGRAM)[0] == tokens
+    assert entries(cache, '.tmp') == []
+
+
+def test_eviction_removes_stale_temporary_files(tmp_path):
+    cache = AstCache(str(tmp_path))
+    leftover = tmp_path / 'abc.123.tmp'
+    leftover.write_bytes(b"half an entry")
+    old = time.time() - STALE_TEMP_SECONDS - 1
+    os.utime(leftover, (old, old))
+    load_program(PROGRAM, cache=cache)
+    assert entries(cache, '.tmp') == []
+    assert len(entries(cache)) == 1
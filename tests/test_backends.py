@@ -0,0 +1,65 @@
+"""Every backend runs a program the way the tree walker does.
+
+Each program in programs/ exercises the feature of one request and is named
+after it (user016_loops.lol covers user-016); its expected output is beside
+it in a .out file. The sample programs at the repo root have no .out and are
+compared with the tree walker at opt level 0 only. Output and the symbol
+table must match on the tree, closure, vm and python backends, with the
+optimizer off (0) and fully on (2).
+"""
+import functools
+import glob
+import os
+
+import pytest
+
+from interpreter import run
+
+TESTS = os.path.dirname(__file__)
+ROOT = os.path.dirname(TESTS)
+
+BACKENDS = ['tree', 'closure', 'vm', 'python']
+OPT_LEVELS = [0, 2]
+# answers for the GIMMEHs of every program
+INPUTS = ['7', '3', 'x']
+
+
+def program_params():
+    params = []
+    for path in sorted(glob.glob(os.path.join(TESTS, 'programs', '*.lol'))):
+        request, name = os.path.basename(path)[:-len('.lol')].split('_', 1)
+        params.append(pytest.param(path, id=f"{request[:4]}-{request[4:]} {name}"))
+    for path in sorted(glob.glob(os.path.join(ROOT, '*.lol'))):
+        params.append(pytest.param(path, id=f"sample {os.path.basename(path)}"))
+    return params
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def outcome(source, backend, opt_level):
+    result = run(source, INPUTS, backend=backend, opt_level=opt_level)
+    return {
+        'success': result['success'],
+        'output': result['output'],
+        'symbol_table': result['symbol_table'],
+        'error': result['error'],
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def reference(path):
+    return outcome(read(path), 'tree', 0)
+
+
+@pytest.mark.parametrize('opt_level', OPT_LEVELS)
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('path', program_params())
+def test_backends_agree(path, backend, opt_level):
+    result = outcome(read(path), backend, opt_level)
+    assert result == reference(path)
+    expected = path[:-len('.lol')] + '.out'
+    if os.path.exists(expected):
+        assert result['output'] + '\n' == read(expected)
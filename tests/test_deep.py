@@ -0,0 +1,52 @@
+"""Deeply nested expressions (user-008) get through the optimizer (user-014)
+and type inference (user-025)."""
+import pytest
+
+from interpreter import run
+from lexer import tokenize_source
+from optimizer import optimize
+from parser import parse_tokens
+from semantics import infer_types, NUMBR
+
+BACKENDS = ['tree', 'closure', 'vm', 'python']
+DEPTH = 2000
+
+NESTED = "HAI\nI HAS A x ITZ 1\nVISIBLE " + "SUM OF x AN " * DEPTH + "1\nKTHXBYE"
+
+# invariant in the loop except for i, so hoisting looks at every level
+IN_LOOP = ("HAI\nI HAS A x ITZ 1\nI HAS A t ITZ 0\n"
+           "IM IN YR l UPPIN YR i TIL BOTH SAEM i AN 3\n"
+           "t R SUM OF t AN " + "SUM OF x AN " * DEPTH + "i\n"
+           "IM OUTTA YR l\nVISIBLE t\nKTHXBYE")
+
+
+@pytest.mark.parametrize('opt_level', [0, 2])
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_nested_expression(backend, opt_level):
+    result = run(NESTED, backend=backend, opt_level=opt_level)
+    assert result['error'] is None
+    assert result['output'] == str(DEPTH + 1)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_nested_expression_in_loop(backend):
+    result = run(IN_LOOP, backend=backend, opt_level=2)
+    assert result['error'] is None
+    assert result['output'] == str(3 * DEPTH + 0 + 1 + 2)
+
+
+def test_nested_constants_fold():
+    source = "HAI\nVISIBLE " + "SUM OF 1 AN " * DEPTH + "1\nKTHXBYE"
+    program, changes = optimize(parse_tokens(tokenize_source(source)), 2)
+    assert program.statements[0].expressions[0].value == DEPTH + 1
+    # the report spells out only the first levels
+    assert changes[-1].endswith(f"AN ... -> {DEPTH + 1}")
+    assert len(changes[-1]) < 200
+
+
+def test_nested_expression_types():
+    # at Python's default recursion limit, nothing raises it here
+    program = parse_tokens(tokenize_source(NESTED))
+    types = infer_types(program)
+    assert types.of(program.statements[1].expressions[0]) == NUMBR
+    assert types.errors == []
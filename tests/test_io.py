@@ -0,0 +1,116 @@
+"""Output sinks (user-019) and input sources (user-020) on every backend."""
+import io
+
+import pytest
+
+from interpreter import run
+from output import RingBufferSink, StreamSink, CallbackSink
+from input_source import FileSource, ListSource, MmapSource, EOF_NOOB, EOF_ERROR
+
+BACKENDS = ['tree', 'closure', 'vm', 'python']
+
+COUNT_TO_FIVE = """HAI
+IM IN YR l UPPIN YR i TIL BOTH SAEM i AN 5
+  VISIBLE i
+IM OUTTA YR l
+VISIBLE "done" !
+KTHXBYE"""
+
+ECHO = """HAI
+I HAS A a
+I HAS A b
+VISIBLE "first?" !
+GIMMEH a
+VISIBLE "second?" !
+GIMMEH b
+VISIBLE a "," b
+KTHXBYE"""
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_stream_sink(backend):
+    stream = io.StringIO()
+    result = run(COUNT_TO_FIVE, backend=backend, output=StreamSink(stream, buffer_lines=2))
+    assert result['success']
+    assert stream.getvalue() == "0\n1\n2\n3\n4\ndone"
+    # everything was passed on, the sink holds nothing
+    assert result['output'] == ''
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_ring_buffer_sink(backend):
+    sink = RingBufferSink(max_lines=3, buffer_lines=1)
+    result = run(COUNT_TO_FIVE, backend=backend, output=sink)
+    # the last three whole lines, and the one VISIBLE ... ! left unfinished
+    assert result['output'] == "2\n3\n4\ndone"
+    assert sink.dropped == 2
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_prompt_flushed_before_gimmeh(backend):
+    emitted = []
+
+    def answers():
+        # by the time GIMMEH asks, the prompt before it has been emitted
+        assert ''.join(emitted) == "first?"
+        yield "x\n"
+        assert ''.join(emitted) == "first?second?"
+        yield "y\n"
+
+    run(ECHO, answers(), backend=backend, output=CallbackSink(emitted.append))
+    assert ''.join(emitted) == "first?second?x , y\n"
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_inputs_read_lazily(backend):
+    read = []
+
+    def answers():
+        for line in ["1", "2", "never read"]:
+            read.append(line)
+            yield line
+
+    result = run(ECHO, answers(), backend=backend)
+    assert result['output'] == "first?second?1 , 2"
+    assert read == ["1", "2"]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_on_eof(backend):
+    result = run(ECHO, ["only"], backend=backend)
+    assert result['output'] == "first?second?only , "
+    result = run(ECHO, ["only"], backend=backend, on_eof=EOF_NOOB)
+    assert result['output'] == "first?second?only , NOOB"
+    result = run(ECHO, ["only"], backend=backend, on_eof=EOF_ERROR)
+    assert not result['success']
+    assert result['output'] == "first?second?\nRuntime Error: GIMMEH: no more input"
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_on_eof_without_inputs(backend):
+    result = run(ECHO, backend=backend, on_eof=EOF_NOOB)
+    assert result['output'] == "first?second?NOOB , NOOB"
+    result = run(ECHO, backend=backend, on_eof=EOF_ERROR)
+    assert result['output'] == "first?\nRuntime Error: GIMMEH: no more input"
+
+
+def test_on_eof_of_a_source():
+    source = ListSource(["only"], on_eof=EOF_NOOB)
+    # the source's own setting applies, repeating it is fine
+    assert run(ECHO, source)['output'] == "first?second?only , NOOB"
+    assert run(ECHO, source, on_eof=EOF_NOOB)['output'] == "first?second?only , NOOB"
+    with pytest.raises(ValueError):
+        run(ECHO, source, on_eof=EOF_ERROR)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('source_class', [FileSource, MmapSource])
+def test_file_sources(backend, source_class, tmp_path):
+    path = tmp_path / 'input.txt'
+    path.write_bytes(b"one\r\ntwo\n")
+    source = source_class(str(path))
+    try:
+        result = run(ECHO, source, backend=backend)
+    finally:
+        source.close()
+    assert result['output'] == "first?second?one , two"
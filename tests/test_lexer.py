@@ -0,0 +1,44 @@
+"""Token positions after comments (user-003), on every way of lexing a
+program: the whole string at once, a text file and an mmap read line by line.
+
+Cases are in lexer_positions.json, kept as JSON so the CRLF line endings
+survive checkouts unchanged.
+"""
+import json
+import mmap
+import os
+
+import pytest
+
+from lexer import tokenize_source, iter_tokens
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'lexer_positions.json')
+
+with open(CORPUS) as f:
+    CASES = json.load(f)
+
+
+def lex_string(source, tmp_path):
+    return tokenize_source(source)
+
+
+def lex_file(source, tmp_path):
+    path = tmp_path / 'program.lol'
+    path.write_bytes(source.encode('utf-8'))
+    # newline='' keeps the \r of CRLF lines, as the string path sees them
+    with open(path, newline='') as f:
+        return list(iter_tokens(f))
+
+
+def lex_mmap(source, tmp_path):
+    path = tmp_path / 'program.lol'
+    path.write_bytes(source.encode('utf-8'))
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return list(iter_tokens(mapped))
+
+
+@pytest.mark.parametrize('lex', [lex_string, lex_file, lex_mmap])
+@pytest.mark.parametrize('case', CASES, ids=[case['name'] for case in CASES])
+def test_positions_after_comments(case, lex, tmp_path):
+    tokens = lex(case['source'], tmp_path)
+    assert [[t.lexeme, t.line, t.column] for t in tokens] == case['tokens']
@@ -0,0 +1,110 @@
+"""Calls nest as deep on every backend (user-021), tail calls don't nest at
+all (user-022), and memoized calls (user-021) work alongside the static
+types (user-025)."""
+import sys
+import threading
+
+import pytest
+
+from functions import MAX_CALL_DEPTH
+from interpreter import run
+
+BACKENDS = ['tree', 'closure', 'vm', 'python']
+
+# down YR n is n + 1 calls deep
+DOWN = """HAI
+HOW IZ I down YR n
+  BOTH SAEM n AN 0, O RLY?
+    YA RLY, FOUND YR 0
+  OIC
+  I HAS A rest ITZ I IZ down YR DIFF OF n AN 1 MKAY
+  FOUND YR SUM OF 1 AN rest
+IF U SAY SO
+VISIBLE I IZ down YR %d MKAY
+KTHXBYE"""
+
+# the recursive call from inside a loop, a WTF? and an expression, which
+# takes the most Python calls per call on the tree walker
+NESTED_DOWN = """HAI
+HOW IZ I down YR n
+  I HAS A r ITZ 0
+  DIFFRINT n AN 0, O RLY?
+    YA RLY
+      IM IN YR l UPPIN YR i TIL BOTH SAEM i AN 1
+        i, WTF?
+          OMG 0
+            r R SUM OF 1 AN PRODUKT OF 1 AN MAEK I IZ down YR DIFF OF n AN 1 MKAY A NUMBR
+            GTFO
+        OIC
+      IM OUTTA YR l
+  OIC
+  FOUND YR r
+IF U SAY SO
+VISIBLE I IZ down YR %d MKAY
+KTHXBYE"""
+
+COUNTDOWN = """HAI
+HOW IZ I countdown YR n
+  BOTH SAEM n AN 0, O RLY?
+    YA RLY, FOUND YR "done"
+  OIC
+  FOUND YR I IZ countdown YR DIFF OF n AN 1 MKAY
+IF U SAY SO
+VISIBLE I IZ countdown YR %d MKAY
+KTHXBYE"""
+
+# without memoization, fib YR 80 makes some 10**16 calls
+FIB = """HAI
+HOW IZ I fib YR n
+  BOTH SAEM n AN BIGGR OF n AN 2, O RLY?
+    YA RLY
+    NO WAI, FOUND YR n
+  OIC
+  FOUND YR SUM OF I IZ fib YR DIFF OF n AN 1 MKAY AN I IZ fib YR DIFF OF n AN 2 MKAY
+IF U SAY SO
+VISIBLE I IZ fib YR 80 MKAY
+KTHXBYE"""
+
+
+@pytest.mark.parametrize('program', [DOWN, NESTED_DOWN], ids=['plain', 'nested'])
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_deepest_recursion(backend, program):
+    result = run(program % (MAX_CALL_DEPTH - 1), backend=backend)
+    assert result['output'] == str(MAX_CALL_DEPTH - 1)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_one_call_too_deep(backend):
+    result = run(DOWN % MAX_CALL_DEPTH, backend=backend)
+    assert not result['success']
+    assert result['output'] == f"Runtime Error: Function 'down': more than {MAX_CALL_DEPTH} nested calls"
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_tail_calls_do_not_nest(backend):
+    result = run(COUNTDOWN % (10 * MAX_CALL_DEPTH), backend=backend)
+    assert result['output'] == "done"
+
+
+def test_recursion_limit_put_back():
+    before = sys.getrecursionlimit()
+    run(DOWN % 10)
+    run(DOWN % MAX_CALL_DEPTH)
+    assert sys.getrecursionlimit() == before
+
+
+def test_recursion_in_a_thread():
+    # where a host such as Streamlit runs programs, on a default stack
+    results = []
+    thread = threading.Thread(target=lambda: results.append(run(NESTED_DOWN % (MAX_CALL_DEPTH - 1))))
+    thread.start()
+    thread.join()
+    assert results[0]['output'] == str(MAX_CALL_DEPTH - 1)
+
+
+@pytest.mark.parametrize('opt_level', [0, 2])
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_memoized_recursion(backend, opt_level):
+    result = run(FIB, backend=backend, opt_level=opt_level, memoize=True)
+    assert result['output'] == "23416728348467685"
+    assert result['type_errors'] == []
@@ -0,0 +1,51 @@
+"""The bytecode compiler's superinstructions (user-012)."""
+from lexer import tokenize_source
+from parser import parse_tokens
+from semantics import infer_types
+from vm import BytecodeCompiler, HALT, LOAD_CONST, OPCODE_NAMES, POP_JUMP_IF_FALSE, STORE
+
+
+def opcodes(source):
+    program = parse_tokens(tokenize_source(source))
+    bytecode = BytecodeCompiler(infer_types(program)).compile(program)
+    return [OPCODE_NAMES[opcode] for opcode in bytecode.code[0::2]]
+
+
+def test_loop_body_is_fused():
+    code = opcodes("""HAI
+I HAS A n ITZ 10
+I HAS A total ITZ 0
+IM IN YR l UPPIN YR i TIL BOTH SAEM i AN n
+  total R SUM OF total AN i
+  n R n
+IM OUTTA YR l
+KTHXBYE""")
+    for fused in ('COMPARE_JUMP', 'BINARY_STORE', 'COPY'):
+        assert fused in code
+    assert 'ADD' not in code and 'EQ' not in code
+
+
+def test_no_run_fused_across_a_jump_target():
+    # the STORE is where POP_JUMP_IF_FALSE jumps to, so the LOAD_CONST before
+    # it stays on its own instead of making a COPY
+    compiler = BytecodeCompiler(infer_types(parse_tokens(tokenize_source("HAI\nKTHXBYE"))))
+    one = compiler.constant(1)
+    compiler.emit(LOAD_CONST, one)
+    compiler.emit(LOAD_CONST, one)
+    compiler.emit(POP_JUMP_IF_FALSE, 4)
+    compiler.emit(LOAD_CONST, one)
+    compiler.emit(STORE, compiler.slot('x'))
+    compiler.emit(HALT)
+    code = [OPCODE_NAMES[opcode] for opcode in compiler.fuse().code[0::2]]
+    assert code == ['LOAD_CONST', 'LOAD_CONST', 'POP_JUMP_IF_FALSE', 'LOAD_CONST', 'STORE', 'HALT']
+
+
+def test_counted_loop_starts_its_variable():
+    code = opcodes("""HAI
+IM IN YR l UPPIN YR i TIL BOTH SAEM i AN 3
+  VISIBLE i
+IM OUTTA YR l
+KTHXBYE""")
+    assert code[:2] == ['LOAD_CONST', 'COUNTED_START']
+    # no GTFO, so no JUMP past the landing for one
+    assert code[-2:] == ['COUNTED_END', 'HALT']
@@ -0,0 +1,586 @@
+"""LOLCODE to Python transpiler backend.
+
+The AST is translated into the source of one Python function, compiled with
+compile() and run as native bytecode. Every LOLCODE variable becomes a local
+of that function (prefixed v_ so no name can clash with a Python keyword or
+a helper), and the coercions are the functions from values.py, so the result
+behaves like the tree walker.
+
+Values of hoisted loop invariants (see optimizer.py) are kept in the local
+dict _hoisted instead, so they never show up in the symbol table.
+
+A variable read before it is assigned surfaces from Python as
+UnboundLocalError (NameError in a function that never assigns it) and is
+reported as the interpreter's NameError. When the function returns or
+raises, its v_ locals are copied into the interpreter's symbol table.
+
+Each HOW IZ I becomes a module level Python function of its parameters,
+transpiled like the program, so its variables are its own locals and FOUND
+YR is a plain return. Running the definition registers it with the
+interpreter through _define; I IZ calls go through _call.
+
+    python transpiler.py program.lol
+
+prints the generated source; with diagnostics at DEBUG or above the backend
+also emits it as a 'python_source' event before running it.
+"""
+import re
+import sys
+
+import ast_nodes as ast
+from loops import counted_loop, CountedValues
+from signals import TailCall
+from arithmetic import inline_cache, divide, modulo, OPERATIONS
+from semantics import infer_types, NUMBR, TROOF, YARN
+from values import to_number, to_boolean, value_to_string, parse_input_value, CASTERS
+
+INDENT = "    "
+# deeper expressions are split into temporaries, CPython's parser refuses
+# more than 200 nested parentheses
+MAX_INLINE_DEPTH = 100
+
+# operator -> format of the already generated operand sources
+# arithmetic on operands known to be numbers, see semantics.py
+NUMBER_FORMATS = {
+    "SUM OF": "({left} + {right})",
+    "DIFF OF": "({left} - {right})",
+    "PRODUKT OF": "({left} * {right})",
+    "QUOSHUNT OF": "_divide({left}, {right})",
+    "MOD OF": "_modulo({left}, {right})",
+}
+COMPARISON_FORMATS = {
+    "BOTH SAEM": "({left} == {right})",
+    "DIFFRINT": "({left} != {right})",
+    "BIGGR OF": "max(_num({left}), _num({right}))",
+    "SMALLR OF": "min(_num({left}), _num({right}))",
+}
+LOGICAL_FORMATS = {
+    "WON OF": "(_bool({left}) != _bool({right}))",
+}
+# short-circuit operators -> the Python operator joining their operands
+SHORT_CIRCUIT_OPERATORS = {"BOTH OF": "and", "EITHER OF": "or", "ALL OF": "and", "ANY OF": "or"}
+LOOP_STEPS = {"UPPIN YR": "+ 1", "NERFIN YR": "- 1"}
+
+
+def _fail(error):
+    raise error
+
+
+# what the generated code can see besides its own locals
+RUNTIME_GLOBALS = {
+    '_num': to_number,
+    '_bool': to_boolean,
+    '_str': value_to_string,
+    '_parse_input': parse_input_value,
+    '_inline_cache': inline_cache,
+    '_divide': divide,
+    '_modulo': modulo,
+    '_fail': _fail,
+    '_CountedValues': CountedValues,
+    '_TailCall': TailCall,
+}
+for _type_name, _caster in CASTERS.items():
+    RUNTIME_GLOBALS['_to_' + _type_name] = _caster
+
+_UNBOUND_NAME = re.compile(r"'v_(\w+)'")
+
+
+def _expression_depth(node):
+    if isinstance(node, (ast.ArithmeticOperation, ast.ComparisonOperation, ast.LogicalOperation)):
+        return 1 + max(_expression_depth(node.left), _expression_depth(node.right))
+    if isinstance(node, ast.UnaryOperation):
+        return 1 + _expression_depth(node.operand)
+    if isinstance(node, ast.TypecastMaek):
+        return 1 + _expression_depth(node.expression)
+    if isinstance(node, ast.HoistedExpression):
+        return 1 + _expression_depth(node.expression)
+    if isinstance(node, ast.Smoosh):
+        return 1 + max((_expression_depth(part) for part in node.parts), default=0)
+    if isinstance(node, ast.VariadicLogicalOperation):
+        return 1 + max((_expression_depth(operand) for operand in node.operands), default=0)
+    if isinstance(node, ast.FunctionCall):
+        return 1 + max((_expression_depth(argument) for argument in node.arguments), default=0)
+    return 0
+
+
+class PythonTranspiler:
+    """Generates the source of `def lolcode_program(_frame, _write, _get_input)`."""
+
+    def __init__(self, types):
+        # static types of the expressions, see semantics.py
+        self.types = types
+        self.lines = []
+        self.indent = 1
+        self.temporaries = 0
+        self.spilling = False
+        # flag a spilled line is conditional on, see short_circuit
+        self.guard = None
+        # loops and WTF?s around the current statement, for GTFO
+        self.loop_depth = 0
+        # module level assignments the function reads, e.g. switch tables
+        self.tables = []
+        # program variables in order of first mention, like the symbol table
+        self.names = {}
+        self.generators = ast.dispatch_table(self, 'generate_')
+
+    def transpile(self, node):
+        if not isinstance(node, ast.Program):
+            raise ValueError("Expected program node")
+        self.generate_block(node.statements)
+        body = self.lines
+
+        self.lines = self.tables + ["def lolcode_program(_frame, _write, _get_input):"]
+        # variables already in the frame start out with their value
+        for name, variable in self.names.items():
+            self.lines.append(f"{INDENT}if {name!r} in _frame: {variable} = _frame[{name!r}]")
+        self.lines.append(f"{INDENT}_hoisted = {{}}")
+        self.lines.append(f"{INDENT}try:")
+        self.lines.extend(INDENT + line for line in body or [f"{INDENT}pass"])
+        self.lines.append(f"{INDENT}finally:")
+        self.lines.append(f"{INDENT * 2}_export(_frame, locals())")
+        return "\n".join(self.lines) + "\n"
+
+    def transpile_function(self, node, name):
+        # the source of `def name(<parameters>)` for a FunctionDefinition
+        parameters = [self.local(parameter) for parameter in node.parameters]
+        self.generate_block(node.statements)
+        lines = [f"def {name}({', '.join(parameters)}):", f"{INDENT}_hoisted = {{}}"]
+        lines.extend(self.lines)
+        # running off the end returns IT; nothing runs after a last FOUND YR or GTFO
+        last = node.statements[-1] if node.statements else None
+        if isinstance(last, (ast.ReturnStatement, ast.BreakStatement)):
+            return "\n".join(lines)
+        if 'IT' in self.names:
+            lines += [f"{INDENT}try:", f"{INDENT * 2}return {self.local('IT')}",
+                      f"{INDENT}except UnboundLocalError:", f"{INDENT * 2}return None"]
+        else:
+            lines.append(f"{INDENT}return None")
+        return "\n".join(lines)
+
+    # helpers
+
+    def local(self, name):
+        # the Python local standing for a LOLCODE variable
+        variable = self.names.get(name)
+        if variable is None:
+            variable = self.names[name] = 'v_' + name
+        return variable
+
+    def emit(self, line):
+        if self.guard:
+            line = f"if {self.guard}: {line}"
+        self.lines.append(INDENT * self.indent + line)
+
+    def temporary(self):
+        self.temporaries += 1
+        return f"_t{self.temporaries}"
+
+    # STATEMENTS ===============================================================
+
+    def generate_block(self, statements):
+        start = len(self.lines)
+        for statement in statements:
+            self.generate_statement(statement)
+        if len(self.lines) == start:
+            self.emit("pass")
+
+    def generate_statement(self, node):
+        # nodes the interpreter doesn't execute (yet) generate nothing
+        if not node:
+            return
+        generator = self.generators.get(type(node))
+        if generator is not None and isinstance(node, ast.STATEMENT_NODES):
+            generator(node)
+
+    def assign(self, name, expression_node):
+        self.emit(f"{self.local(name)} = {self.expression(expression_node)}")
+
+    def generate_variable_block(self, node):
+        for declaration in node.declarations:
+            self.generate_variable_declaration(declaration)
+
+    def generate_variable_declaration(self, node):
+        if node.initial_value:
+            self.assign(node.identifier, node.initial_value)
+        else:
+            self.emit(f"{self.local(node.identifier)} = None")
+
+    def generate_variable_assignment(self, node):
+        self.assign(node.identifier, node.value)
+
+    def generate_typecast_isnow(self, node):
+        variable = self.local(node.identifier)
+        if node.convert_to_type not in CASTERS:
+            self.emit(f"_fail(ValueError({'Unknown type: ' + str(node.convert_to_type)!r}))")
+            return
+        self.emit(f"{variable} = _to_{node.convert_to_type}({variable})")
+
+    def generate_expression_statement(self, node):
+        self.assign('IT', node.expression)
+
+    def generate_conditional_statement(self, node):
+        self.assign('IT', node.condition)
+        if self.types.has_type(node.condition, TROOF):
+            self.emit(f"if {self.local('IT')}:")
+        else:
+            self.emit(f"if _bool({self.local('IT')}):")
+        self.indent += 1
+        self.generate_block(node.then_block)
+        self.indent -= 1
+
+        for else_if in node.elseif_blocks:
+            # conditions that need temporaries can't go in an elif line
+            self.emit("else:")
+            self.indent += 1
+            self.emit(f"if {self.boolean(else_if.condition)}:")
+            self.indent += 1
+            self.generate_block(else_if.statements)
+            self.indent -= 1
+
+        if node.else_block is not None:
+            self.emit("else:")
+            self.indent += 1
+            self.generate_block(node.else_block)
+            self.indent -= 1
+        self.indent -= len(node.elseif_blocks)
+
+    def generate_loop_statement(self, node):
+        # IM IN YR <label> [UPPIN|NERFIN YR var [TIL|WILE cond]] ... IM OUTTA YR
+        # the condition is tested before each pass, the variable stepped after
+        condition = node.loop_condition
+        variable = None
+        if condition is not None and condition.variable:
+            variable = self.local(condition.variable)
+            # an undeclared loop variable starts at 0
+            self.emit("try:")
+            self.emit(f"{INDENT}{variable}")
+            self.emit("except UnboundLocalError:")
+            self.emit(f"{INDENT}{variable} = 0")
+
+        plan = counted_loop(node)
+        if plan is not None:
+            self.generate_counted_loop(node, plan, variable)
+            return
+
+        self.emit(f"while True:  # {node.loop_identifier}")
+        self.indent += 1
+        self.loop_depth += 1
+        if condition is not None and condition.condition is not None:
+            test = self.boolean(condition.condition)
+            if condition.loop_condition == "TIL":
+                self.emit(f"if {test}: break")
+            else:
+                self.emit(f"if not {test}: break")
+        self.generate_block(node.statements)
+        if variable is not None:
+            step = LOOP_STEPS.get(condition.loop_operation)
+            if step is not None:
+                self.emit(f"{variable} = _num({variable}) {step}")
+        self.loop_depth -= 1
+        self.indent -= 1
+
+    def generate_counted_loop(self, node, plan, variable):
+        # a native for loop over CountedValues (see loops.py); the else
+        # branch runs when the condition failed rather than on GTFO
+        values = self.temporary()
+        self.emit(f"{values} = _CountedValues({variable}, {self.expression(plan.bound)}, "
+                  f"{plan.step}, {plan.relation!r})")
+        self.emit(f"for {variable} in {values}:  # {node.loop_identifier}")
+        self.indent += 1
+        self.loop_depth += 1
+        self.generate_block(node.statements)
+        self.loop_depth -= 1
+        self.indent -= 1
+        self.emit("else:")
+        self.emit(f"{INDENT}{variable} = {values}.final")
+
+    def generate_switch_statement(self, node):
+        # A dict made once at module level gives the index of the matching
+        # case. The cases are grouped into runs ending in GTFO, which nothing
+        # falls through from; the run is found by bisecting on the index and
+        # inside it every case from that index on runs. `while True` gives
+        # GTFO something to break out of.
+        if node.subject:
+            self.assign('IT', node.subject)
+        cases = [case.statements for case in node.cases] + [node.default_block or []]
+        table = {}
+        for index, case in enumerate(node.cases):
+            table.setdefault(case.value.value, index)
+        name = f"_switch{len(self.tables)}"
+        self.tables.append(f"{name} = {table!r}")
+
+        entry = self.temporary()
+        self.emit(f"{entry} = {name}.get({self.local('IT')}, {len(node.cases)})")
+        self.emit("while True:  # WTF?")
+        self.indent += 1
+        self.loop_depth += 1
+        runs = [[]]
+        for index, statements in enumerate(cases):
+            runs[-1].append(index)
+            if statements and isinstance(statements[-1], ast.BreakStatement) and index < len(cases) - 1:
+                runs.append([])
+        self.generate_case_runs(runs, cases, entry)
+        self.emit("break")
+        self.loop_depth -= 1
+        self.indent -= 1
+
+    def generate_case_runs(self, runs, cases, entry):
+        if len(runs) > 1:
+            middle = len(runs) // 2
+            self.emit(f"if {entry} < {runs[middle][0]}:")
+            self.indent += 1
+            self.generate_case_runs(runs[:middle], cases, entry)
+            self.indent -= 1
+            self.emit("else:")
+            self.indent += 1
+            self.generate_case_runs(runs[middle:], cases, entry)
+            self.indent -= 1
+            return
+        indices = runs[0]
+        for index in indices[:-1]:
+            if not cases[index]:
+                continue
+            self.emit(f"if {entry} <= {index}:")
+            self.indent += 1
+            self.generate_block(cases[index])
+            self.indent -= 1
+        self.generate_block(cases[indices[-1]])
+
+    def generate_break_statement(self, node):
+        # GTFO outside a loop or WTF? ends the program, or the function with NOOB
+        self.emit("break" if self.loop_depth else "return")
+
+    def generate_function_definition(self, node):
+        name = f"_function{len(self.tables)}"
+        inner = PythonTranspiler(self.types)
+        # switch tables and functions inside go to the same module
+        inner.tables = self.tables
+        inner.temporaries = self.temporaries
+        source = inner.transpile_function(node, name)
+        self.temporaries = inner.temporaries
+        self.tables.append(source)
+        self.emit(f"_define({node.name!r}, {tuple(node.parameters)!r}, {name})")
+
+    def generate_return_statement(self, node):
+        value = node.value
+        if isinstance(value, ast.FunctionCall):
+            # tail call, made by the interpreter once this function has returned
+            arguments = ", ".join(self.expression(argument) for argument in value.arguments)
+            self.emit(f"return _TailCall({value.name!r}, [{arguments}])")
+            return
+        self.emit(f"return {self.expression(value)}")
+
+    def generate_reset_hoisted(self, node):
+        for name in node.names:
+            self.emit(f"_hoisted.pop({name!r}, None)")
+
+    def generate_output_statement(self, node):
+        end = '\n' if node.newline else ''
+        if all(isinstance(expr, ast.Literal) for expr in node.expressions):
+            text = ' '.join(value_to_string(expr.value) for expr in node.expressions)
+            self.emit(f"_write({text + end!r})")
+            return
+        parts = [self.string(expr) for expr in node.expressions]
+        if len(parts) == 1:
+            source = parts[0]
+        else:
+            source = f"' '.join(({', '.join(parts)},))"
+        self.emit(f"_write({source} + {end!r})" if end else f"_write({source})")
+
+    def generate_input_statement(self, node):
+        self.emit(f"{self.local(node.identifier)} = _parse_input(_get_input())")
+
+    # EXPRESSIONS ==============================================================
+
+    def expression(self, node):
+        # Python source for node; very deep trees are spilled into temporaries
+        if not node:
+            return "None"
+        generator = self.generators.get(type(node))
+        if generator is None or not isinstance(node, ast.EXPRESSION_NODES):
+            return f"_fail(ValueError({'Unknown expression type: ' + str(node.kind)!r}))"
+        if self.spilling:
+            source = generator(node)
+            if isinstance(node, (ast.Literal, ast.Identifier, ast.TypeLiteral)):
+                return source
+            # evaluated in post order, the same order as the inline expression
+            temporary = self.temporary()
+            self.emit(f"{temporary} = {source}")
+            return temporary
+        if _expression_depth(node) > MAX_INLINE_DEPTH:
+            self.spilling = True
+            try:
+                return self.expression(node)
+            finally:
+                self.spilling = False
+        return generator(node)
+
+    def string(self, node):
+        # operand already converted with value_to_string
+        if isinstance(node, ast.Literal):
+            return repr(value_to_string(node.value))
+        if self.types.has_type(node, YARN):
+            return self.expression(node)
+        if self.types.has_type(node, NUMBR):
+            return f"str({self.expression(node)})"
+        return f"_str({self.expression(node)})"
+
+    def boolean(self, node):
+        # operand already converted with to_boolean
+        if self.types.has_type(node, TROOF):
+            return self.expression(node)
+        return f"_bool({self.expression(node)})"
+
+    def generate_literal(self, node):
+        return repr(node.value)
+
+    def generate_type_literal(self, node):
+        # Type literals evaluate to NOOB
+        return "None"
+
+    def generate_identifier(self, node):
+        return self.local(node.name)
+
+    def generate_arithmetic_operation(self, node):
+        if node.operator not in OPERATIONS:
+            return f"_fail(ValueError({'Unknown arithmetic operator: ' + node.operator!r}))"
+        if self.types.is_number(node.left) and self.types.is_number(node.right):
+            left = self.expression(node.left)
+            return NUMBER_FORMATS[node.operator].format(left=left, right=self.expression(node.right))
+        # the node's inline cache, see arithmetic.py
+        name = f"_arithmetic{len(self.tables)}"
+        self.tables.append(f"{name} = _inline_cache({node.operator!r})")
+        left = self.expression(node.left)
+        return f"{name}({left}, {self.expression(node.right)})"
+
+    def generate_comparison_operation(self, node):
+        template = COMPARISON_FORMATS.get(node.operator)
+        if template is None:
+            return f"_fail(ValueError({'Unknown comparison operator: ' + node.operator!r}))"
+        left = self.expression(node.left)
+        return template.format(left=left, right=self.expression(node.right))
+
+    def generate_logical_operation(self, node):
+        if node.operator in SHORT_CIRCUIT_OPERATORS:
+            return self.short_circuit(node.operator, [node.left, node.right])
+        template = LOGICAL_FORMATS.get(node.operator)
+        if template is None:
+            return f"_fail(ValueError({'Unknown logical operator: ' + node.operator!r}))"
+        left = self.expression(node.left)
+        return template.format(left=left, right=self.expression(node.right))
+
+    def generate_variadic_logical_operation(self, node):
+        if node.operator not in SHORT_CIRCUIT_OPERATORS:
+            return f"_fail(ValueError({'Unknown logical operator: ' + node.operator!r}))"
+        return self.short_circuit(node.operator, node.operands)
+
+    def short_circuit(self, operator, operands):
+        # Python's and / or on TROOFs. When spilling, an operand's temporaries
+        # must only be computed if the operand is reached: they are emitted
+        # under a guard flag, kept flat so nesting can't run into Python's
+        # indentation limit.
+        joiner = SHORT_CIRCUIT_OPERATORS[operator]
+        if not self.spilling:
+            return "(" + f" {joiner} ".join(self.boolean(operand) for operand in operands) + ")"
+        result = self.temporary()
+        self.emit(f"{result} = {self.boolean(operands[0])}")
+        outer = self.guard
+        for operand in operands[1:]:
+            reached = result if joiner == "and" else f"not {result}"
+            guard = self.temporary()
+            self.guard = None
+            self.emit(f"{guard} = {outer} and {reached}" if outer else f"{guard} = {reached}")
+            self.guard = guard
+            self.emit(f"{result} = {self.boolean(operand)}")
+            self.guard = outer
+        return result
+
+    def generate_function_call(self, node):
+        arguments = ", ".join(self.expression(argument) for argument in node.arguments)
+        return f"_call({node.name!r}, [{arguments}])"
+
+    def generate_unary_operation(self, node):
+        if node.operator != "NOT":
+            return f"_fail(ValueError({'Unknown unary operator: ' + node.operator!r}))"
+        return f"(not {self.boolean(node.operand)})"
+
+    def generate_hoisted_expression(self, node):
+        # setdefault only runs when the value isn't cached, the expression
+        # is evaluated in that branch alone
+        name = repr(node.name)
+        return (f"(_hoisted[{name}] if {name} in _hoisted "
+                f"else _hoisted.setdefault({name}, {self.expression(node.expression)}))")
+
+    def generate_smoosh(self, node):
+        if not node.parts:
+            return "''"
+        parts = [self.string(part) for part in node.parts]
+        return f"({' + '.join(parts)})"
+
+    def generate_typecast_maek(self, node):
+        if node.convert_to_type not in CASTERS:
+            return f"_fail(ValueError({'Unknown type: ' + str(node.convert_to_type)!r}))"
+        if self.types.has_type(node.expression, node.convert_to_type):
+            # already of that type, the cast would give the value back
+            return self.expression(node.expression)
+        return f"_to_{node.convert_to_type}({self.expression(node.expression)})"
+
+
+def _export(frame, local_values):
+    # copy the program's variables (the v_ locals) back to the symbol table
+    for local_name, value in local_values.items():
+        if local_name.startswith('v_'):
+            frame[local_name[2:]] = value
+
+
+def transpile(program, types=None):
+    # types from semantics.infer_types, worked out here when not given
+    if types is None:
+        types = infer_types(program)
+    return PythonTranspiler(types).transpile(program)
+
+
+def load_function(source, runtime=None):
+    # compile the generated source and return the lolcode_program function;
+    # runtime adds globals for the functions, e.g. _write and _call
+    namespace = dict(RUNTIME_GLOBALS, _export=_export)
+    namespace.update(runtime or {})
+    exec(compile(source, '<lolcode>', 'exec'), namespace)
+    return namespace['lolcode_program']
+
+
+def compile_program(program, interpreter):
+    # backend entry point, see interpreter.BACKENDS
+    source = transpile(program, interpreter.types)
+    interpreter.diagnostics.debug('python_source', source)
+    write = interpreter.output.write
+    get_input = interpreter.get_input
+    function = load_function(source, {
+        '_write': write,
+        '_get_input': get_input,
+        '_define': interpreter.define_function,
+        '_call': interpreter.call_function,
+    })
+
+    def run_program(frame):
+        try:
+            function(frame, write, get_input)
+        except NameError as e:
+            # UnboundLocalError, or a function reading a name it never assigns
+            match = _UNBOUND_NAME.search(str(e))
+            if match is None and not isinstance(e, UnboundLocalError):
+                raise
+            name = match.group(1) if match else str(e)
+            raise NameError(f"Variable '{name}' is not defined") from None
+    return run_program
+
+
+if __name__ == "__main__":
+    from parser import parse
+
+    if len(sys.argv) < 2:
+        print("usage: python transpiler.py <program.lol>")
+        sys.exit(1)
+    tree = parse(sys.argv[1])
+    if tree:
+        print(transpile(tree), end="")
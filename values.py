@@ -0,0 +1,113 @@
+"""LOLCODE value semantics shared by every execution backend.
+
+NOOB is None, TROOF is bool, NUMBR is int, NUMBAR is float and YARN is str.
+The tree walker, the compiled backends and the symbol table display all go
+through these functions, so a program behaves the same whichever way it runs.
+"""
+
+
+# Convert value to number
+def to_number(value):
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1 if value else 0
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            if '.' in value:
+                return float(value)
+            return int(value)
+        except ValueError:
+            return 0
+    return 0
+
+
+# Convert value to boolean
+def to_boolean(value):
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, str):
+        return len(value) > 0
+    return False
+
+
+# Convert value to string for output
+def value_to_string(value):
+    if value is None:
+        return "NOOB"
+    if isinstance(value, bool):
+        return "WIN" if value else "FAIL"
+    if isinstance(value, float):
+        # Format float nicely
+        if value.is_integer():
+            return str(int(value))
+        return str(value)
+    return str(value)
+
+
+# Get LOLCODE type name for a value
+def get_type_name(value):
+    if value is None:
+        return "NOOB"
+    if isinstance(value, bool):
+        return "TROOF"
+    if isinstance(value, int):
+        return "NUMBR"
+    if isinstance(value, float):
+        return "NUMBAR"
+    if isinstance(value, str):
+        return "YARN"
+    return "NOOB"
+
+
+# MAEK / IS NOW A conversions, by target type
+CASTERS = {
+    "NOOB": lambda value: None,
+    "TROOF": to_boolean,
+    "NUMBR": lambda value: int(to_number(value)),
+    "NUMBAR": lambda value: float(to_number(value)),
+    "YARN": value_to_string,
+}
+
+
+# Convert a value to the named LOLCODE type
+def cast_value(value, type_name):
+    caster = CASTERS.get(type_name)
+    if caster is None:
+        raise ValueError(f"Unknown type: {type_name}")
+    return caster(value)
+
+
+# Parse input string to appropriate type
+def parse_input_value(input_str):
+    # past the end of input, with EOF_NOOB
+    if input_str is None:
+        return None
+    input_str = input_str.strip()
+
+    # Try boolean
+    if input_str == "WIN":
+        return True
+    elif input_str == "FAIL":
+        return False
+
+    # Try integer
+    try:
+        return int(input_str)
+    except ValueError:
+        pass
+
+    # Try float
+    try:
+        return float(input_str)
+    except ValueError:
+        pass
+
+    # Default to string
+    return input_str
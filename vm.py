@@ -0,0 +1,920 @@
+"""Bytecode backend: a compiler from the AST to linear code and a stack VM.
+
+Code is a flat array of (opcode, argument) integer pairs; a jump's
+argument is the index of the instruction it goes to. Literal values,
+casters and operator functions live in a constant pool, and every variable
+name is resolved at compile time to an integer slot, so at run time a
+variable is a list index instead of a dict lookup. The VM is one loop over
+the instructions with the operand stack and slots held in locals. It runs
+until HALT or RETURN rather than testing for the end of the code on every
+instruction.
+
+Dispatching an instruction costs about as much as the work of a simple one,
+so once a body is compiled, fuse() replaces the most common runs of
+instructions with superinstructions doing the work of the whole run: an
+operation on two variables or literals (x R SUM OF x AN 1 is a single
+BINARY_STORE), a comparison with the jump that tests it, an iteration step
+with the store of the loop variable. Their operands are slots, and each
+literal they use gets a read-only slot of its own after the variables.
+
+Names and slots map back to the interpreter's symbol table when the program
+finishes (or fails), so get_symbol_table_display works as with the tree
+walker.
+
+Each HOW IZ I body is compiled into Bytecode of its own, parameters in the
+first slots. A call runs it in a nested VM loop on a fresh slot list, which
+RETURN leaves with the function's value, and TAIL_CALL with the TailCall
+the interpreter makes in its place.
+"""
+import operator
+from array import array
+
+import ast_nodes as ast
+from loops import counted_loop, CountedValues, LOOP_STEPS
+from signals import TailCall
+from arithmetic import arithmetic_function, inline_cache
+from semantics import ProgramTypes
+from values import to_number, to_boolean, value_to_string, parse_input_value, CASTERS
+
+# Opcodes. Plain ints rather than an IntEnum: they are compared in the VM's
+# inner loop, where a module global int is the cheapest thing to compare.
+LOAD_CONST = 0      # push constants[arg]
+LOAD = 1            # push slots[arg], NameError if never assigned
+STORE = 2           # slots[arg] = pop()
+DUP = 3             # push top of stack again
+POP = 4             # drop top of stack
+ADD = 5             # arithmetic on the two top values by constants[arg], the
+                    # operation or its inline cache (see arithmetic.py), NUMBRs inline
+SUB = 6
+MUL = 7
+DIV = 8
+MOD = 9
+EQ = 10             # BOTH SAEM / DIFFRINT on raw values
+NE = 11
+CALL2 = 12          # push constants[arg](left, right)
+NOT = 13
+CAST = 14           # push constants[arg](pop()), a caster from values.CASTERS
+RECAST = 15         # slots[arg] = caster(slots[arg]), caster on the stack
+SMOOSH = 16         # join value_to_string of the arg top values
+PRINT = 17          # VISIBLE the arg top values
+INPUT = 18          # slots[arg] = GIMMEH
+JUMP = 19           # pc = arg
+POP_JUMP_IF_FALSE = 20
+FAIL = 21           # raise constants[arg]
+PEEK = 22           # push slots[arg] even if never assigned
+JUMP_IF_DEFINED = 23  # pc = arg if top is a value (kept), else pop it
+UNSET = 24          # slots[arg] = never assigned
+POP_JUMP_IF_TRUE = 25
+COUNTED_START = 26  # slot, step, relation = constants[arg]; bound -> CountedValues(slots[slot],
+                    # bound, step, relation), its iterator; slots[slot] = 0 if never assigned
+FOR_ITER = 27       # push the iterator's next value, or pop it and pc = arg
+COUNTED_END = 28    # slots[arg] = final value of the CountedValues popped
+SWITCH = 29         # table, default = constants[arg]; pc = table.get(pop(), default)
+JUMP_IF_FALSE_OR_POP = 30  # falsy top: replace it with FAIL and pc = arg, else pop it
+JUMP_IF_TRUE_OR_POP = 31   # truthy top: replace it with WIN and pc = arg, else pop it
+BOOL = 32           # push to_boolean(pop())
+PRINT_INLINE = 33   # PRINT without the newline, VISIBLE ... !
+DEFINE = 34         # name, parameters, bytecode = constants[arg]; HOW IZ I
+CALL = 35           # name, count = constants[arg]; call it on the count top values
+RETURN = 36         # leave the function with pop(), NOOB if never assigned
+TAIL_CALL = 37      # name, count = constants[arg]; leave the function with a TailCall
+HALT = 38           # end of the program
+START_AT_ZERO = 39  # slots[arg] = 0 if never assigned, an undeclared loop variable
+
+# Superinstructions, only made by fuse(); operands are slots, literals in
+# slots of their own after the variables, and a tuple in constants[arg].
+BINARY = 40         # f, a, b: push f(slots[a], slots[b])
+BINARY_STORE = 41   # f, a, b, d: slots[d] = f(slots[a], slots[b])
+COMPARE_JUMP = 42   # f, a, b, target: pc = target if f(slots[a], slots[b])
+COMPARE_JUMP_UNLESS = 43  # f, a, b, target: pc = target unless f(slots[a], slots[b])
+OPERATE_STORE = 44  # f, d: slots[d] = f(left, right) of the two top values
+COPY = 45           # a, d: slots[d] = slots[a]
+FOR_ITER_STORE = 46  # target, d: FOR_ITER, then STORE d
+STORE_JUMP_UNLESS = 47  # d, target: slots[d] = pop(), pc = target if it is falsy
+
+OPCODE_NAMES = [
+    'LOAD_CONST', 'LOAD', 'STORE', 'DUP', 'POP', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD',
+    'EQ', 'NE', 'CALL2', 'NOT', 'CAST', 'RECAST', 'SMOOSH', 'PRINT', 'INPUT', 'JUMP',
+    'POP_JUMP_IF_FALSE', 'FAIL', 'PEEK', 'JUMP_IF_DEFINED', 'UNSET', 'POP_JUMP_IF_TRUE',
+    'COUNTED_START', 'FOR_ITER', 'COUNTED_END', 'SWITCH', 'JUMP_IF_FALSE_OR_POP',
+    'JUMP_IF_TRUE_OR_POP', 'BOOL', 'PRINT_INLINE', 'DEFINE', 'CALL', 'RETURN',
+    'TAIL_CALL', 'HALT', 'START_AT_ZERO', 'BINARY', 'BINARY_STORE', 'COMPARE_JUMP',
+    'COMPARE_JUMP_UNLESS', 'OPERATE_STORE', 'COPY', 'FOR_ITER_STORE', 'STORE_JUMP_UNLESS',
+]
+
+# instructions whose arg is the index of an instruction to jump to
+JUMP_OPCODES = {JUMP, POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE, JUMP_IF_DEFINED, FOR_ITER,
+                JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP}
+# instructions pushing one slot or literal, operands of a superinstruction
+OPERAND_OPCODES = {LOAD, LOAD_CONST}
+# two-value opcodes -> the function of the values they compute, None when
+# it is constants[arg]
+BINARY_OPCODES = {ADD: None, SUB: None, MUL: None, DIV: None, MOD: None, CALL2: None,
+                  EQ: operator.eq, NE: operator.ne}
+
+ARITHMETIC_OPCODES = {
+    "SUM OF": ADD,
+    "DIFF OF": SUB,
+    "PRODUKT OF": MUL,
+    "QUOSHUNT OF": DIV,
+    "MOD OF": MOD,
+}
+COMPARISON_OPCODES = {"BOTH SAEM": EQ, "DIFFRINT": NE}
+# operators without an opcode of their own run through CALL2
+BINARY_FUNCTIONS = {
+    "BIGGR OF": lambda left, right: max(to_number(left), to_number(right)),
+    "SMALLR OF": lambda left, right: min(to_number(left), to_number(right)),
+    "WON OF": lambda left, right: to_boolean(left) != to_boolean(right),
+}
+# short-circuit operators -> jump taken by an operand that decides the result
+SHORT_CIRCUIT_JUMPS = {
+    "BOTH OF": JUMP_IF_FALSE_OR_POP,
+    "EITHER OF": JUMP_IF_TRUE_OR_POP,
+    "ALL OF": JUMP_IF_FALSE_OR_POP,
+    "ANY OF": JUMP_IF_TRUE_OR_POP,
+}
+
+
+class Bytecode:
+    """Compiled program: the code array, constant pool, slot names and the
+    values of the literal slots that follow the named ones."""
+    __slots__ = ('code', 'constants', 'names', 'literals')
+
+    def __init__(self, code, constants, names, literals=()):
+        self.code = code
+        self.constants = constants
+        self.names = names
+        self.literals = list(literals)
+
+    def disassemble(self):
+        lines = []
+        for pc, (opcode, arg) in enumerate(instructions(self)):
+            name = OPCODE_NAMES[opcode]
+            if opcode in (LOAD, STORE, INPUT, RECAST, PEEK, UNSET, COUNTED_END, START_AT_ZERO):
+                detail = self.names[arg]
+            elif opcode in (LOAD_CONST, CALL2, CAST, FAIL, COUNTED_START, SWITCH, DEFINE, CALL,
+                            TAIL_CALL) or opcode >= BINARY:
+                detail = repr(self.constants[arg])
+            else:
+                detail = ''
+            lines.append(f"{pc:6} {name:18} {arg:5} {detail}".rstrip())
+        return "\n".join(lines)
+
+
+class BytecodeCompiler:
+    def __init__(self, types=None):
+        # static types of the expressions, see semantics.py
+        self.types = types or ProgramTypes()
+        self.code = array('l')
+        self.constants = []
+        self.constant_index = {}
+        self.names = []
+        self.slots = {}
+        # one list per enclosing loop or WTF? of the GTFO jumps to patch to its exit;
+        # the outermost list is for GTFO outside loops, which ends the program
+        self.breaks = [[]]
+        self.compilers = ast.dispatch_table(self, 'compile_')
+
+    def compile(self, node):
+        if not isinstance(node, ast.Program):
+            raise ValueError("Expected program node")
+        self.compile_block(node.statements)
+        for position in self.breaks.pop():
+            self.patch(position, self.here())
+        self.emit(HALT)
+        return self.fuse()
+
+    def compile_function(self, node):
+        # a FunctionDefinition's body, returning IT when it runs off the end
+        # and NOOB on a GTFO outside any loop or WTF?
+        for parameter in node.parameters:
+            self.slot(parameter)
+        self.compile_block(node.statements)
+        self.emit(PEEK, self.slot('IT'))
+        self.emit(RETURN)
+        for position in self.breaks.pop():
+            self.patch(position, self.here())
+        self.emit(LOAD_CONST, self.constant(None))
+        self.emit(RETURN)
+        return self.fuse()
+
+    # helpers
+
+    def emit(self, opcode, arg=0):
+        # returns the index of the instruction, for patching jumps
+        self.code.append(opcode)
+        self.code.append(arg)
+        return len(self.code) // 2 - 1
+
+    def patch(self, position, target):
+        self.code[2 * position + 1] = target
+
+    def here(self):
+        # index of the next instruction
+        return len(self.code) // 2
+
+    def constant(self, value):
+        # literals are pooled by type and value, so 1, 1.0 and WIN stay apart
+        key = (type(value), value) if isinstance(value, (int, float, str, bool, type(None))) else id(value)
+        index = self.constant_index.get(key)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(value)
+            self.constant_index[key] = index
+        return index
+
+    def slot(self, name):
+        index = self.slots.get(name)
+        if index is None:
+            index = len(self.names)
+            self.names.append(name)
+            self.slots[name] = index
+        return index
+
+    def fail(self, error):
+        # invalid nodes raise when executed, like in the tree walker
+        self.emit(FAIL, self.constant(error))
+
+    # superinstructions
+
+    def fuse(self):
+        """The Bytecode of the compiled code with runs of instructions
+        replaced by superinstructions. A run is only replaced when no jump
+        lands inside it, and jumps are moved to where their target went."""
+        code = list(zip(self.code[0::2], self.code[1::2]))
+        targets = set()
+        for opcode, arg in code:
+            if opcode in JUMP_OPCODES:
+                targets.add(arg)
+            elif opcode == SWITCH:
+                table, default = self.constants[arg]
+                targets.update(table.values())
+                targets.add(default)
+
+        literals = {}
+        fused = []
+        # old instruction index -> new
+        moved = {}
+        pc = 0
+        while pc < len(code):
+            moved[pc] = len(fused)
+            for length in range(4, 1, -1):
+                run = code[pc:pc + length]
+                if len(run) < length or targets.intersection(range(pc + 1, pc + length)):
+                    continue
+                instruction = self.superinstruction(run, literals)
+                if instruction is not None:
+                    fused.append(instruction)
+                    break
+            else:
+                length = 1
+                fused.append(code[pc])
+            pc += length
+        moved[pc] = len(fused)
+
+        def destination(target):
+            # where a jump to old instruction target ends up, past any JUMPs
+            target = moved[target]
+            seen = set()
+            while target < len(fused) and fused[target][0] == JUMP and target not in seen:
+                seen.add(target)
+                target = moved[fused[target][1]]
+            return target
+
+        self.code = array('l')
+        for opcode, arg in fused:
+            if opcode in JUMP_OPCODES:
+                arg = destination(arg)
+            elif opcode == SWITCH:
+                table, default = self.constants[arg]
+                for value, target in table.items():
+                    table[value] = destination(target)
+                self.constants[arg][1] = destination(default)
+            elif opcode in (COMPARE_JUMP, COMPARE_JUMP_UNLESS):
+                function, a, b, target = arg
+                arg = self.constant((function, a, b, destination(target)))
+            elif opcode == FOR_ITER_STORE:
+                target, d = arg
+                arg = self.constant((destination(target), d))
+            elif opcode == STORE_JUMP_UNLESS:
+                d, target = arg
+                arg = self.constant((d, destination(target)))
+            elif opcode >= BINARY:
+                arg = self.constant(arg)
+            self.emit(opcode, arg)
+        return Bytecode(self.code, self.constants, self.names,
+                        [value for _, value in literals])
+
+    def superinstruction(self, run, literals):
+        # the one instruction doing the work of run, or None; its arg is
+        # still the tuple of operands, with old jump targets
+        opcodes = [opcode for opcode, _ in run]
+        if len(run) >= 3 and opcodes[0] in OPERAND_OPCODES and opcodes[1] in OPERAND_OPCODES \
+                and opcodes[2] in BINARY_OPCODES:
+            function = self.binary_function(*run[2])
+            a = self.register(*run[0], literals)
+            b = self.register(*run[1], literals)
+            if len(run) == 3:
+                return BINARY, (function, a, b)
+            last, arg = run[3]
+            if last == STORE:
+                return BINARY_STORE, (function, a, b, arg)
+            if opcodes[2] in (EQ, NE) and last == POP_JUMP_IF_TRUE:
+                return COMPARE_JUMP, (function, a, b, arg)
+            if opcodes[2] in (EQ, NE) and last == POP_JUMP_IF_FALSE:
+                return COMPARE_JUMP_UNLESS, (function, a, b, arg)
+            return None
+        if len(run) == 2:
+            (first, arg), (last, slot) = run
+            if last != STORE:
+                return None
+            if first in BINARY_OPCODES:
+                return OPERATE_STORE, (self.binary_function(first, arg), slot)
+            if first in OPERAND_OPCODES:
+                return COPY, (self.register(first, arg, literals), slot)
+            if first == FOR_ITER:
+                return FOR_ITER_STORE, (arg, slot)
+            return None
+        if len(run) == 3 and opcodes == [DUP, STORE, POP_JUMP_IF_FALSE]:
+            return STORE_JUMP_UNLESS, (run[1][1], run[2][1])
+        return None
+
+    def binary_function(self, opcode, arg):
+        function = BINARY_OPCODES[opcode]
+        return function if function is not None else self.constants[arg]
+
+    def register(self, opcode, arg, literals):
+        # the slot an operand instruction reads, a literal slot for LOAD_CONST
+        if opcode == LOAD:
+            return arg
+        value = self.constants[arg]
+        key = (type(value), value)
+        if key not in literals:
+            literals[key] = len(self.names) + len(literals)
+        return literals[key]
+
+    # STATEMENTS ===============================================================
+
+    def compile_block(self, statements):
+        for statement in statements:
+            self.compile_statement(statement)
+
+    def compile_statement(self, node):
+        # nodes the interpreter doesn't execute (yet) emit nothing
+        if not node:
+            return
+        compiler = self.compilers.get(type(node))
+        if compiler is not None and isinstance(node, ast.STATEMENT_NODES):
+            compiler(node)
+
+    def compile_variable_block(self, node):
+        self.compile_block(node.declarations)
+
+    def compile_variable_declaration(self, node):
+        if node.initial_value:
+            self.compile_expression(node.initial_value)
+        else:
+            self.emit(LOAD_CONST, self.constant(None))
+        self.emit(STORE, self.slot(node.identifier))
+
+    def compile_variable_assignment(self, node):
+        self.compile_expression(node.value)
+        self.emit(STORE, self.slot(node.identifier))
+
+    def compile_typecast_isnow(self, node):
+        caster = CASTERS.get(node.convert_to_type)
+        if caster is None:
+            self.fail(ValueError(f"Unknown type: {node.convert_to_type}"))
+            return
+        self.emit(LOAD_CONST, self.constant(caster))
+        self.emit(RECAST, self.slot(node.identifier))
+
+    def compile_expression_statement(self, node):
+        self.compile_expression(node.expression)
+        self.emit(STORE, self.slot('IT'))
+
+    def compile_conditional_statement(self, node):
+        self.compile_expression(node.condition)
+        self.emit(DUP)
+        self.emit(STORE, self.slot('IT'))
+        next_branch = self.emit(POP_JUMP_IF_FALSE)
+        self.compile_block(node.then_block)
+        exits = [self.emit(JUMP)]
+
+        for else_if in node.elseif_blocks:
+            self.patch(next_branch, self.here())
+            self.compile_expression(else_if.condition)
+            next_branch = self.emit(POP_JUMP_IF_FALSE)
+            self.compile_block(else_if.statements)
+            exits.append(self.emit(JUMP))
+
+        self.patch(next_branch, self.here())
+        if node.else_block is not None:
+            self.compile_block(node.else_block)
+        for position in exits:
+            self.patch(position, self.here())
+
+    def compile_loop_statement(self, node):
+        # the condition is tested before each pass, the variable stepped after
+        condition = node.loop_condition
+        name = condition.variable if condition is not None else None
+        plan = counted_loop(node)
+        if plan is not None:
+            self.compile_counted_loop(node, plan)
+            return
+        if name:
+            # an undeclared loop variable starts at 0
+            slot = self.slot(name)
+            self.emit(START_AT_ZERO, slot)
+
+        self.breaks.append([])
+        start = self.here()
+        exit_jump = None
+        if condition is not None and condition.condition is not None:
+            self.compile_expression(condition.condition)
+            exit_jump = self.emit(POP_JUMP_IF_TRUE if condition.loop_condition == "TIL" else POP_JUMP_IF_FALSE)
+        self.compile_block(node.statements)
+        step = LOOP_STEPS.get(condition.loop_operation) if name else None
+        if step is not None:
+            self.emit(LOAD, slot)
+            self.emit(LOAD_CONST, self.constant(step))
+            self.emit(ADD, self.constant(inline_cache("SUM OF")))
+            self.emit(STORE, slot)
+        self.emit(JUMP, start)
+        if exit_jump is not None:
+            self.patch(exit_jump, self.here())
+        for position in self.breaks.pop():
+            self.patch(position, self.here())
+
+    def compile_counted_loop(self, node, plan):
+        # a for loop over CountedValues (see loops.py), kept on the stack
+        # under its iterator while the loop runs; COUNTED_START also starts
+        # an undeclared loop variable at 0, the bound can't refer to it
+        slot = self.slot(plan.variable)
+        self.compile_expression(plan.bound)
+        self.emit(COUNTED_START, self.constant((slot, plan.step, plan.relation)))
+        self.breaks.append([])
+        start = self.emit(FOR_ITER)
+        self.emit(STORE, slot)
+        self.compile_block(node.statements)
+        self.emit(JUMP, start)
+        self.patch(start, self.here())
+        self.emit(COUNTED_END, slot)
+        breaks = self.breaks.pop()
+        if not breaks:
+            return
+        done = self.emit(JUMP)
+        # GTFO lands here with the iterator and the values still on the stack
+        for position in breaks:
+            self.patch(position, self.here())
+        self.emit(POP)
+        self.emit(POP)
+        self.patch(done, self.here())
+
+    def compile_switch_statement(self, node):
+        # the case bodies follow each other, so running on falls through;
+        # SWITCH looks the value up in a dict of where each body starts
+        if node.subject:
+            self.compile_expression(node.subject)
+            self.emit(DUP)
+            self.emit(STORE, self.slot('IT'))
+        else:
+            self.emit(LOAD, self.slot('IT'))
+        # filled in below, once the targets are known
+        table = {}
+        targets = [table, None]
+        self.emit(SWITCH, self.constant(targets))
+        self.breaks.append([])
+        for case in node.cases:
+            table.setdefault(case.value.value, self.here())
+            self.compile_block(case.statements)
+        targets[1] = self.here()
+        if node.default_block is not None:
+            self.compile_block(node.default_block)
+        end = self.here()
+        for position in self.breaks.pop():
+            self.patch(position, end)
+
+    def compile_break_statement(self, node):
+        self.breaks[-1].append(self.emit(JUMP))
+
+    def compile_function_definition(self, node):
+        bytecode = BytecodeCompiler(self.types).compile_function(node)
+        self.emit(DEFINE, self.constant((node.name, tuple(node.parameters), bytecode)))
+
+    def compile_return_statement(self, node):
+        if isinstance(node.value, ast.FunctionCall):
+            # tail call, made by the interpreter once this function has returned
+            for argument in node.value.arguments:
+                self.compile_expression(argument)
+            self.emit(TAIL_CALL, self.constant((node.value.name, len(node.value.arguments))))
+            return
+        self.compile_expression(node.value)
+        self.emit(RETURN)
+
+    def compile_reset_hoisted(self, node):
+        for name in node.names:
+            self.emit(UNSET, self.slot(name))
+
+    def compile_output_statement(self, node):
+        for expr in node.expressions:
+            self.compile_expression(expr)
+        self.emit(PRINT if node.newline else PRINT_INLINE, len(node.expressions))
+
+    def compile_input_statement(self, node):
+        self.emit(INPUT, self.slot(node.identifier))
+
+    # EXPRESSIONS ==============================================================
+
+    def compile_expression(self, node):
+        if not node:
+            self.emit(LOAD_CONST, self.constant(None))
+            return
+        compiler = self.compilers.get(type(node))
+        if compiler is None or not isinstance(node, ast.EXPRESSION_NODES):
+            self.fail(ValueError(f"Unknown expression type: {node.kind}"))
+            return
+        compiler(node)
+
+    def compile_literal(self, node):
+        self.emit(LOAD_CONST, self.constant(node.value))
+
+    def compile_type_literal(self, node):
+        # Type literals evaluate to NOOB
+        self.emit(LOAD_CONST, self.constant(None))
+
+    def compile_identifier(self, node):
+        self.emit(LOAD, self.slot(node.name))
+
+    def compile_binary(self, node, opcodes, kind):
+        opcode = opcodes.get(node.operator)
+        function = BINARY_FUNCTIONS.get(node.operator)
+        if opcode is None and function is None:
+            self.fail(ValueError(f"Unknown {kind} operator: {node.operator}"))
+            return
+        self.compile_expression(node.left)
+        self.compile_expression(node.right)
+        if opcode is not None:
+            self.emit(opcode)
+        else:
+            self.emit(CALL2, self.constant(function))
+
+    def compile_arithmetic_operation(self, node):
+        opcode = ARITHMETIC_OPCODES.get(node.operator)
+        if opcode is None:
+            self.fail(ValueError(f"Unknown arithmetic operator: {node.operator}"))
+            return
+        self.compile_expression(node.left)
+        self.compile_expression(node.right)
+        self.emit(opcode, self.constant(arithmetic_function(node, self.types)))
+
+    def compile_comparison_operation(self, node):
+        self.compile_binary(node, COMPARISON_OPCODES, "comparison")
+
+    def compile_logical_operation(self, node):
+        if node.operator in SHORT_CIRCUIT_JUMPS:
+            self.compile_short_circuit(node.operator, [node.left, node.right])
+        else:
+            self.compile_binary(node, {}, "logical")
+
+    def compile_variadic_logical_operation(self, node):
+        if node.operator not in SHORT_CIRCUIT_JUMPS:
+            self.fail(ValueError(f"Unknown logical operator: {node.operator}"))
+            return
+        self.compile_short_circuit(node.operator, node.operands)
+
+    def compile_short_circuit(self, operator, operands):
+        # each operand but the last can end the evaluation with its TROOF
+        jump = SHORT_CIRCUIT_JUMPS[operator]
+        exits = []
+        for operand in operands[:-1]:
+            self.compile_expression(operand)
+            exits.append(self.emit(jump))
+        self.compile_expression(operands[-1])
+        self.emit(BOOL)
+        for position in exits:
+            self.patch(position, self.here())
+
+    def compile_function_call(self, node):
+        for argument in node.arguments:
+            self.compile_expression(argument)
+        self.emit(CALL, self.constant((node.name, len(node.arguments))))
+
+    def compile_unary_operation(self, node):
+        if node.operator != "NOT":
+            self.fail(ValueError(f"Unknown unary operator: {node.operator}"))
+            return
+        self.compile_expression(node.operand)
+        self.emit(NOT)
+
+    def compile_hoisted_expression(self, node):
+        # the cached value if there is one, else evaluate and cache it
+        slot = self.slot(node.name)
+        self.emit(PEEK, slot)
+        cached = self.emit(JUMP_IF_DEFINED)
+        self.compile_expression(node.expression)
+        self.emit(DUP)
+        self.emit(STORE, slot)
+        self.patch(cached, self.here())
+
+    def compile_smoosh(self, node):
+        for part in node.parts:
+            self.compile_expression(part)
+        self.emit(SMOOSH, len(node.parts))
+
+    def compile_typecast_maek(self, node):
+        caster = CASTERS.get(node.convert_to_type)
+        if caster is None:
+            self.fail(ValueError(f"Unknown type: {node.convert_to_type}"))
+            return
+        self.compile_expression(node.expression)
+        self.emit(CAST, self.constant(caster))
+
+
+# marks a slot whose variable has not been assigned yet
+UNDEFINED = object()
+
+
+def execute(bytecode, interpreter, frame):
+    """Run bytecode with output/input through interpreter.
+
+    Slots start from frame (the symbol table dict) and every assigned slot
+    is written back to it at the end, also when the program raises.
+    """
+    code = instructions(bytecode)
+    names = bytecode.names
+    slots = [frame.get(name, UNDEFINED) for name in names] + bytecode.literals
+    try:
+        run(bytecode, code, slots, interpreter)
+    finally:
+        for name, value in zip(names, slots):
+            if value is not UNDEFINED:
+                frame[name] = value
+            else:
+                # e.g. a hoisted value reset by UNSET
+                frame.pop(name, None)
+
+
+def instructions(bytecode):
+    # the code as a list of (opcode, arg) tuples, what run() executes: one
+    # index and an unpack per instruction, no boxing of array items
+    code = bytecode.code
+    return list(zip(code[0::2], code[1::2]))
+
+
+def function_caller(bytecode, interpreter):
+    # call(*arguments) running a function's bytecode on slots of its own
+    code = instructions(bytecode)
+    unassigned = [UNDEFINED] * len(bytecode.names) + bytecode.literals
+
+    def call(*arguments):
+        slots = unassigned[:]
+        slots[:len(arguments)] = arguments
+        return run(bytecode, code, slots, interpreter)
+    return call
+
+
+def undefined(names, slot):
+    # the error for reading a variable that was never assigned
+    return NameError(f"Variable '{names[slot]}' is not defined")
+
+
+def run(bytecode, code, slots, interpreter):
+    # the VM loop; returns the value of RETURN, or None at HALT
+    constants = bytecode.constants
+    names = bytecode.names
+    write = interpreter.output.write
+    get_input = interpreter.get_input
+    call_function = interpreter.call_function
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    pc = 0
+
+    # the chain tests opcodes in order, so they come most frequent first,
+    # as counted over the benchmark.py programs
+    while True:
+        opcode, arg = code[pc]
+        pc += 1
+
+        if opcode == BINARY:
+            function, a, b = constants[arg]
+            left = slots[a]
+            right = slots[b]
+            if left is UNDEFINED or right is UNDEFINED:
+                raise undefined(names, a if left is UNDEFINED else b)
+            push(function(left, right))
+        elif opcode == LOAD:
+            value = slots[arg]
+            if value is UNDEFINED:
+                raise undefined(names, arg)
+            push(value)
+        elif opcode == JUMP:
+            pc = arg
+        elif opcode == OPERATE_STORE:
+            function, d = constants[arg]
+            right = pop()
+            slots[d] = function(pop(), right)
+        elif opcode == BINARY_STORE:
+            function, a, b, d = constants[arg]
+            left = slots[a]
+            right = slots[b]
+            if left is UNDEFINED or right is UNDEFINED:
+                raise undefined(names, a if left is UNDEFINED else b)
+            slots[d] = function(left, right)
+        elif opcode == LOAD_CONST:
+            push(constants[arg])
+        elif opcode == FOR_ITER_STORE:
+            target, d = constants[arg]
+            # a default instead of catching StopIteration, which costs more
+            # than a pass of a short loop
+            value = next(stack[-1], UNDEFINED)
+            if value is UNDEFINED:
+                pop()
+                pc = target
+            else:
+                slots[d] = value
+        elif opcode == STORE_JUMP_UNLESS:
+            d, target = constants[arg]
+            value = slots[d] = pop()
+            if not to_boolean(value):
+                pc = target
+        elif opcode == STORE:
+            slots[arg] = pop()
+        elif opcode == COPY:
+            a, d = constants[arg]
+            value = slots[a]
+            if value is UNDEFINED:
+                raise undefined(names, a)
+            slots[d] = value
+        elif opcode == CALL:
+            name, count = constants[arg]
+            if count:
+                arguments = stack[-count:]
+                del stack[-count:]
+            else:
+                arguments = []
+            push(call_function(name, arguments))
+        elif opcode == RETURN:
+            value = pop()
+            return None if value is UNDEFINED else value
+        elif opcode == TAIL_CALL:
+            name, count = constants[arg]
+            if count:
+                arguments = stack[-count:]
+                del stack[-count:]
+            else:
+                arguments = []
+            return TailCall(name, arguments)
+        elif opcode == START_AT_ZERO:
+            if slots[arg] is UNDEFINED:
+                slots[arg] = 0
+        elif opcode == PEEK:
+            push(slots[arg])
+        elif opcode == COMPARE_JUMP:
+            function, a, b, target = constants[arg]
+            left = slots[a]
+            right = slots[b]
+            if left is UNDEFINED or right is UNDEFINED:
+                raise undefined(names, a if left is UNDEFINED else b)
+            if function(left, right):
+                pc = target
+        elif opcode == COMPARE_JUMP_UNLESS:
+            function, a, b, target = constants[arg]
+            left = slots[a]
+            right = slots[b]
+            if left is UNDEFINED or right is UNDEFINED:
+                raise undefined(names, a if left is UNDEFINED else b)
+            if not function(left, right):
+                pc = target
+        elif opcode == PRINT:
+            if arg:
+                parts = stack[-arg:]
+                del stack[-arg:]
+            else:
+                parts = []
+            write(' '.join([value_to_string(part) for part in parts]) + '\n')
+        elif opcode == EQ:
+            right = pop()
+            push(pop() == right)
+        elif opcode == NE:
+            right = pop()
+            push(pop() != right)
+        elif opcode == JUMP_IF_DEFINED:
+            if stack[-1] is UNDEFINED:
+                pop()
+            else:
+                pc = arg
+        elif opcode == DUP:
+            push(stack[-1])
+        elif opcode == SWITCH:
+            table, default = constants[arg]
+            pc = table.get(pop(), default)
+        elif opcode == ADD:
+            right = pop()
+            left = pop()
+            if type(left) is int and type(right) is int:
+                push(left + right)
+            else:
+                push(constants[arg](left, right))
+        elif opcode == SUB:
+            right = pop()
+            left = pop()
+            if type(left) is int and type(right) is int:
+                push(left - right)
+            else:
+                push(constants[arg](left, right))
+        elif opcode == MUL:
+            right = pop()
+            left = pop()
+            if type(left) is int and type(right) is int:
+                push(left * right)
+            else:
+                push(constants[arg](left, right))
+        elif opcode == COUNTED_START:
+            slot, step, relation = constants[arg]
+            start = slots[slot]
+            if start is UNDEFINED:
+                start = slots[slot] = 0
+            values = CountedValues(start, pop(), step, relation)
+            push(values)
+            push(iter(values))
+        elif opcode == COUNTED_END:
+            slots[arg] = pop().final
+        elif opcode == POP_JUMP_IF_FALSE:
+            if not to_boolean(pop()):
+                pc = arg
+        elif opcode == FOR_ITER:
+            value = next(stack[-1], UNDEFINED)
+            if value is UNDEFINED:
+                pop()
+                pc = arg
+            else:
+                push(value)
+        elif opcode == POP_JUMP_IF_TRUE:
+            if to_boolean(pop()):
+                pc = arg
+        elif opcode == DIV or opcode == MOD:
+            right = pop()
+            push(constants[arg](pop(), right))
+        elif opcode == CALL2:
+            right = pop()
+            push(constants[arg](pop(), right))
+        elif opcode == NOT:
+            push(not to_boolean(pop()))
+        elif opcode == JUMP_IF_FALSE_OR_POP:
+            if to_boolean(stack[-1]):
+                pop()
+            else:
+                stack[-1] = False
+                pc = arg
+        elif opcode == JUMP_IF_TRUE_OR_POP:
+            if to_boolean(stack[-1]):
+                stack[-1] = True
+                pc = arg
+            else:
+                pop()
+        elif opcode == BOOL:
+            push(to_boolean(pop()))
+        elif opcode == POP:
+            pop()
+        elif opcode == PRINT_INLINE:
+            if arg:
+                parts = stack[-arg:]
+                del stack[-arg:]
+            else:
+                parts = []
+            write(' '.join([value_to_string(part) for part in parts]))
+        elif opcode == SMOOSH:
+            if arg:
+                parts = stack[-arg:]
+                del stack[-arg:]
+            else:
+                parts = []
+            push(''.join([value_to_string(part) for part in parts]))
+        elif opcode == CAST:
+            push(constants[arg](pop()))
+        elif opcode == RECAST:
+            caster = pop()
+            if slots[arg] is UNDEFINED:
+                raise undefined(names, arg)
+            slots[arg] = caster(slots[arg])
+        elif opcode == INPUT:
+            slots[arg] = parse_input_value(get_input())
+        elif opcode == UNSET:
+            slots[arg] = UNDEFINED
+        elif opcode == DEFINE:
+            name, parameters, function = constants[arg]
+            interpreter.define_function(name, parameters, function_caller(function, interpreter))
+        elif opcode == FAIL:
+            raise constants[arg]
+        elif opcode == HALT:
+            return None
+        else:
+            raise ValueError(f"Bad opcode {opcode} at {pc - 1}")
+
+
+def compile_program(program, interpreter):
+    # backend entry point, see interpreter.BACKENDS
+    bytecode = BytecodeCompiler(interpreter.types).compile(program)
+    return lambda frame: execute(bytecode, interpreter, frame)